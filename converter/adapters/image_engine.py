@@ -4,12 +4,15 @@ from .base import BaseEngine, ConversionResult
 Базовая реализация с возможностью расширения.
 """
 
+import shutil
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, Union
 
 
 # PIL imports для использования во всем модуле
 try:
+    from PIL import Image, ImageEnhance
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
@@ -17,6 +20,32 @@ except ImportError:
     ImageEnhance = None
 
 
+@lru_cache(maxsize=1)
+def _probe_dependencies() -> Dict[str, bool]:
+    """
+    Однократно проверяет наличие Pillow и OpenCV.
+    
+    Результат кэшируется на весь процесс - повторные импорты не нужны.
+    """
+    dependencies = {}
+    
+    # Проверяем PIL/Pillow
+    try:
+        from PIL import Image  # noqa: F401
+        dependencies['pillow'] = True
+    except ImportError:
+        dependencies['pillow'] = False
+    
+    # Проверяем OpenCV
+    try:
+        import cv2  # noqa: F401
+        dependencies['opencv'] = True
+    except ImportError:
+        dependencies['opencv'] = False
+    
+    return dependencies
+
+
 class ImageEngine(BaseEngine):
     """
     Адаптер для конвертации изображений.
@@ -85,6 +114,10 @@ class ImageEngine(BaseEngine):
                     error_message=f"Неподдерживаемый формат выходного файла: {output_format}"
                 )
             
+            # Формат не меняется и преобразований нет - копируем без перекодирования
+            if self._is_passthrough(input_file, output_format, kwargs):
+                return self._copy_passthrough(input_file, output_path, output_format)
+            
             # Проверяем доступность PIL
             if not self.is_available():
                 return ConversionResult(
@@ -119,12 +152,11 @@ class ImageEngine(BaseEngine):
             
             # Конвертируем в RGB для JPEG
             if output_format.lower() in ['jpg', 'jpeg'] and image.mode in ['RGBA', 'LA']:
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'RGBA':
-                    background.paste(image, mask=image.split()[-1])  # Используем альфа-канал
-                else:
-                    background.paste(image)
-                image = background
+                if image.mode == 'LA':
+                    image = image.convert('RGBA')
+                # Один проход смешивания с белым фоном вместо split() + paste по маске
+                background = Image.new('RGBA', image.size, (255, 255, 255, 255))
+                image = Image.alpha_composite(background, image).convert('RGB')
             
             # Сохраняем результат
             save_kwargs = {}
@@ -161,6 +193,58 @@ class ImageEngine(BaseEngine):
                 error_message=f"Произошла ошибка: {str(e)}"
             )
     
+    def _is_passthrough(self, input_file: Union[str, Path, Any], output_format: str, kwargs: Dict[str, Any]) -> bool:
+        """
+        Проверяет, можно ли отдать файл без декодирования и повторного сжатия.
+        
+        Returns:
+            bool: True если формат совпадает и не запрошено никаких преобразований
+        """
+        if kwargs.get('create_gif', False):
+            return False
+        if any(key in kwargs for key in ('width', 'height', 'resize', 'quality')):
+            return False
+        
+        filename = input_file.name if hasattr(input_file, 'name') else str(input_file)
+        input_format = Path(filename).suffix.lower().lstrip('.')
+        
+        jpeg_formats = ('jpg', 'jpeg')
+        if input_format in jpeg_formats and output_format in jpeg_formats:
+            return True
+        return input_format == output_format
+    
+    def _copy_passthrough(
+        self,
+        input_file: Union[str, Path, Any],
+        output_path: Union[str, Path],
+        output_format: str
+    ) -> ConversionResult:
+        """
+        Копирует исходный файл в output_path без перекодирования.
+        
+        Returns:
+            ConversionResult: Результат копирования
+        """
+        if hasattr(input_file, 'temporary_file_path'):
+            # Django TemporaryUploadedFile уже лежит на диске
+            shutil.copyfile(input_file.temporary_file_path(), output_path)
+        elif hasattr(input_file, 'read'):
+            if hasattr(input_file, 'seek'):
+                input_file.seek(0)
+            with open(output_path, 'wb') as output:
+                shutil.copyfileobj(input_file, output)
+        else:
+            shutil.copyfile(input_file, output_path)
+        
+        return ConversionResult(
+            success=True,
+            output_path=str(output_path),
+            metadata={
+                'format': output_format.upper(),
+                'reencoded': False,
+            }
+        )
+    
     def get_supported_formats(self) -> Dict[str, list]:
         """
         Возвращает поддерживаемые форматы файлов.
@@ -207,23 +291,7 @@ class ImageEngine(BaseEngine):
         Returns:
             dict: Статус доступности зависимостей
         """
-        dependencies = super().check_dependencies()
-        
-        # Проверяем PIL/Pillow
-        try:
-            from PIL import Image
-            dependencies['pillow'] = True
-        except ImportError:
-            dependencies['pillow'] = False
-        
-        # Проверяем OpenCV
-        try:
-            import cv2
-            dependencies['opencv'] = True
-        except ImportError:
-            dependencies['opencv'] = False
-        
-        return dependencies
+        return {**super().check_dependencies(), **_probe_dependencies()}
     
     def is_available(self) -> bool:
         """
@@ -325,28 +393,50 @@ class ImageEngine(BaseEngine):
         return frames
 
     def _effect_rotate(self, image, frames_count):
-        frames = []
-        for i in range(frames_count):
-            angle = 360 * (i / frames_count)
-            # expand=True чтобы избежать обрезки
-            rotated_img = image.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True)
-            
-            # Создаем фон и вставляем изображение, чтобы сохранить размер
-            background = Image.new('RGBA', (rotated_img.width, rotated_img.height), (255, 255, 255, 0))
-            background.paste(rotated_img, (0, 0), rotated_img)
-            
-            # Масштабируем до оригинального размера
-            final_frame = background.resize(image.size, Image.Resampling.LANCZOS)
-            frames.append(final_frame)
-        return frames
+        import numpy as np
+        
+        w, h = image.size
+        # Углы поворота и их синусы/косинусы считаем одним векторным вызовом
+        radians = -np.radians(np.linspace(0, 360, frames_count, endpoint=False))
+        cos, sin = np.cos(radians), np.sin(radians)
+        
+        # Размер холста после поворота с expand=True
+        expanded_w = np.abs(w * cos) + np.abs(h * sin)
+        expanded_h = np.abs(w * sin) + np.abs(h * cos)
+        
+        # Обратное аффинное преобразование: масштаб до исходного размера + поворот
+        # вокруг центра. Заменяет цепочку rotate(expand=True) -> paste -> resize.
+        scale_x = expanded_w / w
+        scale_y = expanded_h / h
+        center_x, center_y = expanded_w / 2, expanded_h / 2
+        matrices = np.stack([
+            cos * scale_x,
+            sin * scale_y,
+            w / 2 - cos * center_x - sin * center_y,
+            -sin * scale_x,
+            cos * scale_y,
+            h / 2 + sin * center_x - cos * center_y,
+        ], axis=1)
+        
+        return [
+            image.transform(
+                image.size,
+                Image.Transform.AFFINE,
+                tuple(matrix),
+                resample=Image.Resampling.BICUBIC,
+                fillcolor=(255, 255, 255, 0)
+            )
+            for matrix in matrices.tolist()
+        ]
 
     def _effect_bounce(self, image, frames_count):
-        import math
+        import numpy as np
+        
+        # Простое движение вверх-вниз: смещения для всех кадров считаем сразу
+        offsets = (15 * np.sin(2 * np.pi * np.arange(frames_count) / frames_count)).astype(int)
+        
         frames = []
-        w, h = image.size
-        for i in range(frames_count):
-            # Простое движение вверх-вниз
-            offset = int(15 * math.sin(2 * math.pi * i / frames_count))
+        for offset in offsets.tolist():
             frame = Image.new('RGBA', image.size, (255, 255, 255, 0))
             frame.paste(image, (0, offset))
             frames.append(frame)
@@ -5,12 +5,44 @@ from .base import BaseEngine, ConversionResult
 """
 
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from ..utils import VideoConverter
 
 
+@lru_cache(maxsize=None)
+def _probe_ffmpeg(ffmpeg_path: str) -> bool:
+    """
+    Проверяет доступность бинарника FFmpeg, кэшируя результат для каждого пути.
+    
+    Запуск `ffmpeg -version` - это fork + exec, повторять его на каждый запрос незачем.
+    """
+    return VideoConverter(use_moviepy=False)._check_ffmpeg(ffmpeg_path)
+
+
+def _convert_in_subprocess(
+    use_moviepy: bool,
+    config: Dict[str, Any],
+    input_path: str,
+    output_path: str,
+    kwargs: Dict[str, Any]
+) -> ConversionResult:
+    """
+    Выполняет одну конвертацию в дочернем процессе пула.
+    
+    VideoConverter читает входной файл через chunks(), поэтому путь
+    оборачивается в django.core.files.File.
+    """
+    from django.core.files import File
+    
+    engine = VideoEngine(use_moviepy=use_moviepy, **config)
+    with open(input_path, 'rb') as f:
+        return engine.convert(File(f, name=input_path), output_path, **kwargs)
+
+
 class VideoEngine(BaseEngine):
     """
     Адаптер для конвертации видео файлов.
@@ -101,10 +133,18 @@ class VideoEngine(BaseEngine):
                     input_file, str(output_path), **kwargs
                 )
                 
-                if success and os.path.exists(output_path):
+                # Один stat вместо exists() + getsize()
+                output_stat = None
+                if success:
+                    try:
+                        output_stat = os.stat(output_path)
+                    except FileNotFoundError:
+                        pass
+                
+                if output_stat is not None:
                     output_info = {
                         'format': 'gif',
-                        'size': os.path.getsize(output_path)
+                        'size': output_stat.st_size
                     }
                     
                     return ConversionResult(
@@ -141,6 +181,64 @@ class VideoEngine(BaseEngine):
             # Очищаем временные файлы
             self.cleanup_temp_files(temp_files)
     
+    def convert_batch(
+        self,
+        pairs: List[Tuple[Union[str, Path], Union[str, Path]]],
+        max_workers: Optional[int] = None,
+        **kwargs
+    ) -> List[ConversionResult]:
+        """
+        Параллельно конвертирует несколько видео файлов в отдельных процессах.
+        
+        FFmpeg сам по себе многопоточный, поэтому по умолчанию используется
+        половина доступных ядер.
+        
+        Args:
+            pairs: Список пар (входной путь, выходной путь)
+            max_workers: Количество процессов (по умолчанию cpu_count // 2)
+            **kwargs: Параметры конвертации, общие для всех файлов
+            
+        Returns:
+            list: Результаты конвертации в порядке входных пар.
+                  Неудачные конвертации имеют success=False.
+        """
+        if not pairs:
+            return []
+        
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+        
+        results: List[ConversionResult] = []
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    _convert_in_subprocess,
+                    self.use_moviepy,
+                    self.config,
+                    str(input_path),
+                    str(output_path),
+                    kwargs
+                )
+                for input_path, output_path in pairs
+            ]
+            
+            for (input_path, _), future in zip(pairs, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    self.logger.error(f"Ошибка при пакетной конвертации {input_path}: {e}")
+                    results.append(ConversionResult(
+                        success=False,
+                        error_message=f"Произошла ошибка: {str(e)}"
+                    ))
+        
+        failed = sum(1 for result in results if not result.success)
+        if failed:
+            self.logger.warning(f"Пакетная конвертация: {failed} из {len(results)} файлов с ошибкой")
+        
+        return results
+    
     def get_supported_formats(self) -> Dict[str, list]:
         """
         Возвращает поддерживаемые форматы файлов.
@@ -222,7 +320,7 @@ class VideoEngine(BaseEngine):
         try:
             from django.conf import settings
             ffmpeg_path = getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
-            dependencies['ffmpeg'] = self.video_converter._check_ffmpeg(ffmpeg_path)
+            dependencies['ffmpeg'] = _probe_ffmpeg(ffmpeg_path)
             dependencies['ffmpeg_path'] = ffmpeg_path
         except Exception:
             dependencies['ffmpeg'] = False
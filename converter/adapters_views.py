@@ -3,18 +3,250 @@
 Демонстрация интеграции слоя адаптеров с Django views.
 """
 
-import tempfile
+import time
+import hashlib
 import logging
-from django.http import JsonResponse
+from dataclasses import dataclass, fields
+from functools import lru_cache, partial
+from typing import Optional
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import etag, require_http_methods
 from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
 
+from converter_settings import TEMP_DIRS
 from .adapters import engine_manager, VideoEngine
-from .utils import save_converted_gif, cleanup_temp_files
+from .models import ConversionTask
+from .tasks import run_adapter_conversion
+from .utils import build_converted_gif_path, cleanup_temp_files, dump_json, json_response
 
 logger = logging.getLogger(__name__)
 
+# Как долго (в секундах) переиспользуется снимок статуса адаптеров
+ENGINE_STATUS_TTL = 60
+
+# Значения флажков формы, которые считаются включенными
+_TRUTHY = frozenset(('true', 'on', '1'))
+
+# Значения необязательных параметров, которые считаются незаполненными
+_EMPTY_VALUES = frozenset((None, '', 'None'))
+
+# Параметры, которые video_convert_adapter_view передает адаптеру
+_VIDEO_PARAM_KEYS = ('fps', 'start_time', 'width', 'end_time', 'keep_original_size')
+
+# Частые ответы с ошибкой сериализуются один раз при импорте
+_ERR_NO_FILE = dump_json({'success': False, 'error': 'Файл не найден'})
+_ERR_NO_VIDEO = dump_json({'success': False, 'error': 'Видеофайл не найден'})
+_ERR_ENQUEUE = dump_json({'success': False, 'error': 'Ошибка запуска обработки'})
+_ERR_UNKNOWN_TYPE = dump_json({'success': False, 'error': 'Не удалось определить тип файла'})
+_ERR_BAD_REQUEST = dump_json({'success': False, 'error': 'Неверный запрос'})
+
+
+def _status_bucket():
+    """Номер временного окна для кэширования статуса адаптеров."""
+    return int(time.time() // ENGINE_STATUS_TTL)
+
+
+@lru_cache(maxsize=1)
+def _engine_status_snapshot(bucket):
+    """
+    Снимок статуса и форматов всех адаптеров.
+    
+    Проверка зависимостей запускает подпроцессы, поэтому результат
+    переиспользуется в пределах одного окна `bucket`.
+    
+    Returns:
+        tuple: (готовое JSON тело ответа, ETag)
+    """
+    body = dump_json({
+        'success': True,
+        'engines_status': engine_manager.get_engine_status(),
+        'supported_formats': engine_manager.get_supported_formats(),
+    })
+    return body, hashlib.md5(body).hexdigest()
+
+
+def _engine_status_etag(request):
+    """ETag для engine_status_view: меняется только вместе со снимком статуса."""
+    try:
+        return _engine_status_snapshot(_status_bucket())[1]
+    except Exception:
+        # Ошибку вернет сама view
+        return None
+
+
+@lru_cache(maxsize=16)
+def _engine_info_snapshot(engine_type, bucket):
+    """
+    Снимок форматов, зависимостей и доступности одного адаптера.
+    
+    Returns:
+        dict или None, если адаптер недоступен
+    """
+    engine = engine_manager.get_engine(engine_type)
+    if not engine:
+        return None
+    return {
+        'supported_formats': engine.get_supported_formats(),
+        'dependencies': engine.check_dependencies(),
+        'available': engine.is_available(),
+    }
+
+
+@lru_cache(maxsize=None)
+def _get_video_engine(use_moviepy):
+    """
+    Общий экземпляр VideoEngine для заданного режима.
+    
+    Адаптер не хранит состояния конкретной конвертации, поэтому его можно
+    переиспользовать между запросами (в том числе из разных потоков).
+    """
+    return VideoEngine(use_moviepy=use_moviepy)
+
+
+class ConversionParamsError(ValueError):
+    """Некорректный параметр конвертации в запросе."""
+
+
+def _parse_int(post, key, default):
+    """Целое неотрицательное число из POST данных или default, если параметр не задан."""
+    value = post.get(key)
+    if value in _EMPTY_VALUES:
+        return default
+    if value.isascii() and value.isdigit():
+        return int(value)
+    raise ConversionParamsError(f'Параметр {key} должен быть целым неотрицательным числом')
+
+
+@dataclass
+class ConversionParams:
+    """
+    Параметры конвертации видео, разобранные и проверенные один раз.
+    
+    Некорректные значения отклоняются до сохранения файла и создания задачи.
+    """
+    fps: int = 15
+    start_time: int = 0
+    width: Optional[int] = None
+    end_time: Optional[int] = None
+    speed: float = 1.0
+    dither: str = 'bayer'
+    keep_original_size: bool = False
+    grayscale: bool = False
+    reverse: bool = False
+    boomerang: bool = False
+    high_quality: bool = False
+    
+    @classmethod
+    def from_post(cls, post):
+        """
+        Разбор параметров из request.POST.
+        
+        Raises:
+            ConversionParamsError: Если параметр задан некорректно
+        """
+        speed = post.get('speed')
+        if speed in _EMPTY_VALUES:
+            speed = 1.0
+        else:
+            try:
+                speed = float(speed)
+            except ValueError:
+                raise ConversionParamsError('Параметр speed должен быть числом')
+            if not 0 < speed <= 10:
+                raise ConversionParamsError('Параметр speed должен быть в диапазоне (0, 10]')
+        
+        params = cls(
+            fps=_parse_int(post, 'fps', 15),
+            start_time=_parse_int(post, 'start_time', 0),
+            width=_parse_int(post, 'width', None),
+            end_time=_parse_int(post, 'end_time', None),
+            speed=speed,
+            dither=post.get('dither') or 'bayer',
+            keep_original_size=post.get('keep_original_size') in _TRUTHY,
+            grayscale=post.get('grayscale') in _TRUTHY,
+            reverse=post.get('reverse') in _TRUTHY,
+            boomerang=post.get('boomerang') in _TRUTHY,
+            high_quality=post.get('high_quality') in _TRUTHY,
+        )
+        
+        if params.fps == 0:
+            raise ConversionParamsError('Параметр fps должен быть больше нуля')
+        if params.end_time is not None and params.end_time <= params.start_time:
+            raise ConversionParamsError('Параметр end_time должен быть больше start_time')
+        return params
+    
+    def as_kwargs(self, keys=None):
+        """
+        Параметры для адаптера без незаданных значений.
+        
+        Args:
+            keys: Какие параметры передать (по умолчанию все)
+        """
+        if keys is None:
+            keys = _CONVERSION_PARAM_KEYS
+        return {key: value for key in keys if (value := getattr(self, key)) is not None}
+
+
+_CONVERSION_PARAM_KEYS = tuple(field.name for field in fields(ConversionParams))
+
+
+def _start_adapter_conversion(task, stored_path):
+    """Постановка задачи адаптера в очередь Celery (вызывается после commit)"""
+    try:
+        run_adapter_conversion.delay(task.id)
+    except Exception as e:
+        # Если не удалось поставить задачу в очередь, помечаем ее как неудачную
+        task.fail(f"Ошибка запуска обработки: {str(e)}")
+        cleanup_temp_files([default_storage.path(stored_path)])
+        logger.error(f"Ошибка запуска Celery задачи: {str(e)}")
+
+
+def _enqueue_adapter_conversion(input_file, output_format, conversion_params, engine_type=None, engine_config=None):
+    """
+    Сохраняет загруженный файл, создает ConversionTask и ставит конвертацию в очередь Celery.
+    
+    Args:
+        input_file: Загруженный файл
+        output_format: Выходной формат
+        conversion_params: Параметры конвертации
+        engine_type: Тип адаптера (если не указан, определяется по имени файла)
+        engine_config: Параметры конструктора адаптера
+    
+    Returns:
+        HttpResponse: JSON ответ с ID задачи для опроса статуса
+    """
+    stored_path = default_storage.save(f"{TEMP_DIRS['upload']}/{input_file.name}", input_file)
+    
+    with transaction.atomic():
+        task = ConversionTask.objects.create(
+            status=ConversionTask.STATUS_QUEUED,
+            task_metadata={
+                'original_filename': input_file.name,
+                'input_format': input_file.name.rsplit('.', 1)[-1].lower(),
+                'output_format': output_format.lower(),
+                'file_path': default_storage.path(stored_path),
+                'file_size': input_file.size,
+                'engine_type': engine_type,
+                'engine_config': engine_config or {},
+                'conversion_params': conversion_params,
+            }
+        )
+        # Воркер стартует только после фиксации транзакции, иначе он может не найти задачу
+        transaction.on_commit(partial(_start_adapter_conversion, task, stored_path))
+    
+    if task.status == ConversionTask.STATUS_FAILED:
+        return json_response(_ERR_ENQUEUE)
+    
+    logger.info(f"Создана задача конвертации {task.id} для файла {input_file.name}")
+    
+    return json_response({
+        'success': True,
+        'task_id': task.id,
+        'message': 'Задача создана и отправлена на обработку'
+    })
+
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -22,13 +254,11 @@ def convert_with_adapters_view(request):
     """
     Конвертация файлов с использованием нового слоя адаптеров.
     Универсальная функция для обработки различных типов файлов.
+    Возвращает ID задачи ConversionTask, результат появляется в ее метаданных.
     """
     try:
         if 'file' not in request.FILES:
-            return JsonResponse({
-                'success': False,
-                'error': 'Файл не найден'
-            })
+            return json_response(_ERR_NO_FILE)
         
         input_file = request.FILES['file']
         
@@ -37,74 +267,22 @@ def convert_with_adapters_view(request):
         engine_type = request.POST.get('engine_type')  # Опционально
         
         # Дополнительные параметры (для видео)
-        conversion_params = {
-            'width': request.POST.get('width'),
-            'fps': int(request.POST.get('fps', 15)),
-            'start_time': int(request.POST.get('start_time', 0)),
-            'end_time': request.POST.get('end_time'),
-            'keep_original_size': request.POST.get('keep_original_size') in ['true', 'on', '1'],
-            'speed': float(request.POST.get('speed', '1.0') or 1.0),
-            'grayscale': request.POST.get('grayscale') in ['true', 'on', '1'],
-            'reverse': request.POST.get('reverse') in ['true', 'on', '1'],
-            'boomerang': request.POST.get('boomerang') in ['true', 'on', '1'],
-            'high_quality': request.POST.get('high_quality') in ['true', 'on', '1'],
-            'dither': request.POST.get('dither', 'bayer'),
-        }
-        
-        # Очищаем None значения
-        conversion_params = {k: v for k, v in conversion_params.items() 
-                           if v is not None and v != '' and v != 'None'}
-        
-        # Создаем временный файл для результата
-        with tempfile.NamedTemporaryFile(suffix=f'.{output_format}', delete=False) as temp_output:
-            temp_output_path = temp_output.name
-        
         try:
-            # Выполняем конвертацию через менеджер адаптеров
-            result = engine_manager.convert_file(
-                input_file=input_file,
-                output_path=temp_output_path,
-                engine_type=engine_type,
-                **conversion_params
-            )
-            
-            if result.success:
-                # Для GIF файлов используем существующую логику сохранения
-                if output_format.lower() == 'gif':
-                    gif_url = save_converted_gif(temp_output_path, input_file.name)
-                    if gif_url:
-                        return JsonResponse({
-                            'success': True,
-                            'output_url': gif_url,
-                            'metadata': result.metadata,
-                            'message': 'Конвертация завершена успешно!'
-                        })
-                    else:
-                        return JsonResponse({
-                            'success': False,
-                            'error': 'Ошибка при сохранении результата'
-                        })
-                else:
-                    # Для других форматов можно добавить свою логику сохранения
-                    return JsonResponse({
-                        'success': True,
-                        'output_path': result.output_path,
-                        'metadata': result.metadata,
-                        'message': 'Конвертация завершена успешно!'
-                    })
-            else:
-                return JsonResponse({
-                    'success': False,
-                    'error': result.error_message
-                })
-                
-        finally:
-            # Очищаем временные файлы
-            cleanup_temp_files([temp_output_path])
+            conversion_params = ConversionParams.from_post(request.POST).as_kwargs()
+        except ConversionParamsError as e:
+            return json_response({'success': False, 'error': str(e)}, status=400)
+        
+        # Конвертация выполняется воркером Celery, view сразу возвращает ID задачи
+        return _enqueue_adapter_conversion(
+            input_file,
+            output_format,
+            conversion_params,
+            engine_type=engine_type
+        )
             
     except Exception as e:
         logger.error(f"Ошибка при конвертации через адаптеры: {e}")
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': f'Произошла ошибка: {str(e)}'
         })
@@ -115,109 +293,62 @@ def convert_with_adapters_view(request):
 def video_convert_adapter_view(request):
     """
     Специализированная конвертация видео с использованием VideoEngine.
-    Демонстрирует прямое использование конкретного адаптера.
+    Проверяет доступность адаптера и ставит конвертацию в GIF в очередь.
     """
     try:
         if 'video' not in request.FILES:
-            return JsonResponse({
-                'success': False,
-                'error': 'Видеофайл не найден'
-            })
+            return json_response(_ERR_NO_VIDEO)
         
         video_file = request.FILES['video']
         
         # Получаем параметры
         use_moviepy = request.POST.get('use_moviepy', 'true').lower() == 'true'
+        try:
+            conversion_params = ConversionParams.from_post(request.POST).as_kwargs(_VIDEO_PARAM_KEYS)
+        except ConversionParamsError as e:
+            return json_response({'success': False, 'error': str(e)}, status=400)
         
-        # Создаем адаптер видео напрямую
-        video_engine = VideoEngine(use_moviepy=use_moviepy)
+        # Адаптер видео для выбранного режима создается один раз на процесс
+        video_engine = _get_video_engine(use_moviepy)
         
         # Проверяем доступность
         if not video_engine.is_available():
             deps = video_engine.check_dependencies()
-            return JsonResponse({
+            return json_response({
                 'success': False,
                 'error': f'Видео адаптер недоступен. Статус зависимостей: {deps}'
             })
         
-        # Получаем информацию о видео
-        video_info = video_engine.get_video_info(video_file)
-        
-        # Параметры конвертации
-        conversion_params = {
-            'width': request.POST.get('width'),
-            'fps': int(request.POST.get('fps', 15)),
-            'start_time': int(request.POST.get('start_time', 0)),
-            'end_time': request.POST.get('end_time'),
-            'keep_original_size': request.POST.get('keep_original_size') in ['true', 'on', '1'],
-        }
-        
-        # Очищаем None значения
-        conversion_params = {k: v for k, v in conversion_params.items() 
-                           if v is not None and v != '' and v != 'None'}
-        
-        # Создаем временный файл для GIF
-        with tempfile.NamedTemporaryFile(suffix='.gif', delete=False) as temp_gif:
-            temp_gif_path = temp_gif.name
-        
-        try:
-            # Выполняем конвертацию
-            result = video_engine.convert(
-                input_file=video_file,
-                output_path=temp_gif_path,
-                **conversion_params
-            )
-            
-            if result.success:
-                # Сохраняем GIF
-                gif_url = save_converted_gif(temp_gif_path, video_file.name)
-                if gif_url:
-                    return JsonResponse({
-                        'success': True,
-                        'gif_url': gif_url,
-                        'video_info': video_info,
-                        'conversion_metadata': result.metadata,
-                        'message': 'Видео успешно конвертировано в GIF!'
-                    })
-                else:
-                    return JsonResponse({
-                        'success': False,
-                        'error': 'Ошибка при сохранении GIF файла'
-                    })
-            else:
-                return JsonResponse({
-                    'success': False,
-                    'error': result.error_message
-                })
-                
-        finally:
-            cleanup_temp_files([temp_gif_path])
+        # Конвертация выполняется воркером Celery, view сразу возвращает ID задачи
+        return _enqueue_adapter_conversion(
+            video_file,
+            'gif',
+            conversion_params,
+            engine_type='video',
+            engine_config={'use_moviepy': use_moviepy}
+        )
             
     except Exception as e:
         logger.error(f"Ошибка при конвертации видео через адаптер: {e}")
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': f'Произошла ошибка: {str(e)}'
         })
 
 
+@etag(_engine_status_etag)
 def engine_status_view(request):
     """
     Возвращает статус всех адаптеров конвертации.
+    Повторный запрос с If-None-Match получает 304 без тела.
     """
     try:
-        status = engine_manager.get_engine_status()
-        supported_formats = engine_manager.get_supported_formats()
-        
-        return JsonResponse({
-            'success': True,
-            'engines_status': status,
-            'supported_formats': supported_formats,
-        })
+        body, _ = _engine_status_snapshot(_status_bucket())
+        return json_response(body)
         
     except Exception as e:
         logger.error(f"Ошибка при получении статуса адаптеров: {e}")
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': f'Произошла ошибка: {str(e)}'
         })
@@ -229,37 +360,26 @@ def detect_file_type_view(request):
     """
     try:
         if 'file' not in request.FILES:
-            return JsonResponse({
-                'success': False,
-                'error': 'Файл не найден'
-            })
+            return json_response(_ERR_NO_FILE)
         
         file = request.FILES['file']
         engine_type = engine_manager.detect_engine_type(file.name)
         
         if engine_type:
-            # Получаем адаптер и его информацию
-            engine = engine_manager.get_engine(engine_type)
-            if engine:
-                supported_formats = engine.get_supported_formats()
-                dependencies = engine.check_dependencies()
-                
-                return JsonResponse({
+            # Получаем информацию об адаптере (кэшируется на ENGINE_STATUS_TTL)
+            engine_info = _engine_info_snapshot(engine_type, _status_bucket())
+            if engine_info:
+                return json_response({
                     'success': True,
                     'engine_type': engine_type,
-                    'supported_formats': supported_formats,
-                    'dependencies': dependencies,
-                    'available': engine.is_available()
+                    **engine_info
                 })
         
-        return JsonResponse({
-            'success': False,
-            'error': 'Не удалось определить тип файла'
-        })
+        return json_response(_ERR_UNKNOWN_TYPE)
         
     except Exception as e:
         logger.error(f"Ошибка при определении типа файла: {e}")
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': f'Произошла ошибка: {str(e)}'
         })
@@ -275,47 +395,43 @@ def legacy_video_convert_view(request):
         if request.method == 'POST' and 'video' in request.FILES:
             video_file = request.FILES['video']
             
-            # Создаем VideoEngine с настройками по умолчанию
-            video_engine = VideoEngine(use_moviepy=True)
+            # VideoEngine с настройками по умолчанию
+            video_engine = _get_video_engine(True)
             
-            # Создаем временный GIF файл
-            with tempfile.NamedTemporaryFile(suffix='.gif', delete=False) as temp_gif:
-                temp_gif_path = temp_gif.name
+            # GIF пишем сразу в медиа папку
+            gif_path, gif_url = build_converted_gif_path(video_file.name)
             
+            result = None
             try:
                 # Базовые параметры конвертации
                 result = video_engine.convert(
                     input_file=video_file,
-                    output_path=temp_gif_path,
+                    output_path=str(gif_path),
                     width=480,
                     fps=15
                 )
                 
                 if result.success:
-                    gif_url = save_converted_gif(temp_gif_path, video_file.name)
-                    if gif_url:
-                        return JsonResponse({
-                            'success': True,
-                            'gif_url': gif_url,
-                            'message': 'Конвертация завершена успешно!'
-                        })
+                    return json_response({
+                        'success': True,
+                        'gif_url': gif_url,
+                        'message': 'Конвертация завершена успешно!'
+                    })
                 
-                return JsonResponse({
+                return json_response({
                     'success': False,
                     'error': result.error_message if result else 'Неизвестная ошибка'
                 })
                 
             finally:
-                cleanup_temp_files([temp_gif_path])
+                if result is None or not result.success:
+                    cleanup_temp_files([str(gif_path)])
         
-        return JsonResponse({
-            'success': False,
-            'error': 'Неверный запрос'
-        })
+        return json_response(_ERR_BAD_REQUEST)
         
     except Exception as e:
         logger.error(f"Ошибка в legacy view: {e}")
-        return JsonResponse({
+        return json_response({
             'success': False,
             'error': f'Произошла ошибка: {str(e)}'
         })
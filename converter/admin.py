@@ -1,8 +1,65 @@
 from django.contrib import admin
-from django.utils.html import format_html
+from django.core.paginator import Paginator
+from django.db.models.fields.json import KeyTextTransform
+from django.utils import timezone
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
 from .models import ConversionTask
 
 
+# Готовые HTML-фрагменты для колонок списка: собираются один раз при импорте,
+# а не разбираются через format_html для каждой строки
+_STATUS_COLORS = {
+    ConversionTask.STATUS_QUEUED: '#ffc107',    # желтый
+    ConversionTask.STATUS_RUNNING: '#007bff',   # синий
+    ConversionTask.STATUS_DONE: '#28a745',      # зеленый
+    ConversionTask.STATUS_FAILED: '#dc3545',    # красный
+}
+_STATUS_SPAN = '<span style="color: {}; font-weight: bold;">'
+_STATUS_SPANS = {status: mark_safe(_STATUS_SPAN.format(color)) for status, color in _STATUS_COLORS.items()}
+_STATUS_SPAN_DEFAULT = mark_safe(_STATUS_SPAN.format('#6c757d'))
+_SPAN_CLOSE = mark_safe('</span>')
+
+_PROGRESS_BAR = (
+    '<div style="width: 100px; height: 20px; background-color: #e9ecef; border-radius: 4px; overflow: hidden;">'
+    '<div style="width: {progress}%; height: 100%; background-color: {color}; transition: width 0.3s;"></div>'
+    '</div><span style="margin-left: 5px;">{progress}%</span>'
+)
+
+
+class KeysetPaginator(Paginator):
+    """
+    Пагинатор списка задач без OFFSET по полным строкам.
+    
+    При сортировке по -id граница страницы ищется только по индексу
+    первичного ключа, а сами строки выбираются условием id <= граница.
+    При любой другой сортировке работает как обычный Paginator.
+    """
+    KEYSET_ORDERINGS = (('-id',), ('-pk',))
+    
+    def _uses_keyset(self):
+        query = getattr(self.object_list, 'query', None)
+        return query is not None and tuple(query.order_by) in self.KEYSET_ORDERINGS
+    
+    def page(self, number):
+        if not self._uses_keyset():
+            return super().page(number)
+        
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        
+        object_list = self.object_list
+        if bottom:
+            boundary = list(object_list.values_list('id', flat=True)[bottom:bottom + 1])
+            if not boundary:
+                return self._get_page(object_list.none(), number, self)
+            object_list = object_list.filter(id__lte=boundary[0])
+        return self._get_page(object_list[:top - bottom], number, self)
+
+
 @admin.register(ConversionTask)
 class ConversionTaskAdmin(admin.ModelAdmin):
     list_display = [
@@ -12,6 +69,10 @@ class ConversionTaskAdmin(admin.ModelAdmin):
     list_filter = ['status', 'created_at']
     search_fields = ['id', 'task_metadata']
     readonly_fields = ['created_at', 'updated_at', 'started_at', 'completed_at', 'duration_display']
+    # id растет вместе с created_at, а сортировка по -id позволяет KeysetPaginator
+    # не сканировать предыдущие страницы целиком
+    ordering = ['-id']
+    paginator = KeysetPaginator
     
     fieldsets = (
         ('Основная информация', {
@@ -27,40 +88,44 @@ class ConversionTaskAdmin(admin.ModelAdmin):
         })
     )
     
+    def get_queryset(self, request):
+        """
+        Для списка задач не загружаем task_metadata целиком: нужные поля
+        извлекаются на стороне БД, чтобы не разбирать JSON для каждой строки.
+        """
+        qs = super().get_queryset(request)
+        
+        resolver_match = getattr(request, 'resolver_match', None)
+        url_name = getattr(resolver_match, 'url_name', None) or ''
+        if url_name.endswith('changelist'):
+            qs = qs.defer('task_metadata').annotate(
+                _filename=KeyTextTransform('original_filename', 'task_metadata'),
+                _in_fmt=KeyTextTransform('input_format', 'task_metadata'),
+                _out_fmt=KeyTextTransform('output_format', 'task_metadata'),
+            )
+        return qs
+    
     def status_colored(self, obj):
         """Отображение статуса с цветовой индикацией"""
-        colors = {
-            ConversionTask.STATUS_QUEUED: '#ffc107',    # желтый
-            ConversionTask.STATUS_RUNNING: '#007bff',   # синий  
-            ConversionTask.STATUS_DONE: '#28a745',      # зеленый
-            ConversionTask.STATUS_FAILED: '#dc3545',    # красный
-        }
-        color = colors.get(obj.status, '#6c757d')
-        return format_html(
-            '<span style="color: {}; font-weight: bold;">{}</span>',
-            color,
-            obj.get_status_display()
-        )
+        span = _STATUS_SPANS.get(obj.status, _STATUS_SPAN_DEFAULT)
+        return span + escape(obj.STATUS_LABELS.get(obj.status, obj.status)) + _SPAN_CLOSE
     status_colored.short_description = 'Статус'
     status_colored.admin_order_field = 'status'
     
     def progress_bar(self, obj):
         """Отображение прогресса в виде прогресс-бара"""
-        if obj.progress == 0:
+        progress = int(obj.progress)
+        if progress == 0:
             color = '#6c757d'  # серый
-        elif obj.progress < 50:
+        elif progress < 50:
             color = '#ffc107'  # желтый
-        elif obj.progress < 100:
+        elif progress < 100:
             color = '#007bff'  # синий
         else:
             color = '#28a745'  # зеленый
-            
-        return format_html(
-            '<div style="width: 100px; height: 20px; background-color: #e9ecef; border-radius: 4px; overflow: hidden;">' +
-            '<div style="width: {}%; height: 100%; background-color: {}; transition: width 0.3s;"></div>' +
-            '</div><span style="margin-left: 5px;">{}%</span>',
-            obj.progress, color, obj.progress
-        )
+        
+        # progress приведен к int, color - константа: экранирование не требуется
+        return mark_safe(_PROGRESS_BAR.format(progress=progress, color=color))
     progress_bar.short_description = 'Прогресс'
     progress_bar.admin_order_field = 'progress'
     
@@ -86,18 +151,21 @@ class ConversionTaskAdmin(admin.ModelAdmin):
                 return f'{seconds}с'
         return '-'
     duration_display.short_description = 'Длительность'
+    duration_display.admin_order_field = 'duration_seconds'
     
     def get_filename(self, obj):
         """Получить имя исходного файла из метаданных"""
-        return obj.get_metadata('original_filename', 'Не указано')
+        return obj._filename or 'Не указано'
     get_filename.short_description = 'Файл'
+    get_filename.admin_order_field = '_filename'
     
     def get_format_conversion(self, obj):
         """Получить информацию о конвертации форматов"""
-        input_format = obj.get_metadata('input_format', '?')
-        output_format = obj.get_metadata('output_format', '?')
+        input_format = obj._in_fmt or '?'
+        output_format = obj._out_fmt or '?'
         return f'{input_format.upper()} → {output_format.upper()}'
     get_format_conversion.short_description = 'Конвертация'
+    get_format_conversion.admin_order_field = '_in_fmt'
     
     def has_add_permission(self, request):
         """Запретить создание задач через админку"""
@@ -107,16 +175,16 @@ class ConversionTaskAdmin(admin.ModelAdmin):
     
     def restart_failed_tasks(self, request, queryset):
         """Действие для перезапуска неудачных задач"""
-        failed_tasks = queryset.filter(status=ConversionTask.STATUS_FAILED)
-        count = 0
-        for task in failed_tasks:
-            task.status = ConversionTask.STATUS_QUEUED
-            task.progress = 0
-            task.error_message = ''
-            task.started_at = None
-            task.completed_at = None
-            task.save()
-            count += 1
+        # Один UPDATE вместо save() для каждой задачи
+        count = queryset.filter(status=ConversionTask.STATUS_FAILED).update(
+            status=ConversionTask.STATUS_QUEUED,
+            progress=0,
+            error_message='',
+            started_at=None,
+            completed_at=None,
+            duration_seconds=None,
+            updated_at=timezone.now(),
+        )
         
         self.message_user(
             request,
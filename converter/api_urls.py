@@ -2,25 +2,30 @@
 URL маршруты для API управления задачами конвертации файлов.
 """
 
-from django.urls import path
+from django.urls import include, path
 from . import api_views
 
-urlpatterns = [
-    # Создание новой задачи конвертации
-    # POST /api/tasks/create/ - multipart form или JSON с URL
-    path('create/', api_views.create_task_view, name='api_task_create'),
-    
+# Маршруты конкретной задачи: префикс <int:task_id>/ разбирается один раз
+task_patterns = [
     # Получение статуса задачи
     # GET /api/tasks/<task_id>/status/
-    path('<int:task_id>/status/', api_views.task_status_view, name='api_task_status'),
+    path('status/', api_views.task_status_view, name='api_task_status'),
     
     # Получение результата задачи
     # GET /api/tasks/<task_id>/result/
-    path('<int:task_id>/result/', api_views.task_result_view, name='api_task_result'),
+    path('result/', api_views.task_result_view, name='api_task_result'),
     
     # Скачивание результата задачи
     # GET /api/tasks/<task_id>/download/
-    path('<int:task_id>/download/', api_views.task_download_view, name='api_task_download'),
+    path('download/', api_views.task_download_view, name='api_task_download'),
+]
+
+urlpatterns = [
+    # Создание новой задачи конвертации
+    # POST /api/tasks/create/ - multipart form или JSON с URL
+    path('create/', api_views.create_task_view, name='api_task_create'),
+    
+    path('<int:task_id>/', include(task_patterns)),
     
     # Список всех задач с пагинацией и фильтрацией
     # GET /api/tasks/
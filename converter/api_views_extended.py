@@ -1,21 +1,244 @@
-from django.http import JsonResponse, Http404
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import etag, require_http_methods
+from django.core.cache import cache
+from django.core import signing
 from django.core.files.storage import default_storage
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.db.models import Q, Count
+from django.db.models.functions import TruncDate
+from django.db.models.fields.json import KeyTextTransform
 import os
+import re
 import json
+import hashlib
+import time
+import uuid
+import shutil
+import threading
 import tempfile
 import zipfile
 import logging
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
 from datetime import datetime, timedelta
 from django.utils import timezone
-from .models import ConversionTask
+from .models import ConversionTask, CONVERSION_STATS_CACHE_KEY
 from .tasks import process_conversion_task
-from .utils import get_file_type, validate_conversion_parameters
+from .task_events import subscribe_task_events
+from .utils import get_file_type, validate_conversion_parameters, load_json, dump_json, json_response
 
 logger = logging.getLogger(__name__)
+
+# Размер блока при копировании файлов в zip-архив
+ZIP_COPY_CHUNK_SIZE = 1024 * 1024
+
+# Максимальный размер JSON тела запроса (байт)
+MAX_JSON_BODY_SIZE = 64 * 1024
+
+# Поля и ключи метаданных, которые нужны для ответа на polling статуса
+STATUS_FIELDS = ('id', 'status', 'progress', 'created_at', 'updated_at', 'error_message')
+STATUS_METADATA_KEYS = (
+    'original_filename', 'source_format', 'target_format',
+    'output_path', 'converted_filename', 'output_size',
+)
+
+# Интервал keep-alive комментариев и максимальная длительность SSE потока (секунды).
+# Поток занимает поток gunicorn, поэтому он короткий: по закрытии EventSource
+# переподключается через SSE_RETRY_MS и освобожденный слот достается другим
+SSE_KEEPALIVE_INTERVAL = 15
+SSE_MAX_DURATION = 120
+SSE_RETRY_MS = 3000
+
+# Одновременных SSE потоков на процесс (gunicorn --threads 4): остальные
+# потоки остаются для обычных запросов, лишние клиенты получают 503 и polling
+SSE_MAX_STREAMS = 2
+_sse_slots = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+# Сколько обращений к storage выполняется одновременно при сборке архива
+BATCH_STORAGE_WORKERS = 8
+
+# Ключи task_metadata с путями к файлам задачи в storage
+TASK_FILE_KEYS = ('file_path', 'output_path', 'preview_path')
+
+# Сколько задач удаляется одним DELETE (лимит параметров SQLite)
+DELETE_BATCH_SIZE = 500
+
+# Каталог storage для загрузок и время жизни presigned POST (секунды)
+UPLOADS_PREFIX = 'uploads/'
+UPLOAD_URL_EXPIRES = 15 * 60
+
+# Токен прямой загрузки: подписанный ключ, выданный create_upload_url.
+# Живет дольше presigned POST, т.к. загрузка большого файла может идти долго
+UPLOAD_TOKEN_SALT = 'converter.direct-upload'
+UPLOAD_TOKEN_MAX_AGE = 24 * 60 * 60
+_UPLOAD_KEY_RE = re.compile(rf'{re.escape(UPLOADS_PREFIX)}[0-9a-f]{{32}}_[^/\\]+')
+
+# Поля ConversionTask, которые нужны для списка результатов
+RESULT_LIST_FIELDS = (
+    'id', 'status', 'progress', 'created_at', 'updated_at', 'error_message', 'task_metadata'
+)
+
+# Форматы результатов, которые уже сжаты: в архиве они сохраняются как есть,
+# повторный deflate тратит CPU почти без выигрыша в размере
+ZIP_STORED_FORMATS = frozenset((
+    'gif', 'jpg', 'jpeg', 'png', 'webp', 'avif', 'heic',
+    'mp4', 'webm', 'mov', 'avi', 'mkv',
+    'mp3', 'm4a', 'aac', 'ogg', 'opus', 'flac',
+    'pdf', 'docx', 'xlsx', 'pptx', 'epub',
+    'zip', '7z', 'rar', 'gz',
+))
+
+# Остальные (текстовые) результаты сжимаются быстрым уровнем deflate
+ZIP_DEFLATE_LEVEL = 1
+_ZIPINFO_LEVEL_ATTR = 'compress_level' if hasattr(zipfile.ZipInfo(), 'compress_level') else '_compresslevel'
+
+
+def _zip_entry(filename, target_format=None, date_time=None):
+    """
+    Описание файла в zip-архиве с методом сжатия по формату результата.
+    
+    Args:
+        filename: Имя файла в архиве
+        target_format: Формат результата из метаданных (если не указан - по расширению)
+        date_time: Время записи; при сборке архива вычисляется один раз на все файлы
+    """
+    file_format = (target_format or os.path.splitext(filename)[1][1:]).lower()
+    zinfo = zipfile.ZipInfo(filename, date_time=date_time or time.localtime()[:6])
+    if file_format in ZIP_STORED_FORMATS:
+        zinfo.compress_type = zipfile.ZIP_STORED
+    else:
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        # ZipFile.open(zinfo, 'w') берет уровень сжатия только из ZipInfo;
+        # в Python 3.13 атрибут стал публичным (compress_level)
+        setattr(zinfo, _ZIPINFO_LEVEL_ATTR, ZIP_DEFLATE_LEVEL)
+    zinfo.external_attr = 0o644 << 16
+    return zinfo
+
+
+def _unique_archive_name(filename, used_names):
+    """
+    Имя файла в архиве без повторов: result.gif, result_1.gif, ...
+    
+    Args:
+        filename: Желаемое имя
+        used_names: Словарь уже записанных имен -> следующий номер для них (дополняется)
+    """
+    if filename not in used_names:
+        used_names[filename] = 1
+        return filename
+    
+    # Номер увеличивается, пока имя занято, в том числе файлом,
+    # который изначально назывался, например, result_1.gif
+    stem, ext = os.path.splitext(filename)
+    index = used_names[filename]
+    name = f"{stem}_{index}{ext}"
+    while name in used_names:
+        index += 1
+        name = f"{stem}_{index}{ext}"
+    used_names[filename] = index + 1
+    used_names[name] = 1
+    return name
+
+
+def _start_conversion_task(task):
+    """
+    Постановка задачи в очередь Celery (вызывается после commit).
+    ID Celery задачи заранее записан в метаданные, поэтому после
+    постановки в очередь строку задачи обновлять не нужно.
+    """
+    try:
+        process_conversion_task.apply_async(args=[task.id], task_id=task.meta['celery_task_id'])
+    except Exception as e:
+        # Если не удалось запустить Celery задачу, помечаем задачу как неудачную
+        task.fail(f"Ошибка запуска обработки: {str(e)}")
+        logger.error(f"Ошибка запуска Celery задачи: {str(e)}")
+
+
+def _direct_upload_bucket():
+    """Bucket для прямой загрузки или None, если storage не S3 (django-storages S3Boto3Storage)"""
+    return getattr(default_storage, 'bucket', None)
+
+
+def _upload_key_from_token(token):
+    """
+    Ключ файла из токена create_upload_url.
+    Возвращает None, если прямая загрузка не поддерживается, подпись неверна,
+    токен устарел или ключ не имеет выдаваемого вида uploads/<uuid>_<имя>.
+    """
+    if _direct_upload_bucket() is None:
+        return None
+    try:
+        key = signing.loads(token, salt=UPLOAD_TOKEN_SALT, max_age=UPLOAD_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if not isinstance(key, str) or not _UPLOAD_KEY_RE.fullmatch(key):
+        return None
+    return key
+
+
+def _upload_filename(key):
+    """Исходное имя файла из ключа uploads/<uuid>_<имя>"""
+    name = os.path.basename(key)
+    prefix, sep, rest = name.partition('_')
+    return rest if sep and len(prefix) == 32 else name
+
+
+def _presigned_post(key, max_size):
+    """
+    Presigned POST для прямой загрузки в bucket.
+    Возвращает None, если storage не S3.
+    """
+    bucket = _direct_upload_bucket()
+    if bucket is None:
+        return None
+    return bucket.meta.client.generate_presigned_post(
+        default_storage.bucket_name,
+        key,
+        Conditions=[['content-length-range', 1, max_size]],
+        ExpiresIn=UPLOAD_URL_EXPIRES,
+    )
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def create_upload_url(request):
+    """
+    API endpoint для прямой загрузки файла в storage.
+    Возвращает presigned POST; после загрузки клиент передает полученный
+    upload_token в submit_conversion_task вместо самого файла, поэтому большие
+    файлы не занимают веб-воркер.
+    """
+    try:
+        filename = os.path.basename(request.POST.get('filename', ''))
+        if not get_file_type(filename):
+            return json_response({'error': 'Неподдерживаемый тип файла'}, status=400)
+        
+        max_size = getattr(settings, 'MAX_UPLOAD_SIZE', 100 * 1024 * 1024)
+        file_key = f'{UPLOADS_PREFIX}{uuid.uuid4().hex}_{filename}'
+        upload = _presigned_post(file_key, max_size)
+        if upload is None:
+            return json_response({'error': 'Прямая загрузка не поддерживается'}, status=501)
+        
+        return json_response({
+            'success': True,
+            'file_key': file_key,
+            'upload_token': signing.dumps(file_key, salt=UPLOAD_TOKEN_SALT),
+            'upload_url': upload['url'],
+            'fields': upload['fields'],
+            'max_size': max_size,
+            'expires_in': UPLOAD_URL_EXPIRES,
+        })
+        
+    except Exception as e:
+        logger.error(f"Ошибка создания ссылки для загрузки: {str(e)}")
+        return json_response({'error': 'Внутренняя ошибка сервера'}, status=500)
+
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def submit_conversion_task(request):
@@ -24,83 +247,105 @@ def submit_conversion_task(request):
     Принимает файл и параметры конвертации, создает задачу и запускает Celery task.
     """
     try:
-        # Валидация данных
-        if 'file' not in request.FILES:
-            return JsonResponse({'error': 'Файл не найден'}, status=400)
+        # Файл приходит либо в теле запроса, либо уже загружен клиентом
+        # напрямую в storage (см. create_upload_url) - тогда передается токен
+        # с подписанным ключом; произвольные ключи storage не принимаются
+        upload_token = request.POST.get('upload_token')
+        uploaded_file = request.FILES.get('file')
+        if not upload_token and uploaded_file is None:
+            return json_response({'error': 'Файл не найден'}, status=400)
+        
+        file_key = None
+        if upload_token:
+            file_key = _upload_key_from_token(upload_token)
+            if file_key is None:
+                return json_response({'error': 'Недействительный токен загрузки'}, status=400)
         
-        uploaded_file = request.FILES['file']
         source_format = request.POST.get('source_format')
         target_format = request.POST.get('target_format')
         
         if not source_format or not target_format:
-            return JsonResponse({'error': 'Не указаны форматы конвертации'}, status=400)
+            return json_response({'error': 'Не указаны форматы конвертации'}, status=400)
         
         # Парсим параметры конвертации
         try:
-            conversion_params = json.loads(request.POST.get('params', '{}'))
+            conversion_params = load_json(request.POST.get('params', '{}'))
         except json.JSONDecodeError:
             conversion_params = {}
         
         # Валидация параметров
         validation_error = validate_conversion_parameters(source_format, target_format, conversion_params)
         if validation_error:
-            return JsonResponse({'error': validation_error}, status=400)
+            return json_response({'error': validation_error}, status=400)
+        
+        if file_key:
+            original_filename = request.POST.get('filename') or _upload_filename(file_key)
+        else:
+            original_filename = uploaded_file.name
         
         # Определяем тип файла
-        file_type = get_file_type(uploaded_file.name)
+        file_type = get_file_type(original_filename)
         if file_type != source_format:
-            return JsonResponse({
+            return json_response({
                 'error': f'Тип файла ({file_type}) не соответствует указанному источнику ({source_format})'
             }, status=400)
         
-        # Сохраняем файл
-        file_path = default_storage.save(
-            f'uploads/{uploaded_file.name}',
-            uploaded_file
-        )
-        
-        # Создаем задачу конвертации
-        task = ConversionTask.objects.create(
-            status=ConversionTask.STATUS_QUEUED,
-            progress=0
-        )
-        
-        # Устанавливаем метаданные
-        task.set_metadata(
-            original_filename=uploaded_file.name,
-            source_format=source_format,
-            target_format=target_format,
-            conversion_params=conversion_params,
-            file_path=file_path,
-            file_size=uploaded_file.size,
-            created_by=request.user.id if request.user.is_authenticated else None
-        )
-        task.save()
+        if file_key:
+            # Файл уже в storage: веб-воркер его не принимает и не копирует
+            if not default_storage.exists(file_key):
+                return json_response({'error': 'Загруженный файл не найден'}, status=400)
+            # Один загруженный файл - одна задача: иначе удаление файлов
+            # одной задачи удалит исходник другой
+            if ConversionTask.objects.filter(task_metadata__file_path=file_key).exists():
+                return json_response({'error': 'Загруженный файл уже использован'}, status=400)
+            file_path = file_key
+            file_size = default_storage.size(file_key)
+        else:
+            # Сохраняем файл
+            file_path = default_storage.save(
+                f'{UPLOADS_PREFIX}{uploaded_file.name}',
+                uploaded_file
+            )
+            file_size = uploaded_file.size
         
-        # Запускаем Celery задачу
-        try:
-            celery_task = process_conversion_task.delay(task.id)
-            task.set_metadata(celery_task_id=celery_task.id)
+        # Создаем задачу конвертации одним INSERT: метаданные, включая
+        # ID будущей Celery задачи, заполняются до сохранения
+        with transaction.atomic():
+            task = ConversionTask(
+                status=ConversionTask.STATUS_QUEUED,
+                progress=0
+            )
+            task.set_metadata(
+                original_filename=original_filename,
+                source_format=source_format,
+                target_format=target_format,
+                conversion_params=conversion_params,
+                file_path=file_path,
+                file_size=file_size,
+                created_by=request.user.id if request.user.is_authenticated else None,
+                celery_task_id=str(uuid.uuid4())
+            )
             task.save()
             
-            logger.info(f"Создана задача конвертации {task.id} для файла {uploaded_file.name}")
-            
-            return JsonResponse({
-                'success': True,
-                'task_id': task.id,
-                'message': 'Задача создана и отправлена на обработку',
-                'estimated_time': estimate_processing_time(source_format, target_format, uploaded_file.size)
-            })
-            
-        except Exception as e:
-            # Если не удалось запустить Celery задачу, помечаем задачу как неудачную
-            task.fail(f"Ошибка запуска обработки: {str(e)}")
-            logger.error(f"Ошибка запуска Celery задачи: {str(e)}")
-            return JsonResponse({'error': 'Ошибка запуска обработки'}, status=500)
-            
+            # Запускаем Celery задачу только после фиксации транзакции,
+            # иначе воркер может не найти задачу в базе
+            transaction.on_commit(partial(_start_conversion_task, task))
+        
+        if task.status == ConversionTask.STATUS_FAILED:
+            return json_response({'error': 'Ошибка запуска обработки'}, status=500)
+        
+        logger.info(f"Создана задача конвертации {task.id} для файла {original_filename}")
+        
+        return json_response({
+            'success': True,
+            'task_id': task.id,
+            'message': 'Задача создана и отправлена на обработку',
+            'estimated_time': estimate_processing_time(source_format, target_format, file_size)
+        })
+        
     except Exception as e:
         logger.error(f"Ошибка создания задачи конвертации: {str(e)}")
-        return JsonResponse({'error': 'Внутренняя ошибка сервера'}, status=500)
+        return json_response({'error': 'Внутренняя ошибка сервера'}, status=500)
 
 
 @require_http_methods(["GET"])
@@ -113,44 +358,58 @@ def get_task_queue(request):
         # Получаем задачи за последние 24 часа или все активные
         cutoff_time = timezone.now() - timedelta(hours=24)
         
-        tasks = ConversionTask.objects.filter(
+        # Нужные ключи task_metadata извлекаются в SQL, JSON целиком не загружается
+        rows = ConversionTask.objects.filter(
             Q(created_at__gte=cutoff_time) | 
             Q(status__in=[ConversionTask.STATUS_QUEUED, ConversionTask.STATUS_RUNNING])
+        ).annotate(
+            filename=KeyTextTransform('original_filename', 'task_metadata'),
+            source_format=KeyTextTransform('source_format', 'task_metadata'),
+            target_format=KeyTextTransform('target_format', 'task_metadata'),
+            file_size=KeyTextTransform('file_size', 'task_metadata'),
+        ).values(
+            'id', 'status', 'progress', 'created_at', 'updated_at', 'error_message',
+            'started_at', 'completed_at', 'duration_seconds',
+            'filename', 'source_format', 'target_format', 'file_size'
         ).order_by('-created_at')[:100]  # Ограничиваем до 100 задач
         
         # Сериализуем данные
         tasks_data = []
-        for task in tasks:
+        status_counts = Counter()
+        for row in rows:
             task_data = {
-                'id': task.id,
-                'status': task.status,
-                'progress': task.progress,
-                'created_at': task.created_at.isoformat(),
-                'updated_at': task.updated_at.isoformat(),
-                'error_message': task.error_message,
-                'filename': task.get_metadata('original_filename', 'Неизвестный файл'),
-                'source_format': task.get_metadata('source_format', ''),
-                'target_format': task.get_metadata('target_format', ''),
-                'file_size': task.get_metadata('file_size', 0),
+                'id': row['id'],
+                'status': row['status'],
+                'progress': row['progress'],
+                'created_at': row['created_at'].isoformat(),
+                'updated_at': row['updated_at'].isoformat(),
+                'error_message': row['error_message'],
+                'filename': row['filename'] or 'Неизвестный файл',
+                'source_format': row['source_format'] or '',
+                'target_format': row['target_format'] or '',
+                'file_size': int(row['file_size'] or 0),
             }
             
             # Добавляем время выполнения для завершенных задач
-            if task.started_at and task.completed_at:
-                duration = (task.completed_at - task.started_at).total_seconds()
-                task_data['duration'] = duration
+            if row['duration_seconds'] is not None:
+                task_data['duration'] = row['duration_seconds']
+            elif row['started_at'] and row['completed_at']:
+                # Задачи, завершенные до появления duration_seconds
+                task_data['duration'] = (row['completed_at'] - row['started_at']).total_seconds()
             
             tasks_data.append(task_data)
+            status_counts[row['status']] += 1
         
-        # Статистика очереди
+        # Статистика очереди по уже загруженным задачам
         queue_stats = {
-            'total': tasks.count(),
-            'queued': tasks.filter(status=ConversionTask.STATUS_QUEUED).count(),
-            'running': tasks.filter(status=ConversionTask.STATUS_RUNNING).count(),
-            'completed': tasks.filter(status=ConversionTask.STATUS_DONE).count(),
-            'failed': tasks.filter(status=ConversionTask.STATUS_FAILED).count(),
+            'total': len(tasks_data),
+            'queued': status_counts[ConversionTask.STATUS_QUEUED],
+            'running': status_counts[ConversionTask.STATUS_RUNNING],
+            'completed': status_counts[ConversionTask.STATUS_DONE],
+            'failed': status_counts[ConversionTask.STATUS_FAILED],
         }
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'tasks': tasks_data,
             'stats': queue_stats,
@@ -159,14 +418,36 @@ def get_task_queue(request):
         
     except Exception as e:
         logger.error(f"Ошибка получения очереди: {str(e)}")
-        return JsonResponse({'error': 'Ошибка загрузки очереди'}, status=500)
+        return json_response({'error': 'Ошибка загрузки очереди'}, status=500)
+
+
+def _encode_results_cursor(task):
+    """Курсор keyset пагинации: created_at и id последней выданной задачи."""
+    return f"{task.created_at.isoformat()},{task.id}"
+
+
+def _decode_results_cursor(cursor):
+    """
+    Разбор курсора keyset пагинации.
+    
+    Returns:
+        tuple: (created_at, id) или None, если курсор некорректен
+    """
+    created_at, _, task_id = cursor.rpartition(',')
+    try:
+        # '+' часового пояса в незакодированном query string превращается в пробел
+        return datetime.fromisoformat(created_at.replace(' ', '+')), int(task_id)
+    except ValueError:
+        return None
 
 
 @require_http_methods(["GET"])
 def get_conversion_results(request):
     """
     API endpoint для получения результатов конвертации.
-    Поддерживает фильтрацию и пагинацию.
+    Поддерживает фильтрацию и пагинацию: по номеру страницы (?page=)
+    или по курсору (?cursor= из pagination.next_cursor) без подсчета COUNT;
+    в режиме курсора stats не возвращается (null).
     """
     try:
         # Получаем параметры фильтрации
@@ -176,6 +457,12 @@ def get_conversion_results(request):
         page = int(request.GET.get('page', 1))
         page_size = int(request.GET.get('page_size', 50))
         
+        cursor = request.GET.get('cursor')
+        if cursor:
+            cursor = _decode_results_cursor(cursor)
+            if cursor is None:
+                return json_response({'error': 'Неверный курсор'}, status=400)
+        
         # Базовый запрос - показываем задачи за последнюю неделю
         cutoff_time = timezone.now() - timedelta(days=7)
         queryset = ConversionTask.objects.filter(created_at__gte=cutoff_time)
@@ -193,17 +480,51 @@ def get_conversion_results(request):
                 Q(task_metadata__converted_filename__icontains=search_query)
             )
         
+        # Статистика результатов одним запросом (total заодно служит COUNT для пагинации).
+        # Страницы по курсору ее не считают: клиент получил ее с первой страницы
+        stats = None if cursor else queryset.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status=ConversionTask.STATUS_DONE)),
+            processing=Count('id', filter=Q(
+                status__in=[ConversionTask.STATUS_QUEUED, ConversionTask.STATUS_RUNNING]
+            )),
+            failed=Count('id', filter=Q(status=ConversionTask.STATUS_FAILED)),
+        )
+        
         # Сортировка и пагинация
-        queryset = queryset.order_by('-created_at')
-        total_count = queryset.count()
+        queryset = queryset.order_by('-created_at', '-id')
+        rows = queryset.only(*RESULT_LIST_FIELDS)  # Загружаем только поля, которые попадают в ответ
+        
+        if cursor:
+            # Keyset пагинация: продолжаем после последней выданной строки без COUNT и OFFSET
+            cursor_created_at, cursor_id = cursor
+            rows = rows.filter(
+                Q(created_at__lt=cursor_created_at) |
+                Q(created_at=cursor_created_at, id__lt=cursor_id)
+            )
+            tasks = list(rows[:page_size + 1])
+            has_next = len(tasks) > page_size
+            tasks = tasks[:page_size]
+            total_count = None
+        else:
+            total_count = stats['total']
+            start_index = (page - 1) * page_size
+            end_index = start_index + page_size
+            tasks = list(rows[start_index:end_index])
+            has_next = end_index < total_count
         
-        start_index = (page - 1) * page_size
-        end_index = start_index + page_size
-        tasks = queryset[start_index:end_index]
+        # Наличие файлов всех завершенных задач страницы проверяется одним
+        # параллельным проходом, а не отдельным запросом к storage на строку
+        existing = _existing_paths(
+            path
+            for task in tasks if task.status == ConversionTask.STATUS_DONE
+            for path in (task.meta.get('output_path'), task.meta.get('preview_path')) if path
+        )
         
         # Сериализация результатов
         results = []
         for task in tasks:
+            metadata = task.meta
             result_data = {
                 'id': task.id,
                 'status': task.status,
@@ -211,47 +532,41 @@ def get_conversion_results(request):
                 'created_at': task.created_at.isoformat(),
                 'updated_at': task.updated_at.isoformat(),
                 'error_message': task.error_message,
-                'original_filename': task.get_metadata('original_filename', ''),
-                'converted_filename': task.get_metadata('converted_filename', ''),
-                'source_format': task.get_metadata('source_format', ''),
-                'target_format': task.get_metadata('target_format', ''),
-                'file_size': task.get_metadata('file_size', 0),
-                'output_size': task.get_metadata('output_size', 0),
+                'original_filename': metadata.get('original_filename', ''),
+                'converted_filename': metadata.get('converted_filename', ''),
+                'source_format': metadata.get('source_format', ''),
+                'target_format': metadata.get('target_format', ''),
+                'file_size': metadata.get('file_size', 0),
+                'output_size': metadata.get('output_size', 0),
             }
             
             # Добавляем URL'ы для скачивания (только для завершенных задач)
             if task.status == ConversionTask.STATUS_DONE:
-                output_path = task.get_metadata('output_path')
-                if output_path and default_storage.exists(output_path):
+                output_path = metadata.get('output_path')
+                if output_path in existing:
                     result_data['output_url'] = default_storage.url(output_path)
                     
                 # Добавляем превью для изображений и GIF
-                preview_path = task.get_metadata('preview_path')
-                if preview_path and default_storage.exists(preview_path):
+                preview_path = metadata.get('preview_path')
+                if preview_path in existing:
                     result_data['preview_url'] = default_storage.url(preview_path)
             
             results.append(result_data)
         
-        # Статистика результатов
-        stats = {
-            'total': total_count,
-            'completed': queryset.filter(status=ConversionTask.STATUS_DONE).count(),
-            'processing': queryset.filter(
-                status__in=[ConversionTask.STATUS_QUEUED, ConversionTask.STATUS_RUNNING]
-            ).count(),
-            'failed': queryset.filter(status=ConversionTask.STATUS_FAILED).count(),
-        }
-        
         # Метаданные пагинации
         pagination = {
-            'page': page,
             'page_size': page_size,
-            'total_pages': (total_count + page_size - 1) // page_size,
-            'has_next': end_index < total_count,
-            'has_previous': page > 1,
+            'has_next': has_next,
+            'next_cursor': _encode_results_cursor(tasks[-1]) if has_next else None,
         }
+        if total_count is not None:
+            pagination.update({
+                'page': page,
+                'total_pages': (total_count + page_size - 1) // page_size,
+                'has_previous': page > 1,
+            })
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'results': results,
             'stats': stats,
@@ -261,17 +576,53 @@ def get_conversion_results(request):
         
     except Exception as e:
         logger.error(f"Ошибка получения результатов: {str(e)}")
-        return JsonResponse({'error': 'Ошибка загрузки результатов'}, status=500)
+        return json_response({'error': 'Ошибка загрузки результатов'}, status=500)
+
+
+def _task_status_etag(request, task_id):
+    """
+    ETag статуса задачи для polling. Учитывает статус и прогресс отдельно от
+    updated_at, так как QuerySet.update() не обновляет auto_now поля.
+    """
+    row = ConversionTask.objects.filter(id=task_id).values_list(
+        'updated_at', 'progress', 'status'
+    ).first()
+    if row is None:
+        return None
+    updated_at, progress, status = row
+    key = f'{task_id}:{updated_at.timestamp()}:{progress}:{status}'
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
 
 
 @require_http_methods(["GET"])
+@etag(_task_status_etag)
 def get_task_status(request, task_id):
     """
     API endpoint для получения статуса конкретной задачи.
     Используется для polling обновлений прогресса.
     """
     try:
-        task = get_object_or_404(ConversionTask, id=task_id)
+        include_metadata = request.GET.get('include') == 'metadata'
+        
+        if include_metadata:
+            task = get_object_or_404(
+                ConversionTask.objects.only(*STATUS_FIELDS, 'task_metadata'), id=task_id
+            )
+            metadata = task.meta
+        else:
+            # Весь task_metadata не загружаем: из базы читаются только нужные ключи
+            queryset = ConversionTask.objects.only(*STATUS_FIELDS).annotate(**{
+                f'_meta_{key}': KeyTextTransform(key, 'task_metadata')
+                for key in STATUS_METADATA_KEYS
+            })
+            task = get_object_or_404(queryset, id=task_id)
+            metadata = {}
+            for key in STATUS_METADATA_KEYS:
+                value = getattr(task, f'_meta_{key}')
+                if value is not None:
+                    metadata[key] = value
+            if 'output_size' in metadata:
+                metadata['output_size'] = int(metadata['output_size'])
         
         response_data = {
             'success': True,
@@ -282,27 +633,195 @@ def get_task_status(request, task_id):
                 'created_at': task.created_at.isoformat(),
                 'updated_at': task.updated_at.isoformat(),
                 'error_message': task.error_message,
-                'original_filename': task.get_metadata('original_filename', ''),
-                'source_format': task.get_metadata('source_format', ''),
-                'target_format': task.get_metadata('target_format', ''),
+                'original_filename': metadata.get('original_filename', ''),
+                'source_format': metadata.get('source_format', ''),
+                'target_format': metadata.get('target_format', ''),
             }
         }
         
         # Добавляем дополнительные данные для завершенных задач
         if task.status == ConversionTask.STATUS_DONE:
-            output_path = task.get_metadata('output_path')
+            output_path = metadata.get('output_path')
             if output_path and default_storage.exists(output_path):
                 response_data['task']['output_url'] = default_storage.url(output_path)
-                response_data['task']['converted_filename'] = task.get_metadata('converted_filename', '')
-                response_data['task']['output_size'] = task.get_metadata('output_size', 0)
+                response_data['task']['converted_filename'] = metadata.get('converted_filename', '')
+                response_data['task']['output_size'] = metadata.get('output_size', 0)
+        
+        if include_metadata:
+            response_data['task']['metadata'] = metadata
         
-        return JsonResponse(response_data)
+        return json_response(response_data)
         
     except ConversionTask.DoesNotExist:
-        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+        return json_response({'error': 'Задача не найдена'}, status=404)
     except Exception as e:
         logger.error(f"Ошибка получения статуса задачи {task_id}: {str(e)}")
-        return JsonResponse({'error': 'Ошибка загрузки статуса'}, status=500)
+        return json_response({'error': 'Ошибка загрузки статуса'}, status=500)
+
+
+def _task_event_stream(pubsub, initial_state):
+    """
+    Генератор SSE событий задачи: текущее состояние, затем изменения из Redis.
+    Поток закрывается после завершения задачи или по истечении SSE_MAX_DURATION.
+    """
+    finished = (ConversionTask.STATUS_DONE, ConversionTask.STATUS_FAILED)
+    yield f'retry: {SSE_RETRY_MS}\n'.encode() + b'data: ' + dump_json(initial_state) + b'\n\n'
+    if initial_state['status'] in finished:
+        return
+    
+    deadline = time.monotonic() + SSE_MAX_DURATION
+    while time.monotonic() < deadline:
+        message = pubsub.get_message(ignore_subscribe_messages=True, timeout=SSE_KEEPALIVE_INTERVAL)
+        if message is None:
+            # Комментарий не дает прокси закрыть простаивающее соединение
+            yield b': keepalive\n\n'
+            continue
+        
+        data = message['data']
+        yield b'data: ' + data + b'\n\n'
+        if load_json(data).get('status') in finished:
+            return
+
+
+class _TaskEventStream:
+    """
+    Содержимое SSE ответа: держит подписку и слот _sse_slots.
+    close() вызывается Django при закрытии ответа, в том числе если клиент
+    отключился до начала чтения, поэтому слот освобождается всегда.
+    """
+    
+    def __init__(self, pubsub, initial_state):
+        self._pubsub = pubsub
+        self._initial_state = initial_state
+        self._closed = False
+    
+    def __iter__(self):
+        try:
+            yield from _task_event_stream(self._pubsub, self._initial_state)
+        finally:
+            self.close()
+    
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pubsub.close()
+        _sse_slots.release()
+
+
+@require_http_methods(["GET"])
+def stream_task_status(request, task_id):
+    """
+    SSE endpoint статуса задачи (text/event-stream).
+    Альтернатива polling get_task_status: события приходят только при изменениях.
+    Если Redis для событий не настроен или открыто SSE_MAX_STREAMS потоков,
+    возвращает 503 и клиент переходит на polling.
+    """
+    if not _sse_slots.acquire(blocking=False):
+        return json_response({'error': 'Поток событий недоступен'}, status=503)
+    
+    pubsub = stream = None
+    try:
+        # Подписываемся до чтения состояния, чтобы не пропустить событие между ними
+        pubsub = subscribe_task_events(task_id)
+        if pubsub is None:
+            return json_response({'error': 'Поток событий недоступен'}, status=503)
+        
+        initial_state = ConversionTask.objects.filter(id=task_id).values('id', 'status', 'progress').first()
+        if initial_state is None:
+            return json_response({'error': 'Задача не найдена'}, status=404)
+        stream = _TaskEventStream(pubsub, initial_state)
+    finally:
+        # Без ответа-потока подписка и слот освобождаются сразу
+        if stream is None:
+            if pubsub is not None:
+                pubsub.close()
+            _sse_slots.release()
+    
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx не должен буферизовать поток
+    return response
+
+
+def _existing_paths(paths):
+    """
+    Множество путей из paths, которые есть в storage.
+    На сетевых storage каждая проверка - отдельный запрос, поэтому они
+    выполняются параллельно.
+    """
+    paths = list(dict.fromkeys(paths))
+    if not paths:
+        return set()
+    
+    workers = min(BATCH_STORAGE_WORKERS, len(paths))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        found = executor.map(default_storage.exists, paths)
+        return {path for path, exists in zip(paths, found) if exists}
+
+
+def _existing_outputs(rows):
+    """
+    Пары (метаданные задачи, output_path) для результатов, которые есть в storage.
+    rows - пары (id, task_metadata) из values_list; порядок задач сохраняется.
+    """
+    candidates = [
+        ((task_id, metadata), metadata.get('output_path'))
+        for task_id, metadata in rows if metadata
+    ]
+    candidates = [(row, path) for row, path in candidates if path]
+    existing = _existing_paths(path for _, path in candidates)
+    return [(row, path) for row, path in candidates if path in existing]
+
+
+def _local_storage_dir(name):
+    """Локальный каталог файла в storage или None для удаленных storage (S3 и т.п.)"""
+    try:
+        return os.path.dirname(default_storage.path(name))
+    except NotImplementedError:
+        return None
+
+
+def _fetch_output(output_path):
+    """
+    Скачивание результата из удаленного storage во временный файл.
+    Вызывается из пула потоков при сборке архива.
+    """
+    local_copy = tempfile.TemporaryFile()
+    try:
+        with default_storage.open(output_path, 'rb') as src:
+            shutil.copyfileobj(src, local_copy, ZIP_COPY_CHUNK_SIZE)
+    except Exception:
+        local_copy.close()
+        raise
+    local_copy.seek(0)
+    return local_copy
+
+
+def _close_fetched(future):
+    """Закрыть скачанный, но не записанный в архив файл (сборка прервана)"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _fetch_outputs(executor, paths):
+    """
+    Скачанные результаты в порядке paths.
+    Одновременно в работе не больше BATCH_STORAGE_WORKERS файлов: следующее
+    скачивание запускается, только когда очередной файл записан в архив,
+    поэтому временные файлы и дескрипторы не копятся на весь пакет.
+    """
+    paths = iter(paths)
+    pending = deque(executor.submit(_fetch_output, path) for path in islice(paths, BATCH_STORAGE_WORKERS))
+    try:
+        while pending:
+            yield pending.popleft().result()
+            for path in islice(paths, 1):
+                pending.append(executor.submit(_fetch_output, path))
+    finally:
+        for future in pending:
+            future.cancel()
+            future.add_done_callback(_close_fetched)
 
 
 @csrf_exempt
@@ -311,59 +830,92 @@ def download_batch_results(request):
     """
     API endpoint для создания zip-архива с несколькими результатами.
     """
+    # Отклоняем слишком большие запросы до чтения тела в память
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > MAX_JSON_BODY_SIZE:
+        return json_response({'error': 'Слишком большой запрос'}, status=413)
+    
     try:
-        data = json.loads(request.body)
+        data = load_json(request.body)
         result_ids = data.get('result_ids', [])
         
         if not result_ids:
-            return JsonResponse({'error': 'Не указаны ID результатов'}, status=400)
+            return json_response({'error': 'Не указаны ID результатов'}, status=400)
         
-        # Получаем завершенные задачи
-        tasks = ConversionTask.objects.filter(
+        # Получаем завершенные задачи одним запросом: модели не нужны,
+        # достаточно id и метаданных
+        rows = list(ConversionTask.objects.filter(
             id__in=result_ids,
             status=ConversionTask.STATUS_DONE
-        )
+        ).values_list('id', 'task_metadata'))
         
-        if not tasks.exists():
-            return JsonResponse({'error': 'Нет доступных для скачивания файлов'}, status=400)
+        if not rows:
+            return json_response({'error': 'Нет доступных для скачивания файлов'}, status=400)
         
-        # Создаем временный zip файл
-        temp_zip = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
+        archive_path = default_storage.get_available_name(
+            f"downloads/batch_download_{timezone.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        )
+        archive_dir = _local_storage_dir(archive_path)
+        if archive_dir is not None:
+            os.makedirs(archive_dir, exist_ok=True)
         
-        with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for task in tasks:
-                output_path = task.get_metadata('output_path')
-                if output_path and default_storage.exists(output_path):
-                    # Читаем файл из storage
-                    with default_storage.open(output_path, 'rb') as f:
-                        file_content = f.read()
+        # Архив пишется сразу в storage, без временного файла и повторного копирования
+        try:
+            with default_storage.open(archive_path, 'wb') as archive, \
+                 zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zip_file, \
+                 ThreadPoolExecutor(max_workers=BATCH_STORAGE_WORKERS) as executor:
+                outputs = _existing_outputs(rows)
+                if archive_dir is not None:
+                    # Локальные файлы читаются потоково прямо из storage
+                    sources = (default_storage.open(path, 'rb') for _, path in outputs)
+                else:
+                    # Из удаленного storage файлы скачиваются параллельно,
+                    # а в архив их по очереди пишет текущий поток
+                    sources = _fetch_outputs(executor, [path for _, path in outputs])
+                
+                used_names = {}
+                archive_time = time.localtime()[:6]
+                for ((task_id, metadata), _), src in zip(outputs, sources):
+                    # Добавляем в архив с понятным именем; одинаковые имена нумеруются
+                    filename = _unique_archive_name(
+                        metadata.get('converted_filename') or f"file_{task_id}", used_names
+                    )
                     
-                    # Добавляем в архив с понятным именем
-                    filename = task.get_metadata('converted_filename') or f"file_{task.id}"
-                    zip_file.writestr(filename, file_content)
-        
-        # Сохраняем архив в storage
-        archive_filename = f"batch_download_{timezone.now().strftime('%Y%m%d_%H%M%S')}.zip"
-        with open(temp_zip.name, 'rb') as temp_file:
-            archive_path = default_storage.save(f'downloads/{archive_filename}', temp_file)
-        
-        # Удаляем временный файл
-        os.unlink(temp_zip.name)
+                    entry = _zip_entry(filename, metadata.get('target_format'), archive_time)
+                    
+                    # Копируем файл в архив блоками, не загружая его в память целиком
+                    with src, zip_file.open(entry, 'w', force_zip64=True) as dst:
+                        shutil.copyfileobj(src, dst, ZIP_COPY_CHUNK_SIZE)
+        except Exception:
+            # Недописанный архив не оставляем в storage
+            default_storage.delete(archive_path)
+            raise
         
         download_url = default_storage.url(archive_path)
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'download_url': download_url,
-            'archive_name': archive_filename,
-            'files_count': tasks.count()
+            'archive_name': os.path.basename(archive_path),
+            'files_count': len(rows)
         })
         
     except json.JSONDecodeError:
-        return JsonResponse({'error': 'Неверный формат данных'}, status=400)
+        return json_response({'error': 'Неверный формат данных'}, status=400)
     except Exception as e:
         logger.error(f"Ошибка создания batch архива: {str(e)}")
-        return JsonResponse({'error': 'Ошибка создания архива'}, status=500)
+        return json_response({'error': 'Ошибка создания архива'}, status=500)
+
+
+def _delete_stored_file(path):
+    """Удаление файла из storage; отсутствующий файл не считается ошибкой"""
+    try:
+        default_storage.delete(path)
+    except Exception as e:
+        logger.warning(f"Не удалось удалить файл {path}: {str(e)}")
 
 
 @csrf_exempt
@@ -376,35 +928,32 @@ def clear_completed_tasks(request):
     try:
         cutoff_time = timezone.now() - timedelta(hours=24)
         
-        # Находим старые завершенные задачи
-        old_completed_tasks = ConversionTask.objects.filter(
+        # Находим старые завершенные задачи: нужны только id и пути к файлам
+        rows = list(ConversionTask.objects.filter(
             status=ConversionTask.STATUS_DONE,
             completed_at__lt=cutoff_time
-        )
+        ).values_list('id', 'task_metadata'))
         
-        deleted_count = 0
+        # Удаляем файлы параллельно, без предварительной проверки exists()
+        paths = [
+            metadata[key]
+            for _, metadata in rows if metadata
+            for key in TASK_FILE_KEYS if metadata.get(key)
+        ]
+        if paths:
+            with ThreadPoolExecutor(max_workers=min(BATCH_STORAGE_WORKERS, len(paths))) as executor:
+                list(executor.map(_delete_stored_file, paths))
         
-        # Удаляем файлы и задачи
-        for task in old_completed_tasks:
-            try:
-                # Удаляем связанные файлы
-                file_path = task.get_metadata('file_path')
-                output_path = task.get_metadata('output_path')
-                preview_path = task.get_metadata('preview_path')
-                
-                for path in [file_path, output_path, preview_path]:
-                    if path and default_storage.exists(path):
-                        default_storage.delete(path)
-                
-                # Удаляем задачу
-                task.delete()
-                deleted_count += 1
-                
-            except Exception as e:
-                logger.warning(f"Ошибка удаления задачи {task.id}: {str(e)}")
-                continue
+        # Удаляем задачи пакетами, а не по одной
+        deleted_count = 0
+        task_ids = [task_id for task_id, _ in rows]
+        for i in range(0, len(task_ids), DELETE_BATCH_SIZE):
+            _, deleted = ConversionTask.objects.filter(
+                id__in=task_ids[i:i + DELETE_BATCH_SIZE]
+            ).delete()
+            deleted_count += deleted.get(ConversionTask._meta.label, 0)
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'deleted_count': deleted_count,
             'message': f'Удалено {deleted_count} завершенных задач'
@@ -412,7 +961,7 @@ def clear_completed_tasks(request):
         
     except Exception as e:
         logger.error(f"Ошибка очистки завершенных задач: {str(e)}")
-        return JsonResponse({'error': 'Ошибка очистки задач'}, status=500)
+        return json_response({'error': 'Ошибка очистки задач'}, status=500)
 
 
 @csrf_exempt
@@ -422,112 +971,134 @@ def delete_conversion_result(request, result_id):
     API endpoint для удаления конкретного результата конвертации.
     """
     try:
-        task = get_object_or_404(ConversionTask, id=result_id)
+        # Нужны только пути к файлам: остальные колонки не загружаем
+        task = ConversionTask.objects.only('id', 'task_metadata').get(id=result_id)
         
         # Удаляем связанные файлы
-        file_path = task.get_metadata('file_path')
-        output_path = task.get_metadata('output_path')
-        preview_path = task.get_metadata('preview_path')
-        
-        for path in [file_path, output_path, preview_path]:
-            if path and default_storage.exists(path):
-                try:
-                    default_storage.delete(path)
-                except Exception as e:
-                    logger.warning(f"Не удалось удалить файл {path}: {str(e)}")
+        for key in TASK_FILE_KEYS:
+            path = task.meta.get(key)
+            if path:
+                _delete_stored_file(path)
         
         # Удаляем задачу
         task.delete()
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'message': 'Результат успешно удален'
         })
         
     except ConversionTask.DoesNotExist:
-        return JsonResponse({'error': 'Результат не найден'}, status=404)
+        return json_response({'error': 'Результат не найден'}, status=404)
     except Exception as e:
         logger.error(f"Ошибка удаления результата {result_id}: {str(e)}")
-        return JsonResponse({'error': 'Ошибка удаления'}, status=500)
+        return json_response({'error': 'Ошибка удаления'}, status=500)
+
+
+# Сколько секунд переиспользуется ответ get_conversion_stats
+CONVERSION_STATS_CACHE_TTL = 60
+
+# Базовые коэффициенты времени обработки (секунды на МБ)
+PROCESSING_RATES = {
+    ('video', 'gif'): 2.0,      # Видео в GIF - самое медленное
+    ('video', 'mp4'): 0.5,      # Видео в видео - быстро
+    ('image', 'jpg'): 0.1,      # Изображения - очень быстро
+    ('image', 'png'): 0.2,
+    ('image', 'webp'): 0.15,
+    ('audio', 'mp3'): 0.3,      # Аудио - средне
+    ('document', 'pdf'): 0.2,   # Документы - быстро
+}
+
+# Те же коэффициенты в секундах на байт, чтобы не пересчитывать МБ при каждом вызове
+_SECONDS_PER_BYTE = {key: rate / (1024 * 1024) for key, rate in PROCESSING_RATES.items()}
+_DEFAULT_SECONDS_PER_BYTE = 1.0 / (1024 * 1024)  # По умолчанию 1 сек/МБ
 
 
 def estimate_processing_time(source_format, target_format, file_size):
     """
     Оценка времени обработки файла на основе его типа и размера.
-    Возвращает примерное время в секундах.
-    """
-    # Базовые коэффициенты времени обработки (секунды на МБ)
-    processing_rates = {
-        ('video', 'gif'): 2.0,      # Видео в GIF - самое медленное
-        ('video', 'mp4'): 0.5,      # Видео в видео - быстро
-        ('image', 'jpg'): 0.1,      # Изображения - очень быстро
-        ('image', 'png'): 0.2,
-        ('image', 'webp'): 0.15,
-        ('audio', 'mp3'): 0.3,      # Аудио - средне
-        ('document', 'pdf'): 0.2,   # Документы - быстро
-    }
+    Возвращает примерное время в секундах (минимум 5 секунд).
+    """
+    rate = _SECONDS_PER_BYTE.get((source_format, target_format), _DEFAULT_SECONDS_PER_BYTE)
+    return max(5, int(file_size * rate))
+
+
+def _conversion_stats_payload():
+    """Сбор общей статистики конвертации (несколько агрегирующих запросов)"""
+    # Статистика за последние 30 дней
+    cutoff_time = timezone.now() - timedelta(days=30)
     
-    # Размер файла в МБ
-    size_mb = file_size / (1024 * 1024)
+    total_tasks = ConversionTask.objects.filter(created_at__gte=cutoff_time)
     
-    # Получаем коэффициент для данной конвертации
-    key = (source_format, target_format)
-    rate = processing_rates.get(key, 1.0)  # По умолчанию 1 сек/МБ
+    # Общие статистики одним запросом; задачи в обработке считаются за все время
+    in_period = Q(created_at__gte=cutoff_time)
+    in_progress = Q(status__in=[ConversionTask.STATUS_QUEUED, ConversionTask.STATUS_RUNNING])
+    stats = ConversionTask.objects.filter(in_period | in_progress).aggregate(
+        total_conversions=Count('id', filter=in_period),
+        successful_conversions=Count('id', filter=in_period & Q(status=ConversionTask.STATUS_DONE)),
+        failed_conversions=Count('id', filter=in_period & Q(status=ConversionTask.STATUS_FAILED)),
+        currently_processing=Count('id', filter=in_progress),
+    )
     
-    # Рассчитываем время с учетом минимального времени
-    estimated_time = max(5, int(size_mb * rate))  # Минимум 5 секунд
+    # Статистика по типам конвертации
+    conversion_types = total_tasks.values(
+        'task_metadata__source_format',
+        'task_metadata__target_format'
+    ).annotate(count=Count('id')).order_by('-count')
     
-    return estimated_time
+    # Статистика по дням
+    # Последние 7 дней группируются в SQL одним запросом. Начало окна
+    # задается диапазоном по created_at, а не __date, чтобы работал индекс
+    now = timezone.now()
+    today = now.date()
+    window_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=6)
+    day_rows = total_tasks.filter(
+        created_at__gte=window_start
+    ).values(day=TruncDate('created_at')).annotate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status=ConversionTask.STATUS_DONE)),
+        failed=Count('id', filter=Q(status=ConversionTask.STATUS_FAILED)),
+    ).order_by()
+    counts_by_day = {row.pop('day'): row for row in day_rows}
+    
+    daily_stats = []
+    for i in range(7):  # Последние 7 дней
+        day = today - timedelta(days=i)
+        day_counts = counts_by_day.get(day, {'total': 0, 'completed': 0, 'failed': 0})
+        daily_stats.append({'date': day.isoformat(), **day_counts})
+    
+    return {
+        'success': True,
+        'stats': stats,
+        'conversion_types': list(conversion_types),
+        'daily_stats': daily_stats,
+        'period': '30 days',
+        'last_updated': timezone.now().isoformat()
+    }
+
+
+def _cache_call(method, *args):
+    """Обращение к кэшу; при недоступном кэше статистика считается без него"""
+    try:
+        return method(*args)
+    except Exception as e:
+        logger.warning(f"Кэш статистики недоступен: {e}")
+        return None
 
 
 @require_http_methods(["GET"])
 def get_conversion_stats(request):
     """
     API endpoint для получения общей статистики конвертации.
+    Готовый ответ кэшируется на CONVERSION_STATS_CACHE_TTL секунд.
     """
     try:
-        # Статистика за последние 30 дней
-        cutoff_time = timezone.now() - timedelta(days=30)
-        
-        total_tasks = ConversionTask.objects.filter(created_at__gte=cutoff_time)
-        
-        # Общие статистики
-        stats = {
-            'total_conversions': total_tasks.count(),
-            'successful_conversions': total_tasks.filter(status=ConversionTask.STATUS_DONE).count(),
-            'failed_conversions': total_tasks.filter(status=ConversionTask.STATUS_FAILED).count(),
-            'currently_processing': ConversionTask.objects.filter(
-                status__in=[ConversionTask.STATUS_QUEUED, ConversionTask.STATUS_RUNNING]
-            ).count(),
-        }
-        
-        # Статистика по типам конвертации
-        conversion_types = total_tasks.values(
-            'task_metadata__source_format',
-            'task_metadata__target_format'
-        ).annotate(count=Count('id')).order_by('-count')
-        
-        # Статистика по дням
-        daily_stats = []
-        for i in range(7):  # Последние 7 дней
-            day = timezone.now().date() - timedelta(days=i)
-            day_tasks = total_tasks.filter(created_at__date=day)
-            daily_stats.append({
-                'date': day.isoformat(),
-                'total': day_tasks.count(),
-                'completed': day_tasks.filter(status=ConversionTask.STATUS_DONE).count(),
-                'failed': day_tasks.filter(status=ConversionTask.STATUS_FAILED).count(),
-            })
-        
-        return JsonResponse({
-            'success': True,
-            'stats': stats,
-            'conversion_types': list(conversion_types),
-            'daily_stats': daily_stats,
-            'period': '30 days',
-            'last_updated': timezone.now().isoformat()
-        })
+        body = _cache_call(cache.get, CONVERSION_STATS_CACHE_KEY)
+        if body is None:
+            body = dump_json(_conversion_stats_payload())
+            _cache_call(cache.set, CONVERSION_STATS_CACHE_KEY, body, CONVERSION_STATS_CACHE_TTL)
+        return json_response(body)
         
     except Exception as e:
         logger.error(f"Ошибка получения статистики: {str(e)}")
-        return JsonResponse({'error': 'Ошибка загрузки статистики'}, status=500)
+        return json_response({'error': 'Ошибка загрузки статистики'}, status=500)
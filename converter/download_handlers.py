@@ -4,16 +4,102 @@
 Решает проблемы с скачиванием файлов в облачных окружениях
 """
 
+import io
 import os
+import stat
+import time
+import heapq
+import queue
 import logging
+import threading
+import mimetypes
+from functools import lru_cache
 from pathlib import Path
-from django.http import HttpResponse, StreamingHttpResponse, JsonResponse, Http404
+from urllib.parse import quote
+from django.http import (
+    FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse, JsonResponse, Http404
+)
+from django.utils import timezone
+from django.utils.http import http_date, parse_etags
 from django.conf import settings
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 
+# Сообщения этого модуля пишутся на каждое скачивание, поэтому используется
+# отложенное %-форматирование: строка не собирается, если уровень отключен
 logger = logging.getLogger(__name__)
 
+# Через сколько секунд после ответа удаляется файл, отданный через nginx.
+# nginx открывает файл уже после того, как Django вернул заголовки, поэтому
+# удалять его сразу при закрытии ответа нельзя
+X_ACCEL_DELETE_DELAY = 60
+
+# Файлы не больше этого размера отдаются одним HttpResponse из памяти
+SMALL_FILE_SIZE = 256 * 1024
+
+# Сколько секунд браузер и CDN могут кешировать постоянные (не временные) файлы
+DOWNLOAD_CACHE_MAX_AGE = 3600
+
+# MIME типы по расширению; для остальных расширений используется mimetypes
+_CONTENT_TYPES = {
+    # Images
+    '.gif': 'image/gif',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.bmp': 'image/bmp',
+    '.ico': 'image/x-icon',
+    '.svg': 'image/svg+xml',
+    
+    # Audio
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+    '.ogg': 'audio/ogg',
+    '.aac': 'audio/aac',
+    '.flac': 'audio/flac',
+    '.m4a': 'audio/mp4',
+    
+    # Video
+    '.mp4': 'video/mp4',
+    '.avi': 'video/x-msvideo',
+    '.mov': 'video/quicktime',
+    '.mkv': 'video/x-matroska',
+    '.webm': 'video/webm',
+    '.wmv': 'video/x-ms-wmv',
+    
+    # Documents
+    '.pdf': 'application/pdf',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xls': 'application/vnd.ms-excel',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.ppt': 'application/vnd.ms-powerpoint',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.txt': 'text/plain',
+    '.rtf': 'application/rtf',
+    
+    # Archives
+    '.zip': 'application/zip',
+    '.rar': 'application/x-rar-compressed',
+    '.7z': 'application/x-7z-compressed',
+    '.tar': 'application/x-tar',
+    '.gz': 'application/gzip',
+}
+
+
+def get_content_type(file_path):
+    """Определяет MIME тип файла по расширению."""
+    suffix = os.path.splitext(str(file_path))[1]
+    # Обычно расширение уже в нижнем регистре - без лишней копии строки
+    if not suffix.islower():
+        suffix = suffix.lower()
+    return (
+        _CONTENT_TYPES.get(suffix)
+        or mimetypes.guess_type(str(file_path))[0]
+        or 'application/octet-stream'
+    )
+
 
 class CloudDownloadHandler:
     """
@@ -21,12 +107,12 @@ class CloudDownloadHandler:
     Решает проблемы с таймаутами, памятью и нестабильными соединениями.
     """
     
-    def __init__(self, chunk_size=8192, enable_resume=True, timeout=300):
+    def __init__(self, chunk_size=1024 * 1024, enable_resume=True, timeout=300):
         self.chunk_size = chunk_size
         self.enable_resume = enable_resume
         self.timeout = timeout
     
-    def serve_file(self, file_path, filename=None, content_type=None, delete_after=False):
+    def serve_file(self, file_path, filename=None, content_type=None, delete_after=False, request=None):
         """
         Обслуживает файл с поддержкой возобновления загрузки и оптимизацией для облака.
         
@@ -35,62 +121,97 @@ class CloudDownloadHandler:
             filename: имя файла для скачивания (если отличается от оригинала)
             content_type: MIME тип файла
             delete_after: удалить файл после скачивания
+            request: HTTP запрос; нужен для ответа на заголовок Range (206)
         """
         file_path = Path(file_path)
         
-        if not file_path.exists() or not file_path.is_file():
-            logger.error(f"File not found: {file_path}")
+        # Один stat вместо exists() + is_file() + stat()
+        try:
+            file_stat = os.stat(file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            file_stat = None
+        if file_stat is None or not stat.S_ISREG(file_stat.st_mode):
+            logger.error("File not found: %s", file_path)
             raise Http404("File not found")
         
-        file_size = file_path.stat().st_size
+        file_size = file_stat.st_size
         filename = filename or file_path.name
         content_type = content_type or self._get_content_type(file_path)
         
-        logger.info(f"Serving file: {filename} ({file_size} bytes)")
+        logger.info("Serving file: %s (%d bytes)", filename, file_size)
+        
+        x_accel_path = self._x_accel_path(file_path)
+        
+        # Постоянные файлы не меняются после конвертации: повторное скачивание
+        # с тем же ETag получает 304 без тела. Временные файлы не кешируются
+        etag = None if delete_after else self._etag(file_stat)
+        headers = request.headers if request is not None else {}
+        if etag and self._etag_matches(etag, headers.get('If-None-Match')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(file_stat.st_mtime)
+            response['Cache-Control'] = f'public, max-age={DOWNLOAD_CACHE_MAX_AGE}'
+            return response
         
-        def file_iterator():
-            bytes_sent = 0
+        # Range обрабатывает сам Django, только если файл не отдает nginx;
+        # If-Range с другим ETag означает, что файл изменился - отдаем целиком
+        byte_range = None
+        range_header = headers.get('Range')
+        if_range = headers.get('If-Range')
+        if if_range and if_range != etag:
+            range_header = None
+        if range_header and self.enable_resume and not x_accel_path:
             try:
-                with open(file_path, 'rb') as f:
-                    while bytes_sent < file_size:
-                        chunk = f.read(min(self.chunk_size, file_size - bytes_sent))
-                        if not chunk:
-                            break
-                        bytes_sent += len(chunk)
-                        yield chunk
-                        
-                        # Log progress for large files
-                        if file_size > 1024 * 1024 and bytes_sent % (1024 * 1024) == 0:
-                            progress = (bytes_sent / file_size) * 100
-                            logger.debug(f"Download progress: {progress:.1f}% ({bytes_sent}/{file_size})")
-                
-                logger.info(f"File served successfully: {filename} ({bytes_sent}/{file_size} bytes)")
-                
-            except Exception as e:
-                logger.error(f"Error serving file {filename}: {e}")
-                raise
-            finally:
-                if delete_after:
-                    try:
-                        file_path.unlink(missing_ok=True)
-                        logger.info(f"File deleted after serving: {filename}")
-                    except Exception as e:
-                        logger.warning(f"Failed to delete file {filename}: {e}")
+                byte_range = self._parse_range(range_header, file_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{file_size}'
+                return response
         
-        response = StreamingHttpResponse(
-            file_iterator(),
-            content_type=content_type
-        )
+        if x_accel_path:
+            # Файл отдает nginx через sendfile, Django возвращает только заголовки
+            if delete_after:
+                response = _DeleteAfterResponse(file_path, content_type=content_type)
+            else:
+                response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = x_accel_path
+        elif byte_range:
+            # Частичный ответ; файл не удаляется даже при delete_after,
+            # иначе клиент не сможет докачать остальные части
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                self._range_iterator(file_path, start, end - start + 1),
+                status=206,
+                content_type=content_type
+            )
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{file_size}'
+        elif file_size <= SMALL_FILE_SIZE and not delete_after:
+            # Маленький файл: один ответ из памяти вместо потоковой отдачи
+            with open(file_path, 'rb') as f:
+                response = HttpResponse(f.read(), content_type=content_type)
+        else:
+            # FileResponse отдает файл через wsgi.file_wrapper (sendfile в gunicorn),
+            # без копирования блоков через Python; файл закрывается вместе с ответом
+            file_class = _DeleteOnCloseFile if delete_after else io.FileIO
+            response = FileResponse(file_class(file_path, 'rb'), content_type=content_type)
+            response.block_size = self.chunk_size
+            response['Content-Length'] = str(file_size)
         
         # Критические заголовки для правильного скачивания
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        response['Content-Length'] = str(file_size)
         response['Accept-Ranges'] = 'bytes'
         
-        # Заголовки кеширования
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
+        # Заголовки кеширования: временные файлы удаляются после скачивания
+        # и не кешируются, постоянные может кешировать браузер и CDN
+        if delete_after:
+            response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+            response['Pragma'] = 'no-cache'
+            response['Expires'] = '0'
+        else:
+            response['Cache-Control'] = f'public, max-age={DOWNLOAD_CACHE_MAX_AGE}'
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(file_stat.st_mtime)
         
         # Заголовки безопасности
         response['X-Content-Type-Options'] = 'nosniff'
@@ -105,57 +226,161 @@ class CloudDownloadHandler:
         
         return response
     
-    def _get_content_type(self, file_path):
-        """Определяет MIME тип файла по расширению."""
-        suffix = file_path.suffix.lower()
+    def _etag(self, file_stat):
+        """Сильный ETag файла по inode, времени изменения и размеру."""
+        return f'"{file_stat.st_ino:x}-{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+    
+    def _etag_matches(self, etag, if_none_match):
+        """Совпадает ли ETag со значением заголовка If-None-Match."""
+        if not if_none_match:
+            return False
+        matches = parse_etags(if_none_match)
+        return etag in matches or '*' in matches
+    
+    def _parse_range(self, range_header, file_size):
+        """
+        Разбор заголовка Range (RFC 7233) для одного диапазона байт.
         
-        content_type_map = {
-            # Images
-            '.gif': 'image/gif',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.webp': 'image/webp',
-            '.bmp': 'image/bmp',
-            '.ico': 'image/x-icon',
-            '.svg': 'image/svg+xml',
-            
-            # Audio
-            '.mp3': 'audio/mpeg',
-            '.wav': 'audio/wav',
-            '.ogg': 'audio/ogg',
-            '.aac': 'audio/aac',
-            '.flac': 'audio/flac',
-            '.m4a': 'audio/mp4',
-            
-            # Video
-            '.mp4': 'video/mp4',
-            '.avi': 'video/x-msvideo',
-            '.mov': 'video/quicktime',
-            '.mkv': 'video/x-matroska',
-            '.webm': 'video/webm',
-            '.wmv': 'video/x-ms-wmv',
-            
-            # Documents
-            '.pdf': 'application/pdf',
-            '.doc': 'application/msword',
-            '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            '.xls': 'application/vnd.ms-excel',
-            '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            '.ppt': 'application/vnd.ms-powerpoint',
-            '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-            '.txt': 'text/plain',
-            '.rtf': 'application/rtf',
-            
-            # Archives
-            '.zip': 'application/zip',
-            '.rar': 'application/x-rar-compressed',
-            '.7z': 'application/x-7z-compressed',
-            '.tar': 'application/x-tar',
-            '.gz': 'application/gzip',
-        }
+        Returns:
+            (start, end) включительно или None, если заголовок некорректен
+            и его нужно проигнорировать (ответ целиком)
+        
+        Raises:
+            ValueError: диапазон невыполним или их несколько (ответ 416)
+        """
+        unit, _, ranges = range_header.partition('=')
+        if unit.strip().lower() != 'bytes' or not ranges:
+            return None
+        if ',' in ranges:
+            raise ValueError('Multiple ranges are not supported')
+        
+        first, sep, last = ranges.strip().partition('-')
+        if not sep or not (first or last):
+            return None
+        if (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        
+        if not first:
+            # Суффикс: последние N байт
+            length = int(last)
+            if length == 0 or file_size == 0:
+                raise ValueError('Unsatisfiable range')
+            return max(file_size - length, 0), file_size - 1
         
-        return content_type_map.get(suffix, 'application/octet-stream')
+        start = int(first)
+        end = min(int(last), file_size - 1) if last else file_size - 1
+        if start >= file_size or (last and int(last) < start):
+            raise ValueError('Unsatisfiable range')
+        return start, end
+    
+    def _range_iterator(self, file_path, start, length):
+        """Блоки файла начиная со start, всего length байт."""
+        # Без буфера BufferedReader: блоки и так крупные, лишнее копирование не нужно
+        with open(file_path, 'rb', buffering=0) as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+    
+    def _x_accel_path(self, file_path):
+        """
+        Внутренний путь nginx (X-Accel-Redirect) для файла из MEDIA_ROOT.
+        Возвращает None, если X_ACCEL_REDIRECT_PREFIX не настроен или файл вне MEDIA_ROOT.
+        """
+        prefix = getattr(settings, 'X_ACCEL_REDIRECT_PREFIX', '')
+        if not prefix:
+            return None
+        
+        relative = os.path.relpath(os.path.abspath(file_path), os.path.abspath(settings.MEDIA_ROOT))
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+        return f"{prefix.rstrip('/')}/{quote(Path(relative).as_posix())}"
+    
+    def _get_content_type(self, file_path):
+        """Определяет MIME тип файла по расширению."""
+        return get_content_type(file_path)
+
+
+def _delete_served_file(file_path):
+    """Удаление отданного файла (выполняется в потоке удаления)."""
+    try:
+        file_path.unlink(missing_ok=True)
+        logger.info("File deleted after serving: %s", file_path.name)
+    except Exception as e:
+        logger.warning("Failed to delete file %s: %s", file_path.name, e)
+
+
+# Очередь отложенного удаления: (время удаления по time.monotonic(), путь).
+# Файлы удаляет один фоновый поток, а не поток запроса.
+# Очередь живет только в памяти процесса: при перезапуске воркера
+# (gunicorn --max-requests, деплой) еще не удаленные файлы остаются на диске.
+# Их удаляет периодическая очистка (manage.py cleanup_old_files из
+# scripts/cleanup_cron.sh, каталог MEDIA_ROOT/converted). Celery для этого не
+# подходит: воркер может работать на другом сервере без доступа к диску веба
+_DELETE_QUEUE = queue.SimpleQueue()
+_delete_thread = None
+_delete_thread_lock = threading.Lock()
+
+
+def _deletion_worker():
+    """Фоновый поток: удаляет файлы из очереди, когда наступает их время."""
+    pending = []
+    while True:
+        timeout = max(pending[0][0] - time.monotonic(), 0) if pending else None
+        try:
+            heapq.heappush(pending, _DELETE_QUEUE.get(timeout=timeout))
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        while pending and pending[0][0] <= now:
+            _, file_path = heapq.heappop(pending)
+            _delete_served_file(file_path)
+
+
+def schedule_file_deletion(file_path, delay=0):
+    """
+    Поставить файл в очередь на удаление через delay секунд.
+    Поток удаления запускается при первом вызове. Удаление не переживает
+    перезапуск процесса (см. _DELETE_QUEUE).
+    """
+    global _delete_thread
+    with _delete_thread_lock:
+        if _delete_thread is None or not _delete_thread.is_alive():
+            _delete_thread = threading.Thread(
+                target=_deletion_worker, name='download-cleanup', daemon=True
+            )
+            _delete_thread.start()
+    _DELETE_QUEUE.put((time.monotonic() + delay, Path(file_path)))
+
+
+class _DeleteOnCloseFile(io.FileIO):
+    """Файл, который ставится в очередь на удаление, когда ответ закрывает его после отправки."""
+    
+    def close(self):
+        if self.closed:
+            return
+        super().close()
+        schedule_file_deletion(self.name)
+
+
+class _DeleteAfterResponse(HttpResponse):
+    """
+    Ответ с X-Accel-Redirect для файла, который нужно удалить после скачивания.
+    Удаление планируется при закрытии ответа с задержкой X_ACCEL_DELETE_DELAY:
+    к этому времени nginx уже открыл файл и дочитает его после unlink.
+    """
+    
+    def __init__(self, file_path, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._file_path = file_path
+    
+    def close(self):
+        super().close()
+        schedule_file_deletion(self._file_path, X_ACCEL_DELETE_DELAY)
 
 
 class RenderOptimizedDownloader(CloudDownloadHandler):
@@ -167,14 +392,14 @@ class RenderOptimizedDownloader(CloudDownloadHandler):
     def __init__(self):
         # Render оптимизированные настройки
         super().__init__(
-            chunk_size=16384,  # 16KB chunks для Render
+            chunk_size=4 * 1024 * 1024,  # 4MB chunks для Render
             enable_resume=True,
             timeout=120  # 2 минуты таймаут на Render
         )
     
-    def serve_file(self, file_path, filename=None, content_type=None, delete_after=False):
+    def serve_file(self, file_path, filename=None, content_type=None, delete_after=False, request=None):
         """Render-оптимизированная подача файлов."""
-        response = super().serve_file(file_path, filename, content_type, delete_after)
+        response = super().serve_file(file_path, filename, content_type, delete_after, request)
         
         # Специальные заголовки для Render
         response['Connection'] = 'close'  # Закрываем соединение после загрузки
@@ -187,17 +412,20 @@ class RenderOptimizedDownloader(CloudDownloadHandler):
         return response
 
 
+@lru_cache(maxsize=1)
 def get_download_handler():
     """
     Возвращает оптимальный обработчик скачивания в зависимости от платформы развертывания.
+    Платформа не меняется во время работы процесса, а обработчик не хранит
+    состояния запроса, поэтому один экземпляр переиспользуется для всех загрузок.
     """
     # Определяем платформу по переменным окружения
     if os.getenv('RENDER'):
         return RenderOptimizedDownloader()
     elif os.getenv('RAILWAY_ENVIRONMENT'):
-        return CloudDownloadHandler(chunk_size=32768, timeout=180)  # Railway оптимизация
+        return CloudDownloadHandler(chunk_size=4 * 1024 * 1024, timeout=180)  # Railway оптимизация
     elif os.getenv('HEROKU_APP_NAME'):
-        return CloudDownloadHandler(chunk_size=8192, timeout=30)   # Heroku оптимизация
+        return CloudDownloadHandler(chunk_size=64 * 1024, timeout=30)   # Heroku: dyno с 512MB памяти
     else:
         return CloudDownloadHandler()  # Базовая облачная конфигурация
 
@@ -214,12 +442,13 @@ def optimized_download_view(request, file_path, filename=None):
         return downloader.serve_file(
             file_path=file_path,
             filename=filename,
-            delete_after=False
+            delete_after=False,
+            request=request
         )
     except Http404:
         raise
     except Exception as e:
-        logger.error(f"Download error: {e}")
+        logger.error("Download error: %s", e)
         return JsonResponse({
             'success': False,
             'error': 'Ошибка при скачивании файла'
@@ -237,12 +466,13 @@ def download_and_cleanup_view(request, file_path, filename=None):
         return downloader.serve_file(
             file_path=file_path,
             filename=filename,
-            delete_after=True
+            delete_after=True,
+            request=request
         )
     except Http404:
         raise
     except Exception as e:
-        logger.error(f"Download and cleanup error: {e}")
+        logger.error("Download and cleanup error: %s", e)
         return JsonResponse({
             'success': False,
             'error': 'Ошибка при скачивании файла'
@@ -268,27 +498,30 @@ def download_converted_file(request, category, filename):
         if category not in allowed_categories:
             raise Http404("Недопустимая категория файла")
         
-        media_subdir = allowed_categories[category]
-        file_path = Path(settings.MEDIA_ROOT) / media_subdir / filename
-        
-        # Проверка безопасности пути
-        if not str(file_path.resolve()).startswith(str(Path(settings.MEDIA_ROOT).resolve())):
+        # Имя файла - один компонент пути, без разделителей каталогов
+        if not filename or '/' in filename or os.sep in filename or '\0' in filename:
             raise Http404("Небезопасный путь к файлу")
         
-        if not file_path.exists():
-            raise Http404("Файл не найден")
+        # Проверка безопасности пути нормализацией строк, без realpath и stat
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        media_subdir = allowed_categories[category]
+        file_path = os.path.normpath(os.path.join(media_root, media_subdir, filename))
+        if os.path.commonpath([file_path, media_root]) != media_root:
+            raise Http404("Небезопасный путь к файлу")
         
+        # Наличие файла проверяет serve_file тем же stat, которым берет размер
         downloader = get_download_handler()
         return downloader.serve_file(
             file_path=file_path,
             filename=filename,
-            delete_after=True  # Удаляем после скачивания для экономии места
+            delete_after=True,  # Удаляем после скачивания для экономии места
+            request=request
         )
         
     except Http404:
         raise
     except Exception as e:
-        logger.error(f"Error downloading converted file {category}/{filename}: {e}")
+        logger.error("Error downloading converted file %s/%s: %s", category, filename, e)
         return JsonResponse({
             'success': False,
             'error': 'Ошибка при скачивании конвертированного файла'
@@ -300,33 +533,26 @@ def download_converted_file(request, category, filename):
 def download_test_view(request):
     """
     Тестовое представление для проверки работы скачивания.
-    Создает тестовый файл и предлагает его скачать.
+    Формирует тестовое содержимое и предлагает его скачать.
     """
     try:
-        import tempfile
-        
-        # Создаем тестовый файл
+        # Содержимое небольшое: отдаем из памяти, без временного файла
         test_content = f"""
 Тест скачивания файлов - {request.build_absolute_uri()}
-Время: {os.popen('date').read().strip()}
+Время: {timezone.now().isoformat()}
 Платформа: {os.getenv('RENDER', os.getenv('RAILWAY_ENVIRONMENT', os.getenv('HEROKU_APP_NAME', 'Unknown')))}
 User-Agent: {request.META.get('HTTP_USER_AGENT', 'Unknown')}
         """.strip()
+        body = test_content.encode('utf-8')
         
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            f.write(test_content)
-            test_file_path = f.name
-        
-        downloader = get_download_handler()
-        return downloader.serve_file(
-            file_path=test_file_path,
-            filename='download_test.txt',
-            content_type='text/plain',
-            delete_after=True
-        )
+        response = HttpResponse(body, content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename="download_test.txt"'
+        response['Content-Length'] = str(len(body))
+        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        return response
         
     except Exception as e:
-        logger.error(f"Download test error: {e}")
+        logger.error("Download test error: %s", e)
         return JsonResponse({
             'success': False,
             'error': f'Ошибка тестирования скачивания: {str(e)}'
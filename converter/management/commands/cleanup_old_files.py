@@ -7,6 +7,8 @@ Django команда управления для очистки старых ф
     python manage.py cleanup_old_files --all-failed
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -16,6 +18,9 @@ from django.utils import timezone
 
 from converter.models import ConversionTask
 
+# Сколько файлов удаляется одновременно
+CLEANUP_WORKERS = 16
+
 
 class Command(BaseCommand):
     help = 'Очистка старых файлов конвертации и устаревших задач'
@@ -107,13 +112,10 @@ class Command(BaseCommand):
             status__in=[ConversionTask.STATUS_DONE, ConversionTask.STATUS_FAILED]
         )
         
-        count = old_tasks.count()
+        count = self._delete_tasks(old_tasks)
         
         if self.verbosity >= 2:
             self.stdout.write(f'Найдено {count} старых задач для удаления')
-        
-        if not self.dry_run and count > 0:
-            old_tasks.delete()
             
         return count
 
@@ -123,36 +125,41 @@ class Command(BaseCommand):
             status=ConversionTask.STATUS_FAILED
         )
         
-        count = failed_tasks.count()
+        count = self._delete_tasks(failed_tasks)
         
         if self.verbosity >= 2:
             self.stdout.write(f'Найдено {count} неудачных задач для удаления')
-        
-        if not self.dry_run and count > 0:
-            failed_tasks.delete()
             
         return count
 
+    def _delete_tasks(self, queryset):
+        """
+        Удаление задач одним DELETE без выборки строк.
+        У ConversionTask нет связей и сигналов удаления, поэтому Django
+        выполняет быстрое удаление; число строк возвращает сам DELETE,
+        отдельный COUNT нужен только в режиме тестирования.
+        """
+        if self.dry_run:
+            return queryset.count()
+        deleted, _ = queryset.delete()
+        return deleted
+
     def _cleanup_media_files(self, cutoff_date):
         """Очистка старых медиа файлов"""
         media_root = Path(settings.MEDIA_ROOT)
-        gifs_dir = media_root / 'gifs'
-        uploads_dir = media_root / 'uploads'
         
         deleted_count = 0
         total_size = 0
         
-        # Очистка GIF файлов
-        if gifs_dir.exists():
-            count, size = self._cleanup_directory(gifs_dir, cutoff_date)
-            deleted_count += count
-            total_size += size
-        
-        # Очистка загруженных файлов
-        if uploads_dir.exists():
-            count, size = self._cleanup_directory(uploads_dir, cutoff_date)
-            deleted_count += count
-            total_size += size
+        # GIF файлы, загруженные файлы и результаты конвертации. В converted
+        # также остаются файлы, отложенное удаление которых после отдачи
+        # (download_handlers.schedule_file_deletion) потерялось при перезапуске
+        for name in ('gifs', 'uploads', 'converted'):
+            directory = media_root / name
+            if directory.exists():
+                count, size = self._cleanup_directory(directory, cutoff_date)
+                deleted_count += count
+                total_size += size
         
         return deleted_count, total_size
 
@@ -176,38 +183,48 @@ class Command(BaseCommand):
         """Очистка файлов в директории старше указанной даты"""
         deleted_count = 0
         total_size = 0
+        # Время модификации сравнивается как POSIX timestamp, без datetime на каждый файл
+        cutoff_ts = cutoff_date.timestamp()
         
         try:
-            for file_path in directory.rglob('*'):
-                if file_path.is_file():
-                    # Проверяем время модификации файла
-                    file_time = datetime.fromtimestamp(
-                        file_path.stat().st_mtime,
-                        tz=timezone.get_current_timezone()
-                    )
+            # Сначала собираем старые файлы, затем удаляем их параллельно:
+            # на сетевых дисках задержка каждого unlink - миллисекунды
+            expired = []
+            for entry in self._iter_files(directory):
+                # Один stat на файл: и время модификации, и размер
+                file_stat = entry.stat(follow_symlinks=False)
+                
+                if file_stat.st_mtime < cutoff_ts:
+                    file_size = file_stat.st_size
                     
-                    if file_time < cutoff_date:
-                        file_size = file_path.stat().st_size
-                        
-                        if self.verbosity >= 2:
-                            self.stdout.write(
-                                f'Удаляем: {file_path} '
-                                f'({self._format_size(file_size)}, '
-                                f'изменен {file_time.strftime("%Y-%m-%d %H:%M:%S")})'
-                            )
-                        
-                        if not self.dry_run:
-                            try:
-                                file_path.unlink()
-                                deleted_count += 1
-                                total_size += file_size
-                            except OSError as e:
-                                self.stderr.write(
-                                    f'Ошибка удаления файла {file_path}: {e}'
-                                )
-                        else:
+                    if self.verbosity >= 2:
+                        file_time = datetime.fromtimestamp(
+                            file_stat.st_mtime,
+                            tz=timezone.get_current_timezone()
+                        )
+                        self.stdout.write(
+                            f'Удаляем: {entry.path} '
+                            f'({self._format_size(file_size)}, '
+                            f'изменен {file_time.strftime("%Y-%m-%d %H:%M:%S")})'
+                        )
+                    
+                    expired.append((entry.path, file_size))
+            
+            if self.dry_run:
+                deleted_count = len(expired)
+                total_size = sum(size for _, size in expired)
+            elif expired:
+                workers = min(CLEANUP_WORKERS, len(expired))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    errors = executor.map(self._unlink, [path for path, _ in expired])
+                    for (path, file_size), error in zip(expired, errors):
+                        if error is None:
                             deleted_count += 1
                             total_size += file_size
+                        else:
+                            self.stderr.write(
+                                f'Ошибка удаления файла {path}: {error}'
+                            )
             
             # Удаляем пустые директории
             if not self.dry_run:
@@ -218,16 +235,45 @@ class Command(BaseCommand):
         
         return deleted_count, total_size
 
-    def _remove_empty_dirs(self, directory):
-        """Удаление пустых директорий"""
+    @staticmethod
+    def _unlink(path):
+        """Удаление файла из пула потоков; возвращает ошибку или None"""
         try:
-            for dir_path in sorted(directory.rglob('*'), reverse=True):
-                if dir_path.is_dir() and not any(dir_path.iterdir()):
-                    if self.verbosity >= 2:
-                        self.stdout.write(f'Удаляем пустую директорию: {dir_path}')
-                    dir_path.rmdir()
-        except OSError:
-            pass  # Игнорируем ошибки при удалении директорий
+            os.unlink(path)
+        except OSError as e:
+            return e
+        return None
+
+    def _iter_files(self, directory):
+        """
+        Обход файлов директории через os.scandir (без рекурсии Python).
+        Тип файла берется из записи каталога, без отдельного stat на каждый путь.
+        """
+        stack = [str(directory)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry
+
+    def _remove_empty_dirs(self, directory):
+        """
+        Удаление пустых директорий снизу вверх (сама directory остается).
+        rmdir удаляет только пустой каталог, поэтому отдельная проверка
+        содержимого не нужна: непустые каталоги просто пропускаются.
+        """
+        top = str(directory)
+        for root, _, _ in os.walk(top, topdown=False):
+            if root == top:
+                continue
+            try:
+                os.rmdir(root)
+            except OSError:
+                continue  # Каталог не пуст или недоступен
+            if self.verbosity >= 2:
+                self.stdout.write(f'Удаляем пустую директорию: {root}')
 
     def _format_size(self, size_bytes):
         """Форматирование размера файла"""
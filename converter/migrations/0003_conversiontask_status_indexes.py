@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0002_conversionhistory'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='conversiontask',
+            name='converter_c_status_cf95b7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='conversiontask',
+            index=models.Index(fields=['status', 'created_at'], name='converter_c_status_2ac17b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversiontask',
+            index=models.Index(fields=['status', 'completed_at'], name='converter_c_status_9572c9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversiontask',
+            index=models.Index(condition=models.Q(('status__in', ['queued', 'running'])), fields=['created_at'], name='task_active_created_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+"""
+Trigram индексы для поиска по именам файлов в task_metadata (только PostgreSQL).
+
+Поиск в get_conversion_results использует task_metadata__<key>__icontains,
+который Django компилирует в UPPER((task_metadata ->> '<key>')::text) LIKE UPPER(...).
+Индекс построен по тому же выражению, поэтому LIKE '%...%' использует его
+вместо последовательного сканирования. На SQLite миграция ничего не делает.
+"""
+
+from django.db import migrations
+
+SEARCH_KEYS = ('original_filename', 'converted_filename')
+
+
+def _index_name(key):
+    return f'task_{key}_trgm_idx'
+
+
+def create_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for key in SEARCH_KEYS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {_index_name(key)} ON converter_conversiontask '
+            f"USING gin ((UPPER((task_metadata ->> '{key}')::text)) gin_trgm_ops)"
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for key in SEARCH_KEYS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {_index_name(key)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0003_conversiontask_status_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_indexes, drop_trgm_indexes),
+    ]
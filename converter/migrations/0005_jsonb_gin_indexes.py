@@ -0,0 +1,44 @@
+"""
+GIN индексы по JSON полям (только PostgreSQL).
+
+Фильтры по ключам и вхождению (task_metadata__has_key, __contains и т.п.)
+без индекса читают всю таблицу. Для task_metadata используется jsonb_ops:
+reap_task_temp_files фильтрует по has_key, который jsonb_path_ops не поддерживает.
+Для полей истории достаточно более компактного jsonb_path_ops (только @>).
+На SQLite JSON хранится текстом, и миграция ничего не делает.
+"""
+
+from django.db import migrations
+
+GIN_INDEXES = (
+    ('task_metadata_gin_idx', 'converter_conversiontask', 'task_metadata', 'jsonb_ops'),
+    ('history_conv_params_gin_idx', 'converter_conversionhistory', 'conversion_params', 'jsonb_path_ops'),
+    ('history_result_meta_gin_idx', 'converter_conversionhistory', 'result_metadata', 'jsonb_path_ops'),
+)
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column, opclass in GIN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} {opclass})'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _, _ in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0004_conversiontask_filename_trgm'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0005_jsonb_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='conversionhistory',
+            name='converter_c_file_ty_5e5acb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='conversionhistory',
+            name='converter_c_status_429ce0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='conversionhistory',
+            index=models.Index(fields=['file_type', 'created_at'], name='converter_c_file_ty_192a6d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversionhistory',
+            index=models.Index(fields=['status', 'created_at'], name='converter_c_status_e00dd2_idx'),
+        ),
+    ]
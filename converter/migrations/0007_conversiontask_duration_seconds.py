@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0006_conversionhistory_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversiontask',
+            name='duration_seconds',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Длительность (сек)'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0007_conversiontask_duration_seconds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversionhistory',
+            name='settings_summary_cached',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Описание настроек'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:27
+
+import django.db.models.fields.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0008_conversionhistory_settings_summary_cached'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversionhistory',
+            index=models.Index(django.db.models.fields.json.KeyTransform('quality', 'conversion_params'), name='history_param_quality_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversionhistory',
+            index=models.Index(django.db.models.fields.json.KeyTransform('width', 'conversion_params'), name='history_param_width_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversionhistory',
+            index=models.Index(django.db.models.fields.json.KeyTransform('bitrate', 'conversion_params'), name='history_param_bitrate_idx'),
+        ),
+    ]
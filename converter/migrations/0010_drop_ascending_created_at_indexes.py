@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:27
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0009_conversionhistory_param_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='conversionhistory',
+            name='converter_c_created_693d1c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='conversiontask',
+            name='converter_c_created_a9819a_idx',
+        ),
+    ]
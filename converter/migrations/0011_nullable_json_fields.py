@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 04:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0010_drop_ascending_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conversionhistory',
+            name='conversion_params',
+            field=models.JSONField(blank=True, default=None, help_text='JSON с параметрами конвертации', null=True, verbose_name='Параметры конвертации'),
+        ),
+        migrations.AlterField(
+            model_name='conversionhistory',
+            name='result_metadata',
+            field=models.JSONField(blank=True, default=None, help_text='JSON с информацией о результате конвертации', null=True, verbose_name='Метаданные результата'),
+        ),
+        migrations.AlterField(
+            model_name='conversiontask',
+            name='task_metadata',
+            field=models.JSONField(blank=True, default=None, help_text='JSON с метаданными: информация о файлах, параметрах конвертации и т.д.', null=True, verbose_name='Метаданные задачи'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+"""
+Заполнение duration_seconds для задач, завершенных до появления поля,
+чтобы сортировка по длительности в админке учитывала и старые задачи.
+"""
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+
+
+def backfill_duration(apps, schema_editor):
+    ConversionTask = apps.get_model('converter', 'ConversionTask')
+    rows = ConversionTask.objects.filter(
+        duration_seconds__isnull=True,
+        started_at__isnull=False,
+        completed_at__isnull=False,
+    ).only('id', 'started_at', 'completed_at')
+    
+    batch = []
+    for task in rows.iterator(chunk_size=BATCH_SIZE):
+        task.duration_seconds = (task.completed_at - task.started_at).total_seconds()
+        batch.append(task)
+        if len(batch) >= BATCH_SIZE:
+            ConversionTask.objects.bulk_update(batch, ['duration_seconds'])
+            batch = []
+    if batch:
+        ConversionTask.objects.bulk_update(batch, ['duration_seconds'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('converter', '0011_nullable_json_fields'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_duration, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,35 @@
+import logging
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.db import models
+from django.db.models.fields.json import KeyTransform
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
+# Ключ кэша ответа get_conversion_stats; сбрасывается при завершении задач
+CONVERSION_STATS_CACHE_KEY = 'conversion_stats_v1'
+
+logger = logging.getLogger(__name__)
+
+
+def invalidate_conversion_stats():
+    """
+    Сброс кэша статистики. Недоступность кэша (Redis) не должна ломать
+    завершение задачи, поэтому ошибки только логируются: в худшем случае
+    статистика обновится по истечении CONVERSION_STATS_CACHE_TTL.
+    """
+    try:
+        cache.delete(CONVERSION_STATS_CACHE_KEY)
+    except Exception as e:
+        logger.warning(f"Не удалось сбросить кэш статистики: {e}")
+
+# Сколько записей истории вставляется одним INSERT
+HISTORY_BULK_BATCH_SIZE = 500
+
+# Ключи conversion_params с отдельными индексами в истории
+HISTORY_INDEXED_PARAMS = ('quality', 'width', 'bitrate')
+
 
 class ConversionTask(models.Model):
     """Модель для отслеживания задач конвертации файлов"""
@@ -18,6 +46,8 @@ class ConversionTask(models.Model):
         (STATUS_DONE, 'Завершено'),
         (STATUS_FAILED, 'Ошибка'),
     ]
+    # Подписи статусов по ключу: без перебора choices в get_status_display()
+    STATUS_LABELS = dict(STATUS_CHOICES)
     
     # Основные поля
     id = models.AutoField(primary_key=True)
@@ -35,9 +65,12 @@ class ConversionTask(models.Model):
         help_text='Прогресс выполнения от 0 до 100'
     )
     
-    # Метаданные задачи
+    # Метаданные задачи; NULL вместо '{}', если метаданных нет
+    # (читать через meta / get_metadata, которые возвращают пустой словарь)
     task_metadata = models.JSONField(
-        default=dict,
+        null=True,
+        blank=True,
+        default=None,
         verbose_name='Метаданные задачи',
         help_text='JSON с метаданными: информация о файлах, параметрах конвертации и т.д.'
     )
@@ -70,18 +103,37 @@ class ConversionTask(models.Model):
         verbose_name='Сообщение об ошибке'
     )
     
+    # Длительность выполнения записывается при завершении, чтобы сортировка
+    # и агрегаты по ней (среднее время и т.п.) считались в БД
+    duration_seconds = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Длительность (сек)'
+    )
+    
     class Meta:
         verbose_name = 'Задача конвертации'
         verbose_name_plural = 'Задачи конвертации'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            # B-tree читается в обе стороны, поэтому отдельный индекс
+            # по возрастанию created_at не нужен
             models.Index(fields=['-created_at']),
+            # Фильтры по статусу с окном по времени (очередь, статистика, очистка);
+            # индекс по одному status покрывается префиксом этих индексов
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'completed_at']),
+            # Активные задачи: ветка "queued/running" в очереди задач
+            models.Index(
+                fields=['created_at'],
+                name='task_active_created_idx',
+                condition=models.Q(status__in=['queued', 'running']),
+            ),
         ]
     
     def __str__(self):
-        return f'Задача #{self.id} - {self.get_status_display()}'
+        return f'Задача #{self.id} - {self.STATUS_LABELS.get(self.status, self.status)}'
     
     def set_metadata(self, **kwargs):
         """Удобный метод для установки метаданных"""
@@ -89,37 +141,78 @@ class ConversionTask(models.Model):
             self.task_metadata = {}
         self.task_metadata.update(kwargs)
     
+    @property
+    def meta(self):
+        """
+        Метаданные задачи как словарь (пустой, если не заданы).
+        JSONField разбирается один раз при загрузке модели, поэтому
+        в представлениях достаточно task.meta.get(...) без лишних вызовов.
+        """
+        return self.task_metadata or {}
+    
     def get_metadata(self, key, default=None):
         """Удобный метод для получения метаданных"""
         if not self.task_metadata:
             return default
         return self.task_metadata.get(key, default)
     
+    def _publish_state(self):
+        """Событие изменения статуса для SSE подписчиков (см. task_events)"""
+        from .task_events import publish_task_event
+        publish_task_event(self.id, status=self.status, progress=self.progress)
+    
     def start(self):
         """Пометить задачу как начатую"""
         self.status = self.STATUS_RUNNING
         self.started_at = timezone.now()
-        self.save(update_fields=['status', 'started_at', 'updated_at'])
+        # При повторном запуске длительность прошлой попытки не действует
+        self.completed_at = None
+        self.duration_seconds = None
+        self.save(update_fields=['status', 'started_at', 'completed_at', 'duration_seconds', 'updated_at'])
+        self._publish_state()
     
     def complete(self):
         """Пометить задачу как завершенную"""
         self.status = self.STATUS_DONE
         self.progress = 100
         self.completed_at = timezone.now()
-        self.save(update_fields=['status', 'progress', 'completed_at', 'updated_at'])
+        self.duration_seconds = self._elapsed_seconds()
+        self.save(update_fields=['status', 'progress', 'completed_at', 'duration_seconds', 'updated_at'])
+        self._publish_state()
+        invalidate_conversion_stats()
     
     def fail(self, error_message=''):
         """Пометить задачу как неудачную"""
         self.status = self.STATUS_FAILED
         self.error_message = error_message
         self.completed_at = timezone.now()
-        self.save(update_fields=['status', 'error_message', 'completed_at', 'updated_at'])
-    
-    def update_progress(self, progress):
-        """Обновить прогресс выполнения"""
-        if 0 <= progress <= 100:
+        self.duration_seconds = self._elapsed_seconds()
+        self.save(update_fields=['status', 'error_message', 'completed_at', 'duration_seconds', 'updated_at'])
+        self._publish_state()
+        invalidate_conversion_stats()
+    
+    def update_progress(self, progress, extra_fields=()):
+        """
+        Обновить прогресс выполнения.
+        
+        Args:
+            progress: Прогресс от 0 до 100; повтор того же значения ничего не пишет
+            extra_fields: Другие измененные поля, записываются тем же запросом
+        """
+        if 0 <= progress <= 100 and progress != self.progress:
             self.progress = progress
-            self.save(update_fields=['progress', 'updated_at'])
+        elif not extra_fields:
+            return
+        
+        if extra_fields:
+            self.save(update_fields=['progress', *extra_fields, 'updated_at'])
+        else:
+            # UPDATE по первичному ключу без save() и его сигналов
+            self.updated_at = timezone.now()
+            type(self).objects.filter(pk=self.pk).update(
+                progress=progress, updated_at=self.updated_at
+            )
+        self._publish_state()
     
     @property
     def is_finished(self):
@@ -131,9 +224,18 @@ class ConversionTask(models.Model):
         """Проверить, активна ли задача"""
         return self.status in [self.STATUS_QUEUED, self.STATUS_RUNNING]
     
+    def _elapsed_seconds(self):
+        """Секунды от начала до завершения (None, если задача не начиналась)"""
+        if not self.started_at or not self.completed_at:
+            return None
+        return (self.completed_at - self.started_at).total_seconds()
+    
     @property
     def duration(self):
         """Получить длительность выполнения задачи"""
+        if self.duration_seconds is not None:
+            return timedelta(seconds=self.duration_seconds)
+        
         if not self.started_at:
             return None
         
@@ -141,6 +243,17 @@ class ConversionTask(models.Model):
         return end_time - self.started_at
 
 
+class ConversionHistoryQuerySet(models.QuerySet):
+    """Запросы к истории конвертаций"""
+    
+    # Крупные текстовые и JSON колонки, которые не выводятся в списках
+    LIST_DEFERRED_FIELDS = ('conversion_params', 'result_metadata', 'user_agent', 'error_message')
+    
+    def for_list(self):
+        """Записи для страниц списка без крупных колонок"""
+        return self.defer(*self.LIST_DEFERRED_FIELDS)
+
+
 class ConversionHistory(models.Model):
     """Модель для хранения истории всех конвертаций"""
     
@@ -160,6 +273,7 @@ class ConversionHistory(models.Model):
         (FILE_TYPE_ARCHIVE, 'Архив'),
         (FILE_TYPE_OTHER, 'Другой'),
     ]
+    FILE_TYPE_LABELS = dict(FILE_TYPE_CHOICES)
     
     # Статусы конвертации
     STATUS_COMPLETED = 'completed'
@@ -169,6 +283,7 @@ class ConversionHistory(models.Model):
         (STATUS_COMPLETED, 'Завершено'),
         (STATUS_FAILED, 'Ошибка'),
     ]
+    STATUS_LABELS = dict(STATUS_CHOICES)
     
     # Основные поля
     id = models.AutoField(primary_key=True)
@@ -252,16 +367,18 @@ class ConversionHistory(models.Model):
     
     # Параметры конвертации
     conversion_params = models.JSONField(
-        default=dict,
+        null=True,
         blank=True,
+        default=None,
         verbose_name='Параметры конвертации',
         help_text='JSON с параметрами конвертации'
     )
     
     # Метаданные результата
     result_metadata = models.JSONField(
-        default=dict,
+        null=True,
         blank=True,
+        default=None,
         verbose_name='Метаданные результата',
         help_text='JSON с информацией о результате конвертации'
     )
@@ -272,6 +389,15 @@ class ConversionHistory(models.Model):
         verbose_name='Сообщение об ошибке'
     )
     
+    # Краткое описание настроек, вычисленное при создании записи,
+    # чтобы списки истории не разбирали conversion_params для каждой строки
+    settings_summary_cached = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name='Описание настроек'
+    )
+    
     # Временные метки
     created_at = models.DateTimeField(
         default=timezone.now,
@@ -291,24 +417,39 @@ class ConversionHistory(models.Model):
         verbose_name='User Agent'
     )
     
+    objects = ConversionHistoryQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'История конвертации'
         verbose_name_plural = 'История конвертаций'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['file_type']),
-            models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            # Фильтр по типу или статусу с сортировкой по дате (списки, админка);
+            # B-tree читается в обе стороны, поэтому подходит и для -created_at.
+            # Отдельные индексы по file_type и status покрываются префиксом
+            models.Index(fields=['file_type', 'created_at']),
+            models.Index(fields=['status', 'created_at']),
             models.Index(fields=['-created_at']),
             models.Index(fields=['input_format', 'output_format']),
+            # B-tree по часто фильтруемым параметрам: выражение совпадает с тем,
+            # что строит conversion_params__<key>=..., поэтому равенство идет
+            # по индексу, а не через GIN jsonb_path_ops
+            *(
+                models.Index(KeyTransform(key, 'conversion_params'), name=f'history_param_{key}_idx')
+                for key in HISTORY_INDEXED_PARAMS
+            ),
         ]
     
     def __str__(self):
-        return f'{self.original_filename} -> {self.output_format} ({self.get_status_display()})'
+        return f'{self.original_filename} -> {self.output_format} ({self.STATUS_LABELS.get(self.status, self.status)})'
     
     @property
     def settings_summary(self):
         """Краткое описание настроек конвертации"""
+        return self.settings_summary_cached or self._compute_settings_summary()
+    
+    def _compute_settings_summary(self):
+        """Описание настроек по file_type и conversion_params"""
         if not self.conversion_params:
             return 'По умолчанию'
         
@@ -347,23 +488,48 @@ class ConversionHistory(models.Model):
     @classmethod
     def create_from_task(cls, task, result_info, **kwargs):
         """Создать запись истории из задачи конвертации"""
+        history = cls._build_from_task(task, result_info, **kwargs)
+        history.save()
+        return history
+    
+    @classmethod
+    def create_many_from_tasks(cls, pairs, **kwargs):
+        """
+        Создать записи истории для нескольких задач пакетными INSERT.
+        
+        Args:
+            pairs: Пары (задача, result_info)
+        
+        Returns:
+            list: Созданные записи
+        """
+        histories = [cls._build_from_task(task, result_info, **kwargs) for task, result_info in pairs]
+        return cls.objects.bulk_create(histories, batch_size=HISTORY_BULK_BATCH_SIZE)
+    
+    @classmethod
+    def _build_from_task(cls, task, result_info, **kwargs):
+        """Несохраненная запись истории по задаче и результату конвертации"""
+        metadata = task.meta
+        # duration у незавершенной задачи вычисляется от timezone.now(),
+        # поэтому читаем свойство один раз
+        duration = task.duration
         history = cls(
-            original_filename=task.get_metadata('original_filename', ''),
+            original_filename=metadata.get('original_filename', ''),
             output_filename=result_info.get('output_filename', ''),
             output_path=result_info.get('output_path', ''),
             output_url=result_info.get('output_url', ''),
-            file_type=task.get_metadata('file_type', cls.FILE_TYPE_OTHER),
-            input_format=task.get_metadata('input_format', ''),
+            file_type=metadata.get('file_type', cls.FILE_TYPE_OTHER),
+            input_format=metadata.get('input_format', ''),
             output_format=result_info.get('output_format', ''),
-            file_size=task.get_metadata('file_size', 0),
+            file_size=metadata.get('file_size', 0),
             output_size=result_info.get('output_size', 0),
             status=cls.STATUS_COMPLETED if task.status == task.STATUS_DONE else cls.STATUS_FAILED,
             engine_used=result_info.get('engine_used', ''),
-            processing_time=task.duration.total_seconds() if task.duration else 0,
-            conversion_params=task.get_metadata('conversion_params', {}),
-            result_metadata=result_info.get('metadata', {}),
+            processing_time=duration.total_seconds() if duration else 0,
+            conversion_params=metadata.get('conversion_params') or None,
+            result_metadata=result_info.get('metadata') or None,
             error_message=task.error_message,
             **kwargs
         )
-        history.save()
+        history.settings_summary_cached = history._compute_settings_summary()[:255]
         return history
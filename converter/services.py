@@ -147,12 +147,20 @@ class VideoConversionService:
                     grayscale=grayscale, high_quality=high_quality, dither=dither
                 )
             
-            if success and os.path.exists(output_path):
+            # A single stat() instead of exists() + two getsize() calls
+            output_size = None
+            if success:
+                try:
+                    output_size = os.stat(output_path).st_size
+                except FileNotFoundError:
+                    pass
+            
+            if output_size is not None:
                 # Update task completion
                 task.set_metadata(
                     output_path=str(output_path),
                     output_format='gif',
-                    output_size=os.path.getsize(output_path)
+                    output_size=output_size
                 )
                 task.complete()
                 
@@ -162,7 +170,7 @@ class VideoConversionService:
                     'success': True,
                     'output_path': str(output_path),
                     'output_filename': output_filename,
-                    'file_size': os.path.getsize(output_path)
+                    'file_size': output_size
                 }
             else:
                 task.fail('Ошибка при создании GIF файла')
@@ -303,7 +311,9 @@ class VideoConversionService:
         Two-pass conversion with palette generation for high quality.
         """
         try:
-            palette_path = tempfile.NamedTemporaryFile(delete=False, suffix='.png').name
+            # Only a path is needed: ffmpeg overwrites the palette file
+            fd, palette_path = tempfile.mkstemp(suffix='.png')
+            os.close(fd)
             
             self._update_task_progress(task_id, 40, "Генерация цветовой палитры")
             
@@ -496,14 +506,13 @@ class VideoConversionService:
         """
         try:
             task = ConversionTask.objects.get(id=task_id)
-            task.update_progress(progress)
             
             if message:
-                metadata = task.task_metadata or {}
-                metadata['last_message'] = message
-                metadata['last_updated'] = timezone.now().isoformat()
-                task.task_metadata = metadata
-                task.save(update_fields=['task_metadata'])
+                # Progress and message are written with a single UPDATE
+                task.set_metadata(last_message=message, last_updated=timezone.now().isoformat())
+                task.update_progress(progress, extra_fields=['task_metadata'])
+            else:
+                task.update_progress(progress)
                 
             logger.info(f'Task {task_id}: {progress}% - {message}')
             
@@ -0,0 +1,78 @@
+"""
+События прогресса задач конвертации через Redis pub/sub.
+Воркер публикует изменения статуса, SSE endpoint пересылает их клиенту,
+поэтому клиенту не нужно опрашивать get_task_status.
+"""
+
+import logging
+from functools import lru_cache
+from django.conf import settings
+
+from .utils import dump_json
+
+# redis для pub/sub (опционально)
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Таймауты соединения с Redis (секунды): недоступный Redis не должен
+# задерживать воркеры и запросы до системного таймаута TCP
+REDIS_CONNECT_TIMEOUT = 2
+REDIS_SOCKET_TIMEOUT = 5
+
+
+def task_channel(task_id):
+    """Имя канала событий задачи"""
+    return f'task:{task_id}'
+
+
+@lru_cache(maxsize=1)
+def _get_client():
+    """Клиент Redis или None, если события не настроены"""
+    url = getattr(settings, 'TASK_EVENTS_REDIS_URL', '')
+    if not REDIS_AVAILABLE or not url:
+        return None
+    return redis.Redis.from_url(
+        url,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+    )
+
+
+def publish_task_event(task_id, **payload):
+    """
+    Публикация изменения задачи. Ошибки Redis не должны ломать конвертацию,
+    поэтому они только логируются.
+    """
+    client = _get_client()
+    if client is None:
+        return
+    try:
+        client.publish(task_channel(task_id), dump_json({'id': task_id, **payload}))
+    except redis.RedisError as e:
+        logger.warning(f"Не удалось опубликовать событие задачи {task_id}: {e}")
+
+
+def subscribe_task_events(task_id):
+    """
+    Подписка на события задачи.
+    
+    Returns:
+        PubSub или None, если события не настроены или Redis недоступен
+    """
+    client = _get_client()
+    if client is None:
+        return None
+    pubsub = client.pubsub()
+    try:
+        pubsub.subscribe(task_channel(task_id))
+    except redis.RedisError as e:
+        logger.warning(f"Не удалось подписаться на события задачи {task_id}: {e}")
+        pubsub.close()
+        return None
+    return pubsub
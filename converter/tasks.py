@@ -40,14 +40,13 @@ def update_task_progress(task_id: str, progress: int, message: str = ""):
     """
     try:
         task = ConversionTask.objects.get(id=task_id)
-        task.update_progress(progress)
         
         if message:
-            metadata = task.task_metadata or {}
-            metadata['last_message'] = message
-            metadata['last_updated'] = timezone.now().isoformat()
-            task.task_metadata = metadata
-            task.save(update_fields=['task_metadata'])
+            # Прогресс и сообщение записываются одним UPDATE
+            task.set_metadata(last_message=message, last_updated=timezone.now().isoformat())
+            task.update_progress(progress, extra_fields=['task_metadata'])
+        else:
+            task.update_progress(progress)
         
         logger.info(f'Задача {task_id}: прогресс {progress}% - {message}')
         
@@ -64,6 +63,14 @@ def update_task_progress(task_id: str, progress: int, message: str = ""):
         logger.error(f'Ошибка обновления прогресса задачи {task_id}: {e}')
 
 
+def _file_size(file_path) -> int:
+    """Размер файла одним stat-вызовом (0, если файла нет)"""
+    try:
+        return Path(file_path).stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
 def cleanup_files(*file_paths):
     """
     Очистка временных файлов
@@ -139,7 +146,7 @@ def convert_video(self, task_id: str, input_path: str, output_format: str,
             output_file=str(output_file),
             output_format=output_format,
             quality=quality,
-            file_size=output_file.stat().st_size if output_file.exists() else 0,
+            file_size=_file_size(output_file),
             conversion_time=result.get('duration', 0),
             engine_info=result.get('engine_info', {})
         )
@@ -275,7 +282,7 @@ def convert_audio(self, task_id: str, input_path: str, output_format: str,
             output_file=str(output_file),
             output_format=output_format,
             quality=quality,
-            file_size=output_file.stat().st_size if output_file.exists() else 0,
+            file_size=_file_size(output_file),
             conversion_time=result.get('duration', 0)
         )
         conversion_task.save()
@@ -355,7 +362,7 @@ def convert_image(self, task_id: str, input_path: str, output_format: str,
             output_file=str(output_file),
             output_format=output_format,
             quality=quality,
-            file_size=output_file.stat().st_size if output_file.exists() else 0,
+            file_size=_file_size(output_file),
             image_info=result.get('image_info', {})
         )
         conversion_task.save()
@@ -432,7 +439,7 @@ def convert_document(self, task_id: str, input_path: str, output_format: str,
         conversion_task.set_metadata(
             output_file=str(output_file),
             output_format=output_format,
-            file_size=output_file.stat().st_size if output_file.exists() else 0,
+            file_size=_file_size(output_file),
             document_info=result.get('document_info', {})
         )
         conversion_task.save()
@@ -509,7 +516,7 @@ def convert_archive(self, task_id: str, input_path: str, output_format: str,
         conversion_task.set_metadata(
             output_file=str(output_file),
             output_format=output_format,
-            file_size=output_file.stat().st_size if output_file.exists() else 0,
+            file_size=_file_size(output_file),
             archive_info=result.get('archive_info', {})
         )
         conversion_task.save()
@@ -538,7 +545,93 @@ def convert_archive(self, task_id: str, input_path: str, output_format: str,
             raise exc
 
 
-@shared_task(bind=True)
+# acks_late: при падении воркера задача вернется в очередь, а не потеряется
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
+def run_adapter_conversion(self, task_id: int):
+    """
+    Конвертация файла через слой адаптеров для view из adapters_views.
+    
+    Все параметры берутся из метаданных задачи: file_path, original_filename,
+    output_format, engine_type, engine_config и conversion_params.
+    Готовый GIF сохраняется в MEDIA_ROOT/gifs, остальные форматы - в TEMP_DIRS['output'].
+    
+    Args:
+        task_id: ID задачи конвертации
+    """
+    from django.core.files import File
+    from .adapters import engine_manager
+    from .utils import build_converted_gif_path
+    
+    task = None
+    file_path = None
+    output_path = None
+    
+    try:
+        task = ConversionTask.objects.get(id=task_id)
+        task.start()
+        
+        file_path = task.meta.get('file_path')
+        original_filename = task.meta.get('original_filename', Path(file_path).name)
+        output_format = task.meta.get('output_format', 'gif')
+        
+        if output_format == 'gif':
+            output_path, output_url = build_converted_gif_path(original_filename)
+        else:
+            create_temp_directories()
+            output_path = (
+                Path(settings.MEDIA_ROOT) / TEMP_DIRS['output'] /
+                f"{Path(original_filename).stem}_{int(time.time())}.{output_format}"
+            )
+            output_url = f"{settings.MEDIA_URL}{TEMP_DIRS['output']}/{output_path.name}"
+        
+        update_task_progress(task_id, 20, "Конвертация через адаптер")
+        
+        # Адаптеры читают загрузки через chunks(), поэтому путь оборачиваем в File
+        with open(file_path, 'rb') as f:
+            result = engine_manager.convert_file(
+                input_file=File(f, name=original_filename),
+                output_path=str(output_path),
+                engine_type=task.meta.get('engine_type'),
+                engine_config=task.meta.get('engine_config', {}),
+                **task.meta.get('conversion_params', {})
+            )
+        
+        if not result.success:
+            raise Exception(result.error_message or 'Ошибка конвертации')
+        
+        task.set_metadata(
+            output_path=str(output_path),
+            output_url=output_url,
+            output_size=output_path.stat().st_size,
+            result_metadata=result.metadata
+        )
+        task.save(update_fields=['task_metadata', 'updated_at'])
+        task.complete()
+        
+        logger.info(f"Задача {task_id} (адаптер) завершена успешно")
+        
+        return {'success': True, 'task_id': task_id, 'output_url': output_url}
+        
+    except ConversionTask.DoesNotExist:
+        logger.error(f"Задача {task_id} не найдена в базе данных")
+        return {'success': False, 'error': 'Задача не найдена'}
+        
+    except Exception as e:
+        error_message = str(e)
+        logger.error(f"Ошибка при конвертации через адаптер, задача {task_id}: {error_message}")
+        
+        cleanup_files(output_path)
+        if task:
+            task.fail(error_message)
+        
+        return {'success': False, 'error': error_message}
+        
+    finally:
+        # Загруженный исходник больше не нужен
+        cleanup_files(file_path)
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True)
 def process_conversion_task(self, task_id):
     """
     Универсальная задача для обработки конвертации файла.
@@ -555,11 +648,11 @@ def process_conversion_task(self, task_id):
         task.start_processing()
         
         # Получаем метаданные задачи
-        source_format = task.get_metadata('source_format')
-        target_format = task.get_metadata('target_format')
-        file_path = task.get_metadata('file_path')
-        original_filename = task.get_metadata('original_filename', 'unknown')
-        conversion_params = task.get_metadata('conversion_params', {})
+        source_format = task.meta.get('source_format')
+        target_format = task.meta.get('target_format')
+        file_path = task.meta.get('file_path')
+        original_filename = task.meta.get('original_filename', 'unknown')
+        conversion_params = task.meta.get('conversion_params', {})
         
         logger.info(f"Начинаем обработку задачи {task_id}: {source_format} -> {target_format}")
         update_task_progress(task_id, 10, f"Конвертация {source_format} -> {target_format}")
@@ -620,6 +713,49 @@ def process_conversion_task(self, task_id):
         cleanup_files(*temp_files)
 
 
+@shared_task(bind=True)
+def reap_task_temp_files(self, max_age_hours=1):
+    """
+    Удаление исходных файлов завершенных задач по путям из task_metadata.
+    Подстраховка для случаев, когда воркер упал до очистки в finally.
+    
+    Args:
+        max_age_hours: Сколько часов после завершения задачи файл еще хранится
+    """
+    from datetime import timedelta
+    cutoff_time = timezone.now() - timedelta(hours=max_age_hours)
+    
+    finished_tasks = ConversionTask.objects.filter(
+        status__in=[ConversionTask.STATUS_DONE, ConversionTask.STATUS_FAILED],
+        completed_at__lt=cutoff_time,
+        task_metadata__has_key='file_path'
+    ).only('id', 'task_metadata')
+    
+    reaped = []
+    deleted_files = 0
+    for task in finished_tasks.iterator():
+        file_path = task.task_metadata.pop('file_path')
+        if file_path:
+            path = Path(file_path)
+            if not path.is_absolute():
+                path = Path(settings.MEDIA_ROOT) / path
+            try:
+                path.unlink()
+                deleted_files += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f'Не удалось удалить файл {path}: {e}')
+                continue
+        reaped.append(task)
+    
+    # Путь больше не нужен: повторно эти задачи не проверяются
+    ConversionTask.objects.bulk_update(reaped, ['task_metadata'], batch_size=500)
+    
+    logger.info(f'Удалено {deleted_files} исходных файлов завершенных задач')
+    return {'status': 'completed', 'tasks': len(reaped), 'deleted_files': deleted_files}
+
+
 @shared_task(bind=True)
 def cleanup_old_files(self, max_age_hours=24):
     """
@@ -652,8 +788,8 @@ def cleanup_old_files(self, max_age_hours=24):
             status__in=[ConversionTask.STATUS_DONE, ConversionTask.STATUS_FAILED]
         )
         
-        deleted_count = old_tasks.count()
-        old_tasks.delete()
+        # DELETE сам возвращает число удаленных строк, отдельный COUNT не нужен
+        deleted_count, _ = old_tasks.delete()
         
         logger.info(f'Удалено {deleted_count} старых записей задач из базы данных')
         results.append({
@@ -260,6 +260,37 @@ class UtilityFunctionsTests(TestCase):
             cleanup_temp_files(nonexistent_files)
         except Exception as e:
             self.fail(f"cleanup_temp_files raised an exception: {e}")
+    
+    def test_write_uploaded_file(self):
+        """Тест копирования загруженных файлов из памяти и с диска"""
+        from django.core.files.uploadedfile import TemporaryUploadedFile
+        from .utils import write_uploaded_file
+        
+        payload = os.urandom(3 * 1024 * 1024 + 17)
+        on_disk = TemporaryUploadedFile('big.mp4', 'video/mp4', len(payload), None)
+        on_disk.write(payload)
+        in_memory = SimpleUploadedFile('small.mp4', payload[:1000])
+        
+        for uploaded, expected in ((on_disk, payload), (in_memory, payload[:1000])):
+            with tempfile.NamedTemporaryFile() as destination:
+                write_uploaded_file(uploaded, destination)
+                destination.flush()
+                with open(destination.name, 'rb') as f:
+                    self.assertEqual(f.read(), expected)
+        on_disk.close()
+    
+    def test_json_response_keeps_cyrillic_unescaped(self):
+        """Тест: JSON ответ в UTF-8 без \\u-экранирования, Decimal поддерживается"""
+        import json
+        from decimal import Decimal
+        from .utils import json_response
+        
+        response = json_response({'error': 'Файл не найден', 'size': Decimal('1.5')}, status=400)
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('Файл не найден'.encode('utf-8'), response.content)
+        self.assertEqual(json.loads(response.content)['size'], '1.5')
 
 
 class FormsTests(TestCase):
@@ -534,5 +565,1290 @@ class ViewsTests(TestCase):
             self.assertIn('ffmpeg_available', data)
 
 
+class VideoEngineTests(TestCase):
+    """Тесты для адаптера VideoEngine"""
+    
+    def setUp(self):
+        from .adapters import VideoEngine
+        self.engine = VideoEngine(use_moviepy=False)
+    
+    def test_convert_batch_empty(self):
+        """Тест пакетной конвертации пустого списка"""
+        self.assertEqual(self.engine.convert_batch([]), [])
+    
+    def test_convert_batch_reports_failures(self):
+        """Тест пакетной конвертации: ошибки возвращаются в порядке входных пар"""
+        with tempfile.NamedTemporaryFile(suffix='.txt') as text_file:
+            pairs = [
+                ('/tmp/nonexistent_batch_video.mp4', '/tmp/nonexistent_batch_1.gif'),
+                (text_file.name, '/tmp/nonexistent_batch_2.gif'),
+            ]
+            
+            results = self.engine.convert_batch(pairs, max_workers=2)
+        
+        self.assertEqual(len(results), 2)
+        self.assertFalse(any(result.success for result in results))
+        self.assertEqual(results[1].error_message, 'Неподдерживаемый формат входного файла')
+
+
+class ImageEngineTests(TestCase):
+    """Тесты для адаптера ImageEngine"""
+    
+    def setUp(self):
+        from .adapters import ImageEngine
+        self.engine = ImageEngine()
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_same_format_without_transforms_is_copied(self):
+        """Тест: тот же формат без преобразований копируется без перекодирования"""
+        input_path = os.path.join(self.temp_dir, 'input.png')
+        output_path = os.path.join(self.temp_dir, 'output.png')
+        with open(input_path, 'wb') as f:
+            f.write(b'not really a png')
+        
+        result = self.engine.convert(input_path, output_path)
+        
+        self.assertTrue(result.success)
+        self.assertFalse(result.metadata['reencoded'])
+        with open(output_path, 'rb') as f:
+            self.assertEqual(f.read(), b'not really a png')
+
+
+class ConversionTaskAdminTests(TestCase):
+    """Тесты для админки задач конвертации"""
+    
+    def setUp(self):
+        from django.contrib import admin
+        from .admin import ConversionTaskAdmin
+        from .models import ConversionTask
+        
+        self.model = ConversionTask
+        self.model_admin = ConversionTaskAdmin(ConversionTask, admin.site)
+        self.request = Mock()
+        self.request.resolver_match.url_name = 'converter_conversiontask_changelist'
+    
+    def test_metadata_columns_from_annotations(self):
+        """Тест: колонки файла и форматов берутся из аннотаций queryset"""
+        self.model.objects.create(task_metadata={
+            'original_filename': 'clip.mp4',
+            'input_format': 'mp4',
+            'output_format': 'gif',
+        })
+        self.model.objects.create()
+        
+        rows = list(self.model_admin.get_queryset(self.request).order_by('id'))
+        
+        self.assertEqual(self.model_admin.get_filename(rows[0]), 'clip.mp4')
+        self.assertEqual(self.model_admin.get_format_conversion(rows[0]), 'MP4 → GIF')
+        self.assertEqual(self.model_admin.get_filename(rows[1]), 'Не указано')
+        self.assertEqual(self.model_admin.get_format_conversion(rows[1]), '? → ?')
+        self.assertIn('task_metadata', rows[0].get_deferred_fields())
+    
+    def test_change_view_queryset_loads_metadata(self):
+        """Тест: вне списка задач task_metadata загружается как обычно"""
+        self.model.objects.create(task_metadata={'original_filename': 'clip.mp4'})
+        self.request.resolver_match.url_name = 'converter_conversiontask_change'
+        
+        task = self.model_admin.get_queryset(self.request).get()
+        
+        self.assertEqual(task.get_deferred_fields(), set())
+    
+    def test_status_and_progress_html(self):
+        """Тест HTML колонок статуса и прогресса"""
+        from django.utils.safestring import SafeString
+        
+        task = self.model(status=self.model.STATUS_DONE, progress=100)
+        
+        status_html = self.model_admin.status_colored(task)
+        self.assertIsInstance(status_html, SafeString)
+        self.assertEqual(status_html, '<span style="color: #28a745; font-weight: bold;">Завершено</span>')
+        
+        progress_html = self.model_admin.progress_bar(task)
+        self.assertIsInstance(progress_html, SafeString)
+        self.assertIn('width: 100%; height: 100%; background-color: #28a745;', progress_html)
+    
+    def test_restart_failed_tasks(self):
+        """Тест перезапуска неудачных задач"""
+        failed = self.model.objects.create(status=self.model.STATUS_FAILED, progress=40, error_message='boom')
+        done = self.model.objects.create(status=self.model.STATUS_DONE, progress=100)
+        
+        with patch.object(self.model_admin, 'message_user') as mock_message:
+            self.model_admin.restart_failed_tasks(self.request, self.model.objects.all())
+        
+        failed.refresh_from_db()
+        done.refresh_from_db()
+        self.assertEqual(failed.status, self.model.STATUS_QUEUED)
+        self.assertEqual(failed.progress, 0)
+        self.assertEqual(failed.error_message, '')
+        self.assertEqual(done.status, self.model.STATUS_DONE)
+        mock_message.assert_called_once_with(self.request, 'Перезапущено 1 задач(и).')
+    
+    def test_keyset_paginator_matches_offset_pages(self):
+        """Тест: KeysetPaginator возвращает те же страницы, что и обычная пагинация"""
+        from django.core.paginator import Paginator
+        from .admin import KeysetPaginator
+        
+        for _ in range(7):
+            self.model.objects.create()
+        queryset = self.model.objects.order_by('-id')
+        
+        keyset = KeysetPaginator(queryset, 3)
+        offset = Paginator(queryset, 3)
+        for number in offset.page_range:
+            self.assertEqual(
+                [task.id for task in keyset.page(number)],
+                [task.id for task in offset.page(number)]
+            )
+        
+        # При другой сортировке используется обычная пагинация
+        by_status = KeysetPaginator(self.model.objects.order_by('status', 'id'), 3)
+        self.assertEqual(len(by_status.page(3)), 1)
+
+
+class AdapterViewsTests(TestCase):
+    """Тесты для view-функций слоя адаптеров"""
+    
+    def setUp(self):
+        from django.test import RequestFactory
+        self.factory = RequestFactory()
+        self.media_root = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def test_convert_with_adapters_returns_task_id(self):
+        """Тест: view ставит конвертацию в очередь и возвращает ID задачи"""
+        import json
+        from .adapters_views import convert_with_adapters_view
+        from .models import ConversionTask
+        from .tasks import run_adapter_conversion
+        
+        upload = SimpleUploadedFile('picture.png', b'png bytes', content_type='image/png')
+        request = self.factory.post('/convert/', {'file': upload, 'output_format': 'png'})
+        
+        # Выполняем задачу Celery синхронно, без брокера
+        with override_settings(MEDIA_ROOT=self.media_root), \
+             patch.object(run_adapter_conversion, 'delay',
+                          side_effect=lambda task_id: run_adapter_conversion.apply(args=[task_id])) as delay, \
+             self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = convert_with_adapters_view(request)
+            # Задача ставится в очередь только после commit
+            delay.assert_not_called()
+        
+        self.assertEqual(len(callbacks), 1)
+        
+        data = json.loads(response.content)
+        self.assertTrue(data['success'])
+        
+        task = ConversionTask.objects.get(id=data['task_id'])
+        self.assertEqual(task.status, ConversionTask.STATUS_DONE)
+        self.assertEqual(task.get_metadata('original_filename'), 'picture.png')
+        self.assertTrue(os.path.exists(task.get_metadata('output_path')))
+        self.assertFalse(os.path.exists(task.get_metadata('file_path')))
+    
+    def test_video_engine_is_reused_per_mode(self):
+        """Тест: VideoEngine создается один раз для каждого режима"""
+        from .adapters_views import _get_video_engine
+        
+        self.assertIs(_get_video_engine(False), _get_video_engine(False))
+        self.assertIsNot(_get_video_engine(False), _get_video_engine(True))
+        self.assertTrue(_get_video_engine(True).use_moviepy)
+    
+    def test_conversion_params_from_post(self):
+        """Тест: флажки приводятся к bool, числа к int, пустые параметры пропускаются"""
+        from django.http import QueryDict
+        from .adapters_views import ConversionParams
+        
+        post = QueryDict('fps=10&width=&end_time=None&grayscale=on&reverse=false&speed=2')
+        params = ConversionParams.from_post(post)
+        
+        self.assertEqual(params.as_kwargs(), {
+            'fps': 10,
+            'start_time': 0,
+            'speed': 2.0,
+            'dither': 'bayer',
+            'keep_original_size': False,
+            'grayscale': True,
+            'reverse': False,
+            'boomerang': False,
+            'high_quality': False,
+        })
+        self.assertEqual(params.as_kwargs(('fps', 'width')), {'fps': 10})
+    
+    def test_invalid_params_rejected_before_upload(self):
+        """Тест: некорректные параметры возвращают 400 без создания задачи"""
+        import json
+        from .adapters_views import convert_with_adapters_view
+        from .models import ConversionTask
+        
+        for bad_params in ({'fps': 'abc'}, {'speed': 'fast'}, {'start_time': '5', 'end_time': '3'}):
+            upload = SimpleUploadedFile('clip.mp4', b'video', content_type='video/mp4')
+            request = self.factory.post('/convert/', {'file': upload, **bad_params})
+            
+            with override_settings(MEDIA_ROOT=self.media_root):
+                response = convert_with_adapters_view(request)
+            
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(json.loads(response.content)['success'])
+        
+        self.assertFalse(ConversionTask.objects.exists())
+        self.assertEqual(os.listdir(self.media_root), [])
+
+    
+    def test_engine_status_view_not_modified(self):
+        """Тест: повторный опрос статуса с тем же ETag получает 304"""
+        from .adapters_views import engine_status_view, _engine_status_snapshot
+        
+        _engine_status_snapshot.cache_clear()
+        response = engine_status_view(self.factory.get('/engine-status/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        
+        response = engine_status_view(
+            self.factory.get('/engine-status/', HTTP_IF_NONE_MATCH=response['ETag'])
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+
+class ApiViewsExtendedTests(TestCase):
+    """Тесты для API управления результатами конвертации"""
+    
+    def setUp(self):
+        from django.test import RequestFactory
+        self.factory = RequestFactory()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+    
+    def tearDown(self):
+        import shutil
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+    
+    def _create_done_task(self, name, content):
+        """Создает завершенную задачу с файлом результата в storage"""
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from .models import ConversionTask
+        
+        output_path = default_storage.save(f'outputs/{name}', ContentFile(content))
+        return ConversionTask.objects.create(
+            status=ConversionTask.STATUS_DONE,
+            task_metadata={'output_path': output_path, 'converted_filename': name}
+        )
+    
+    def test_download_batch_results_archives_outputs(self):
+        """Тест: в архив попадают файлы всех завершенных задач"""
+        import json
+        import zipfile
+        from .api_views_extended import download_batch_results
+        
+        first = self._create_done_task('first.gif', b'GIF89a' + b'x' * 5000)
+        second = self._create_done_task('second.txt', b'hello')
+        
+        request = self.factory.post(
+            '/api/conversion/download-batch/',
+            data=json.dumps({'result_ids': [first.id, second.id]}),
+            content_type='application/json'
+        )
+        response = download_batch_results(request)
+        
+        data = json.loads(response.content)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['files_count'], 2)
+        
+        archive_path = os.path.join(self.media_root, 'downloads', data['archive_name'])
+        with zipfile.ZipFile(archive_path) as archive:
+            self.assertEqual(archive.read('first.gif'), b'GIF89a' + b'x' * 5000)
+            self.assertEqual(archive.read('second.txt'), b'hello')
+            # Медиафайлы не пережимаются, текстовые - сжимаются
+            self.assertEqual(archive.getinfo('first.gif').compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(archive.getinfo('second.txt').compress_type, zipfile.ZIP_DEFLATED)
+    
+    def test_download_batch_results_remote_storage(self):
+        """Тест: для удаленного storage файлы скачиваются в пуле потоков"""
+        import json
+        import zipfile
+        from .api_views_extended import download_batch_results
+        
+        tasks = [self._create_done_task(f'part{i}.gif', bytes([i]) * 100) for i in range(5)]
+        os.makedirs(os.path.join(self.media_root, 'downloads'))
+        
+        request = self.factory.post(
+            '/api/conversion/download-batch/',
+            data=json.dumps({'result_ids': [task.id for task in tasks]}),
+            content_type='application/json'
+        )
+        # Storage без локального пути ведет себя как S3
+        with patch('converter.api_views_extended._local_storage_dir', return_value=None):
+            data = json.loads(download_batch_results(request).content)
+        
+        archive_path = os.path.join(self.media_root, 'downloads', data['archive_name'])
+        with zipfile.ZipFile(archive_path) as archive:
+            for i in range(5):
+                self.assertEqual(archive.read(f'part{i}.gif'), bytes([i]) * 100)
+    
+    def test_download_batch_results_remote_storage_bounded(self):
+        """Тест: скачанных, но не записанных в архив файлов не больше числа потоков"""
+        import json
+        import threading
+        from . import api_views_extended
+        from .api_views_extended import download_batch_results
+        
+        tasks = [self._create_done_task(f'part{i}.gif', bytes([i]) * 100) for i in range(6)]
+        os.makedirs(os.path.join(self.media_root, 'downloads'))
+        
+        fetched = []
+        max_open = []
+        lock = threading.Lock()
+        real_fetch = api_views_extended._fetch_output
+        
+        def fetch(path):
+            local_copy = real_fetch(path)
+            with lock:
+                fetched.append(local_copy)
+                max_open.append(sum(not f.closed for f in fetched))
+            return local_copy
+        
+        request = self.factory.post(
+            '/api/conversion/download-batch/',
+            data=json.dumps({'result_ids': [task.id for task in tasks]}),
+            content_type='application/json'
+        )
+        with patch('converter.api_views_extended._local_storage_dir', return_value=None), \
+             patch('converter.api_views_extended._fetch_output', side_effect=fetch), \
+             patch('converter.api_views_extended.BATCH_STORAGE_WORKERS', 2):
+            data = json.loads(download_batch_results(request).content)
+        
+        self.assertTrue(data['success'])
+        self.assertEqual(len(fetched), 6)
+        self.assertLessEqual(max(max_open), 2)
+        self.assertTrue(all(f.closed for f in fetched))
+    
+    def test_clear_completed_tasks_deletes_in_bulk(self):
+        """Тест: старые задачи и их файлы удаляются пакетно"""
+        import json
+        from datetime import timedelta
+        from django.core.files.storage import default_storage
+        from django.utils import timezone
+        from .api_views_extended import clear_completed_tasks
+        from .models import ConversionTask
+        
+        old_tasks = [self._create_done_task(f'old{i}.gif', b'GIF89a') for i in range(3)]
+        recent = self._create_done_task('recent.gif', b'GIF89a')
+        ConversionTask.objects.filter(id__in=[task.id for task in old_tasks]).update(
+            completed_at=timezone.now() - timedelta(days=2)
+        )
+        ConversionTask.objects.filter(id=recent.id).update(completed_at=timezone.now())
+        
+        with self.assertNumQueries(2):
+            response = clear_completed_tasks(self.factory.post('/clear/'))
+        
+        self.assertEqual(json.loads(response.content)['deleted_count'], 3)
+        self.assertEqual(list(ConversionTask.objects.values_list('id', flat=True)), [recent.id])
+        for task in old_tasks:
+            self.assertFalse(default_storage.exists(task.get_metadata('output_path')))
+        self.assertTrue(default_storage.exists(recent.get_metadata('output_path')))
+    
+    def test_delete_conversion_result(self):
+        """Тест: удаляются задача и ее файлы, для неизвестного id - 404"""
+        from django.core.files.storage import default_storage
+        from .api_views_extended import delete_conversion_result
+        from .models import ConversionTask
+        
+        task = self._create_done_task('result.gif', b'GIF89a')
+        output_path = task.meta['output_path']
+        
+        response = delete_conversion_result(self.factory.delete('/delete/'), task.id)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(ConversionTask.objects.filter(id=task.id).exists())
+        self.assertFalse(default_storage.exists(output_path))
+        
+        response = delete_conversion_result(self.factory.delete('/delete/'), task.id)
+        self.assertEqual(response.status_code, 404)
+    
+    def test_stream_task_status_sse(self):
+        """Тест: SSE поток отдает текущее состояние и события до завершения задачи"""
+        import json
+        from .api_views_extended import stream_task_status
+        from .models import ConversionTask
+        
+        task = ConversionTask.objects.create(status=ConversionTask.STATUS_RUNNING, progress=10)
+        
+        pubsub = Mock()
+        pubsub.get_message.side_effect = [
+            None,
+            {'data': json.dumps({'id': task.id, 'status': 'running', 'progress': 60}).encode()},
+            {'data': json.dumps({'id': task.id, 'status': 'done', 'progress': 100}).encode()},
+        ]
+        with patch('converter.api_views_extended.subscribe_task_events', return_value=pubsub):
+            response = stream_task_status(self.factory.get('/stream/'), task_id=task.id)
+            body = b''.join(response.streaming_content).decode()
+        
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = [json.loads(line[len('data: '):]) for line in body.split('\n') if line.startswith('data: ')]
+        self.assertEqual([event['progress'] for event in events], [10, 60, 100])
+        self.assertIn(': keepalive', body)
+        self.assertTrue(body.startswith('retry: '))
+        pubsub.close.assert_called_once()
+        
+        # Без Redis клиент получает 503 и остается на polling
+        with patch('converter.api_views_extended.subscribe_task_events', return_value=None):
+            response = stream_task_status(self.factory.get('/stream/'), task_id=task.id)
+        self.assertEqual(response.status_code, 503)
+    
+    def test_stream_task_status_limits_open_streams(self):
+        """Тест: число одновременных SSE потоков ограничено, слот освобождается при закрытии"""
+        from .api_views_extended import stream_task_status, SSE_MAX_STREAMS
+        from .models import ConversionTask
+        
+        task = ConversionTask.objects.create(status=ConversionTask.STATUS_RUNNING)
+        with patch('converter.api_views_extended.subscribe_task_events', side_effect=lambda task_id: Mock()):
+            responses = [
+                stream_task_status(self.factory.get('/stream/'), task_id=task.id)
+                for _ in range(SSE_MAX_STREAMS)
+            ]
+            self.assertTrue(all(response.status_code == 200 for response in responses))
+            self.assertEqual(stream_task_status(self.factory.get('/stream/'), task_id=task.id).status_code, 503)
+            
+            # Неизвестная задача не занимает слот
+            responses[0].close()
+            self.assertEqual(stream_task_status(self.factory.get('/stream/'), task_id=0).status_code, 404)
+            
+            response = stream_task_status(self.factory.get('/stream/'), task_id=task.id)
+            self.assertEqual(response.status_code, 200)
+            for response in responses[1:] + [response]:
+                response.close()
+    
+    def test_task_state_changes_are_published(self):
+        """Тест: модель публикует изменения статуса в канал задачи"""
+        import json
+        from .models import ConversionTask
+        
+        client = Mock()
+        with patch('converter.task_events._get_client', return_value=client):
+            task = ConversionTask.objects.create()
+            task.update_progress(40)
+            task.complete()
+        
+        channels = [call.args[0] for call in client.publish.call_args_list]
+        payloads = [json.loads(call.args[1]) for call in client.publish.call_args_list]
+        self.assertEqual(channels, [f'task:{task.id}'] * 2)
+        self.assertEqual(payloads[-1], {'id': task.id, 'status': 'done', 'progress': 100})
+    
+    def test_zip_entry_compression_by_target_format(self):
+        """Тест: метод сжатия выбирается по формату результата"""
+        import zipfile
+        from .api_views_extended import _zip_entry
+        
+        self.assertEqual(_zip_entry('clip', 'MP4').compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(_zip_entry('photo.webp').compress_type, zipfile.ZIP_STORED)
+        entry = _zip_entry('subtitles.srt', 'srt')
+        self.assertEqual(entry.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(getattr(entry, 'compress_level', None) or entry._compresslevel, 1)
+    
+    def test_download_batch_results_deduplicates_names(self):
+        """Тест: одинаковые имена файлов в архиве получают номер"""
+        import json
+        import zipfile
+        from .api_views_extended import download_batch_results
+        
+        tasks = [self._create_done_task('same.gif', bytes([i])) for i in range(3)]
+        request = self.factory.post(
+            '/api/conversion/download-batch/',
+            data=json.dumps({'result_ids': [task.id for task in tasks]}),
+            content_type='application/json'
+        )
+        data = json.loads(download_batch_results(request).content)
+        
+        archive_path = os.path.join(self.media_root, 'downloads', data['archive_name'])
+        with zipfile.ZipFile(archive_path) as archive:
+            self.assertEqual(sorted(archive.namelist()), ['same.gif', 'same_1.gif', 'same_2.gif'])
+        
+        # Имя, совпадающее с уже выданным номером, тоже получает свой номер
+        tasks = [self._create_done_task(name, b'x') for name in ('a.gif', 'a.gif', 'a_1.gif')]
+        request = self.factory.post(
+            '/api/conversion/download-batch/',
+            data=json.dumps({'result_ids': [task.id for task in tasks]}),
+            content_type='application/json'
+        )
+        data = json.loads(download_batch_results(request).content)
+        
+        archive_path = os.path.join(self.media_root, 'downloads', data['archive_name'])
+        with zipfile.ZipFile(archive_path) as archive:
+            names = archive.namelist()
+        self.assertEqual(len(names), 3)
+        self.assertEqual(len(set(names)), 3)
+    
+    def test_submit_conversion_task_with_upload_token(self):
+        """Тест: файл, загруженный напрямую в storage, передается подписанным токеном"""
+        import json
+        from django.core import signing
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from .api_views_extended import submit_conversion_task, create_upload_url, UPLOAD_TOKEN_SALT
+        from django.contrib.auth.models import AnonymousUser
+        from .models import ConversionTask
+        from .tasks import process_conversion_task
+        
+        def submit(token):
+            request = self.factory.post('/api/conversion/submit/', data={
+                'upload_token': token,
+                'source_format': 'video',
+                'target_format': 'gif',
+            })
+            request.user = AnonymousUser()
+            return submit_conversion_task(request)
+        
+        # Локальный storage не умеет presigned POST
+        request = self.factory.post('/api/conversion/uploads/presign/', data={'filename': 'clip.mp4'})
+        self.assertEqual(create_upload_url(request).status_code, 501)
+        
+        presigned = {'url': 'https://bucket.example/', 'fields': {}}
+        with patch('converter.api_views_extended._presigned_post', return_value=presigned):
+            request = self.factory.post('/api/conversion/uploads/presign/', data={'filename': 'clip.mp4'})
+            upload = json.loads(create_upload_url(request).content)
+        
+        file_key = default_storage.save(upload['file_key'], ContentFile(b'x' * 2048))
+        self.assertEqual(file_key, upload['file_key'])
+        
+        # Без S3 storage токены не принимаются
+        self.assertEqual(submit(upload['upload_token']).status_code, 400)
+        
+        with patch('converter.api_views_extended._direct_upload_bucket', return_value=Mock()):
+            with patch.object(process_conversion_task, 'apply_async') as apply_async, \
+                 self.captureOnCommitCallbacks(execute=True):
+                response = submit(upload['upload_token'])
+            
+            data = json.loads(response.content)
+            self.assertTrue(data['success'])
+            task = ConversionTask.objects.get(id=data['task_id'])
+            # ID Celery задачи сохранен вместе с задачей, до постановки в очередь
+            apply_async.assert_called_once_with(args=[task.id], task_id=task.meta['celery_task_id'])
+            self.assertEqual(task.meta['file_path'], file_key)
+            self.assertEqual(task.meta['original_filename'], 'clip.mp4')
+            self.assertEqual(task.meta['file_size'], 2048)
+            
+            # Повторное использование того же файла не принимается
+            self.assertEqual(submit(upload['upload_token']).status_code, 400)
+            
+            # Поддельный токен и подписанный ключ не того вида
+            self.assertEqual(submit(file_key).status_code, 400)
+            forged = signing.dumps('uploads/clip.mp4', salt=UPLOAD_TOKEN_SALT)
+            self.assertEqual(submit(forged).status_code, 400)
+    
+    def test_download_batch_results_rejects_large_body(self):
+        """Тест: слишком большое тело запроса отклоняется с 413"""
+        import json
+        from .api_views_extended import download_batch_results, MAX_JSON_BODY_SIZE
+        
+        request = self.factory.post(
+            '/api/conversion/download-batch/',
+            data=json.dumps({'result_ids': list(range(MAX_JSON_BODY_SIZE))}),
+            content_type='application/json'
+        )
+        response = download_batch_results(request)
+        self.assertEqual(response.status_code, 413)
+        
+        request = self.factory.post(
+            '/api/conversion/download-batch/',
+            data='{not json',
+            content_type='application/json'
+        )
+        self.assertEqual(download_batch_results(request).status_code, 400)
+    
+    def test_get_task_status_not_modified(self):
+        """Тест: повторный polling без изменений задачи возвращает 304"""
+        from .api_views_extended import get_task_status
+        
+        task = self._create_done_task('status.gif', b'GIF89a')
+        
+        response = get_task_status(self.factory.get('/status/'), task_id=task.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.has_header('ETag'))
+        
+        request = self.factory.get('/status/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(get_task_status(request, task_id=task.id).status_code, 304)
+        
+        task.update_progress(50)
+        request = self.factory.get('/status/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(get_task_status(request, task_id=task.id).status_code, 200)
+        
+        # QuerySet.update() не меняет updated_at, но статус входит в ETag
+        from .models import ConversionTask
+        response = get_task_status(self.factory.get('/status/'), task_id=task.id)
+        ConversionTask.objects.filter(id=task.id).update(status=ConversionTask.STATUS_FAILED)
+        request = self.factory.get('/status/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(get_task_status(request, task_id=task.id).status_code, 200)
+    
+    def test_get_task_status_reads_only_needed_metadata(self):
+        """Тест: polling не отдает метаданные целиком без ?include=metadata"""
+        import json
+        from .api_views_extended import get_task_status
+        
+        task = self._create_done_task('result.gif', b'GIF89a')
+        task.set_metadata(output_size=6, original_filename='clip.mp4', log=['x' * 1000])
+        task.save()
+        
+        data = json.loads(get_task_status(self.factory.get('/status/'), task_id=task.id).content)
+        self.assertEqual(data['task']['original_filename'], 'clip.mp4')
+        self.assertEqual(data['task']['converted_filename'], 'result.gif')
+        self.assertEqual(data['task']['output_size'], 6)
+        self.assertNotIn('metadata', data['task'])
+        
+        request = self.factory.get('/status/', {'include': 'metadata'})
+        data = json.loads(get_task_status(request, task_id=task.id).content)
+        self.assertEqual(data['task']['metadata']['log'], ['x' * 1000])
+        self.assertEqual(data['task']['output_size'], 6)
+    
+    def test_get_task_queue_projects_metadata(self):
+        """Тест: очередь собирается одним запросом с полями из метаданных"""
+        import json
+        from .api_views_extended import get_task_queue
+        from .models import ConversionTask
+        
+        ConversionTask.objects.create(
+            status=ConversionTask.STATUS_QUEUED,
+            task_metadata={'original_filename': 'clip.mp4', 'source_format': 'video',
+                           'target_format': 'gif', 'file_size': 2048}
+        )
+        ConversionTask.objects.create(status=ConversionTask.STATUS_FAILED)
+        
+        with self.assertNumQueries(1):
+            response = get_task_queue(self.factory.get('/queue/'))
+        data = json.loads(response.content)
+        
+        self.assertTrue(data['success'])
+        queued = next(task for task in data['tasks'] if task['status'] == 'queued')
+        self.assertEqual(queued['filename'], 'clip.mp4')
+        self.assertEqual(queued['file_size'], 2048)
+        self.assertEqual(data['stats']['total'], 2)
+        self.assertEqual(data['stats']['queued'], 1)
+        self.assertEqual(data['stats']['failed'], 1)
+    
+    def test_get_conversion_stats_aggregates(self):
+        """Тест: статистика считается агрегатами без запроса на каждый день"""
+        import json
+        from django.core.cache import cache
+        from .api_views_extended import get_conversion_stats
+        from .models import ConversionTask
+        
+        cache.clear()
+        self._create_done_task('done.gif', b'GIF89a')
+        ConversionTask.objects.create(status=ConversionTask.STATUS_FAILED)
+        running = ConversionTask.objects.create(status=ConversionTask.STATUS_RUNNING)
+        
+        with self.assertNumQueries(3):
+            data = json.loads(get_conversion_stats(self.factory.get('/stats/')).content)
+        
+        self.assertEqual(data['stats'], {
+            'total_conversions': 3,
+            'successful_conversions': 1,
+            'failed_conversions': 1,
+            'currently_processing': 1,
+        })
+        self.assertEqual(len(data['daily_stats']), 7)
+        self.assertEqual(data['daily_stats'][0]['total'], 3)
+        self.assertEqual(data['daily_stats'][1]['total'], 0)
+        
+        # Повторный запрос отдается из кэша, завершение задачи сбрасывает кэш
+        with self.assertNumQueries(0):
+            get_conversion_stats(self.factory.get('/stats/'))
+        running.complete()
+        data = json.loads(get_conversion_stats(self.factory.get('/stats/')).content)
+        self.assertEqual(data['stats']['successful_conversions'], 2)
+        self.assertEqual(data['stats']['currently_processing'], 0)
+    
+    def test_get_conversion_results_serializes_metadata(self):
+        """Тест: список результатов собирается одним запросом за страницу"""
+        import json
+        from django.core.files.storage import default_storage
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .api_views_extended import get_conversion_results
+        
+        for index in range(4):
+            self._create_done_task(f'result_{index}.gif', b'GIF89a')
+        # Для результата, файла которого уже нет в storage, ссылка не отдается
+        default_storage.delete('outputs/result_3.gif')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = get_conversion_results(self.factory.get('/api/conversion/results/'))
+        
+        data = json.loads(response.content)
+        self.assertTrue(data['success'])
+        self.assertEqual(
+            sorted(result['converted_filename'] for result in data['results']),
+            ['result_0.gif', 'result_1.gif', 'result_2.gif', 'result_3.gif']
+        )
+        self.assertEqual(
+            sorted(result['converted_filename'] for result in data['results'] if 'output_url' in result),
+            ['result_0.gif', 'result_1.gif', 'result_2.gif']
+        )
+        # Количество запросов не зависит от числа строк
+        self.assertLessEqual(len(queries), 5)
+    
+    def test_get_conversion_results_cursor_pagination(self):
+        """Тест: по курсору выдаются те же задачи, что и по номерам страниц"""
+        import json
+        from urllib.parse import urlencode
+        from .api_views_extended import get_conversion_results
+        
+        for index in range(5):
+            self._create_done_task(f'result_{index}.gif', b'GIF89a')
+        
+        def fetch(**params):
+            request = self.factory.get('/api/conversion/results/?' + urlencode(params))
+            return json.loads(get_conversion_results(request).content)
+        
+        first = fetch(page_size=2)
+        self.assertEqual(first['stats']['total'], 5)
+        by_page = [r['id'] for page in (1, 2, 3) for r in fetch(page_size=2, page=page)['results']]
+        
+        by_cursor = [r['id'] for r in first['results']]
+        cursor = first['pagination']['next_cursor']
+        while cursor:
+            data = fetch(page_size=2, cursor=cursor)
+            self.assertNotIn('total_pages', data['pagination'])
+            self.assertIsNone(data['stats'])
+            by_cursor.extend(r['id'] for r in data['results'])
+            cursor = data['pagination']['next_cursor']
+        
+        self.assertEqual(by_cursor, by_page)
+        self.assertEqual(len(by_cursor), 5)
+        
+        response = get_conversion_results(self.factory.get('/api/conversion/results/?cursor=bad'))
+        self.assertEqual(response.status_code, 400)
+
+
+class DownloadHandlersTests(TestCase):
+    """Тесты для обработчиков скачивания файлов"""
+    
+    def test_get_content_type(self):
+        """Тест определения MIME типа по расширению"""
+        from .download_handlers import get_content_type
+        
+        self.assertEqual(get_content_type('result.gif'), 'image/gif')
+        self.assertEqual(get_content_type('/tmp/PHOTO.JPG'), 'image/jpeg')
+        # Расширения вне таблицы определяются через mimetypes
+        self.assertEqual(get_content_type('data.json'), 'application/json')
+        self.assertEqual(get_content_type('file.unknownext'), 'application/octet-stream')
+    
+    def test_serve_file_x_accel_redirect(self):
+        """Тест: при настроенном префиксе файл из MEDIA_ROOT отдается через nginx"""
+        import shutil
+        import time
+        from .download_handlers import CloudDownloadHandler
+        
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        os.makedirs(os.path.join(media_root, 'gifs'))
+        file_path = os.path.join(media_root, 'gifs', 'анимация.gif')
+        with open(file_path, 'wb') as f:
+            f.write(b'GIF89a')
+        
+        handler = CloudDownloadHandler()
+        with override_settings(MEDIA_ROOT=media_root, X_ACCEL_REDIRECT_PREFIX='/protected/'):
+            response = handler.serve_file(file_path)
+            self.assertEqual(
+                response['X-Accel-Redirect'],
+                '/protected/gifs/%D0%B0%D0%BD%D0%B8%D0%BC%D0%B0%D1%86%D0%B8%D1%8F.gif'
+            )
+            self.assertEqual(response.content, b'')
+            
+            # Файл, удаляемый после скачивания, тоже отдает nginx,
+            # а удаляется он после закрытия ответа с задержкой
+            with patch('converter.download_handlers.X_ACCEL_DELETE_DELAY', 0):
+                response = handler.serve_file(file_path, delete_after=True)
+                self.assertTrue(response.has_header('X-Accel-Redirect'))
+                self.assertTrue(os.path.exists(file_path))
+                response.close()
+            for _ in range(50):
+                if not os.path.exists(file_path):
+                    break
+                time.sleep(0.01)
+            self.assertFalse(os.path.exists(file_path))
+
+    
+    def test_serve_file_delete_after_close(self):
+        """Тест: без nginx файл отдается FileResponse и удаляется после закрытия ответа"""
+        import time
+        from django.http import FileResponse
+        from .download_handlers import CloudDownloadHandler
+        
+        with tempfile.NamedTemporaryFile(suffix='.gif', delete=False) as f:
+            f.write(b'GIF89a' * 1000)
+            file_path = f.name
+        self.addCleanup(lambda: os.path.exists(file_path) and os.unlink(file_path))
+        
+        response = CloudDownloadHandler(chunk_size=1024).serve_file(file_path, delete_after=True)
+        
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(response['Content-Length'], '6000')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="{os.path.basename(file_path)}"')
+        self.assertEqual(b''.join(response.streaming_content), b'GIF89a' * 1000)
+        self.assertTrue(os.path.exists(file_path))
+        response.close()
+        # Файл удаляет фоновый поток, а не поток запроса
+        for _ in range(50):
+            if not os.path.exists(file_path):
+                break
+            time.sleep(0.01)
+        self.assertFalse(os.path.exists(file_path))
+    
+    def test_serve_file_range_requests(self):
+        """Тест: заголовок Range дает ответ 206 с нужной частью файла"""
+        from django.test import RequestFactory
+        from .download_handlers import CloudDownloadHandler
+        
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
+            f.write(bytes(range(256)) * 4)
+            file_path = f.name
+        self.addCleanup(os.unlink, file_path)
+        
+        handler = CloudDownloadHandler(chunk_size=100)
+        factory = RequestFactory()
+        
+        def serve(range_header):
+            return handler.serve_file(file_path, request=factory.get('/', HTTP_RANGE=range_header))
+        
+        response = serve('bytes=10-209')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-209/1024')
+        self.assertEqual(response['Content-Length'], '200')
+        self.assertEqual(b''.join(response.streaming_content), (bytes(range(256)) * 4)[10:210])
+        
+        # Открытый конец и суффикс
+        self.assertEqual(serve('bytes=1000-')['Content-Range'], 'bytes 1000-1023/1024')
+        self.assertEqual(serve('bytes=-24')['Content-Range'], 'bytes 1000-1023/1024')
+        
+        # Невыполнимый диапазон и несколько диапазонов - 416
+        self.assertEqual(serve('bytes=2000-').status_code, 416)
+        self.assertEqual(serve('bytes=0-1,5-6').status_code, 416)
+        
+        # Некорректный заголовок игнорируется
+        response = serve('items=0-10')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+    
+    def test_serve_small_file_from_memory(self):
+        """Тест: маленький постоянный файл отдается целиком с ETag и кешированием"""
+        from django.test import RequestFactory
+        from .download_handlers import CloudDownloadHandler
+        
+        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as f:
+            f.write(b'PNG' * 100)
+            file_path = f.name
+        self.addCleanup(os.unlink, file_path)
+        
+        handler = CloudDownloadHandler()
+        response = handler.serve_file(file_path, request=RequestFactory().get('/'))
+        
+        self.assertFalse(response.streaming)
+        self.assertEqual(response.content, b'PNG' * 100)
+        self.assertIn('max-age', response['Cache-Control'])
+        
+        # Повторный запрос с тем же ETag - 304 без тела
+        request = RequestFactory().get('/', HTTP_IF_NONE_MATCH=response['ETag'])
+        response = handler.serve_file(file_path, request=request)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+    
+    def test_download_converted_file_rejects_traversal(self):
+        """Тест: имена с разделителями каталогов и выход из MEDIA_ROOT дают 404"""
+        import shutil
+        from django.http import Http404
+        from django.test import RequestFactory
+        from .download_handlers import download_converted_file
+        
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        os.makedirs(os.path.join(media_root, 'images'))
+        with open(os.path.join(media_root, 'images', 'photo.png'), 'wb') as f:
+            f.write(b'PNG')
+        
+        request = RequestFactory().get('/')
+        with override_settings(MEDIA_ROOT=media_root):
+            for filename in ('../secret.txt', '..', 'a\x00b.png', 'missing.png'):
+                with self.assertRaises(Http404):
+                    download_converted_file(request, 'images', filename)
+            
+            response = download_converted_file(request, 'images', 'photo.png')
+            self.assertEqual(response.status_code, 200)
+    
+    def test_serve_file_conditional_get(self):
+        """Тест: большой постоянный файл отдается с ETag, повтор - 304, If-Range проверяется"""
+        from django.test import RequestFactory
+        from .download_handlers import CloudDownloadHandler, SMALL_FILE_SIZE
+        
+        with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
+            f.write(b'v' * (SMALL_FILE_SIZE + 1))
+            file_path = f.name
+        self.addCleanup(lambda: os.path.exists(file_path) and os.unlink(file_path))
+        
+        handler = CloudDownloadHandler()
+        factory = RequestFactory()
+        
+        response = handler.serve_file(file_path, request=factory.get('/'))
+        response.close()
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        
+        response = handler.serve_file(file_path, request=factory.get('/', HTTP_IF_NONE_MATCH=etag))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        
+        # Range выполняется, только если If-Range совпадает с текущим ETag
+        response = handler.serve_file(file_path, request=factory.get('/', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag))
+        self.assertEqual(response.status_code, 206)
+        response = handler.serve_file(file_path, request=factory.get('/', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"'))
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        
+        # Временные файлы не получают ETag и отдаются целиком
+        response = handler.serve_file(file_path, request=factory.get('/', HTTP_IF_NONE_MATCH=etag), delete_after=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        response.close()
+
+class CleanupTasksTests(TestCase):
+    """Тесты для периодических задач очистки"""
+    
+    def test_reap_task_temp_files(self):
+        """Тест: исходники удаляются только у давно завершенных задач"""
+        import shutil
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import ConversionTask
+        from .tasks import reap_task_temp_files
+        
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        
+        def make_task(name, status, finished_ago):
+            path = os.path.join(temp_dir, name)
+            with open(path, 'wb') as f:
+                f.write(b'data')
+            completed_at = timezone.now() - finished_ago if finished_ago else None
+            task = ConversionTask.objects.create(
+                status=status, completed_at=completed_at, task_metadata={'file_path': path}
+            )
+            return task, path
+        
+        old_task, old_path = make_task('old.mp4', ConversionTask.STATUS_FAILED, timedelta(hours=2))
+        recent_task, recent_path = make_task('recent.mp4', ConversionTask.STATUS_DONE, timedelta(minutes=5))
+        running_task, running_path = make_task('running.mp4', ConversionTask.STATUS_RUNNING, None)
+        
+        result = reap_task_temp_files.apply(args=[1]).get()
+        
+        self.assertEqual(result['deleted_files'], 1)
+        self.assertFalse(os.path.exists(old_path))
+        self.assertTrue(os.path.exists(recent_path))
+        self.assertTrue(os.path.exists(running_path))
+        old_task.refresh_from_db()
+        self.assertNotIn('file_path', old_task.task_metadata)
+    
+    def test_cleanup_old_files_command(self):
+        """Тест: команда удаляет старые медиа файлы во вложенных каталогах"""
+        import io
+        import shutil
+        import time
+        from django.core.management import call_command
+        
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        
+        nested_dir = os.path.join(media_root, 'gifs', 'nested')
+        os.makedirs(nested_dir)
+        old_path = os.path.join(nested_dir, 'old.gif')
+        new_path = os.path.join(media_root, 'uploads', 'new.mp4')
+        os.makedirs(os.path.dirname(new_path))
+        for path in (old_path, new_path):
+            with open(path, 'wb') as f:
+                f.write(b'data')
+        old_time = time.time() - 3 * 24 * 3600
+        os.utime(old_path, (old_time, old_time))
+        
+        with override_settings(MEDIA_ROOT=media_root, BASE_DIR=media_root):
+            call_command('cleanup_old_files', days=1, media_only=True, stdout=io.StringIO())
+        
+        self.assertFalse(os.path.exists(old_path))
+        # Опустевший каталог тоже удаляется
+        self.assertFalse(os.path.exists(nested_dir))
+        self.assertTrue(os.path.exists(new_path))
+    
+    def test_cleanup_old_files_command_converted_dir(self):
+        """Тест: старые результаты в converted удаляются (файлы, не удаленные после отдачи)"""
+        import io
+        import shutil
+        import time
+        from django.core.management import call_command
+        
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        
+        converted_dir = os.path.join(media_root, 'converted')
+        os.makedirs(converted_dir)
+        old_path = os.path.join(converted_dir, 'served.gif')
+        with open(old_path, 'wb') as f:
+            f.write(b'data')
+        old_time = time.time() - 3 * 24 * 3600
+        os.utime(old_path, (old_time, old_time))
+        
+        with override_settings(MEDIA_ROOT=media_root, BASE_DIR=media_root):
+            call_command('cleanup_old_files', days=1, media_only=True, stdout=io.StringIO())
+        
+        self.assertFalse(os.path.exists(old_path))
+    
+    def test_cleanup_old_files_command_deletes_tasks(self):
+        """Тест: старые и неудачные задачи удаляются без отдельного COUNT"""
+        import io
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+        from .models import ConversionTask
+        
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(os.rmdir, media_root)
+        
+        old = ConversionTask.objects.create(status=ConversionTask.STATUS_DONE)
+        ConversionTask.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=10))
+        failed = ConversionTask.objects.create(status=ConversionTask.STATUS_FAILED)
+        recent = ConversionTask.objects.create(status=ConversionTask.STATUS_DONE)
+        
+        with override_settings(MEDIA_ROOT=media_root, BASE_DIR=media_root):
+            out = io.StringIO()
+            call_command('cleanup_old_files', days=7, all_failed=True, stdout=out)
+        
+        self.assertEqual(list(ConversionTask.objects.values_list('id', flat=True)), [recent.id])
+        # --all-failed удаляет неудачные задачи независимо от даты
+        self.assertFalse(ConversionTask.objects.filter(id=failed.id).exists())
+        self.assertIn('Удалено старых задач: 1', out.getvalue())
+        self.assertIn('Удалено неудачных задач: 1', out.getvalue())
+
+
+class ConversionTaskModelTests(TestCase):
+    """Тесты для модели ConversionTask"""
+    
+    def test_update_task_progress_single_write(self):
+        """Тест: прогресс и сообщение задачи записываются одним UPDATE"""
+        from .models import ConversionTask
+        from .tasks import update_task_progress
+        
+        task = ConversionTask.objects.create()
+        
+        # SELECT задачи и один UPDATE прогресса вместе с метаданными
+        with self.assertNumQueries(2):
+            update_task_progress(task.id, 40, 'Конвертация')
+        
+        task.refresh_from_db()
+        self.assertEqual(task.progress, 40)
+        self.assertEqual(task.get_metadata('last_message'), 'Конвертация')
+        
+        with self.assertNumQueries(2):
+            update_task_progress(task.id, 60)
+        task.refresh_from_db()
+        self.assertEqual(task.progress, 60)
+    
+    def test_complete_survives_cache_outage(self):
+        """Тест: недоступный кэш статистики не ломает завершение задачи"""
+        from .models import ConversionTask
+        
+        task = ConversionTask.objects.create()
+        with patch('converter.models.cache.delete', side_effect=ConnectionError('down')):
+            task.complete()
+            other = ConversionTask.objects.create()
+            other.fail('boom')
+        
+        task.refresh_from_db()
+        self.assertEqual(task.status, ConversionTask.STATUS_DONE)
+        other.refresh_from_db()
+        self.assertEqual(other.status, ConversionTask.STATUS_FAILED)
+    
+    def test_create_many_history_from_tasks(self):
+        """Тест: записи истории для нескольких задач создаются одним INSERT"""
+        from .models import ConversionTask, ConversionHistory
+        
+        tasks = [
+            ConversionTask.objects.create(
+                status=ConversionTask.STATUS_DONE,
+                task_metadata={'original_filename': f'clip{index}.mp4', 'file_size': 100}
+            )
+            for index in range(3)
+        ]
+        pairs = [(task, {'output_format': 'gif', 'output_size': 50}) for task in tasks]
+        
+        with self.assertNumQueries(1):
+            histories = ConversionHistory.create_many_from_tasks(pairs)
+        
+        self.assertEqual(len(histories), 3)
+        self.assertEqual(
+            sorted(ConversionHistory.objects.values_list('original_filename', flat=True)),
+            ['clip0.mp4', 'clip1.mp4', 'clip2.mp4']
+        )
+        self.assertTrue(all(h.status == ConversionHistory.STATUS_COMPLETED for h in histories))
+    
+    def test_duration_seconds_stored_on_finish(self):
+        """Тест: длительность сохраняется при завершении и используется свойством duration"""
+        from datetime import timedelta
+        from django.db.models import F
+        from .models import ConversionTask
+        
+        task = ConversionTask.objects.create()
+        task.start()
+        ConversionTask.objects.filter(pk=task.pk).update(
+            started_at=F('started_at') - timedelta(seconds=30)
+        )
+        task.refresh_from_db()
+        task.complete()
+        
+        task.refresh_from_db()
+        self.assertGreaterEqual(task.duration_seconds, 30)
+        self.assertEqual(task.duration, timedelta(seconds=task.duration_seconds))
+        
+        not_started = ConversionTask.objects.create()
+        not_started.fail('boom')
+        not_started.refresh_from_db()
+        self.assertIsNone(not_started.duration_seconds)
+        self.assertIsNone(not_started.duration)
+    
+    def test_restart_clears_previous_duration(self):
+        """Тест: перезапуск задачи сбрасывает длительность прошлой попытки"""
+        from django.contrib.admin.sites import AdminSite
+        from .admin import ConversionTaskAdmin
+        from .models import ConversionTask
+        
+        task = ConversionTask.objects.create()
+        task.start()
+        task.fail('boom')
+        self.assertIsNotNone(task.duration_seconds)
+        
+        admin = ConversionTaskAdmin(ConversionTask, AdminSite())
+        with patch.object(admin, 'message_user'):
+            admin.restart_failed_tasks(None, ConversionTask.objects.all())
+        task.refresh_from_db()
+        self.assertIsNone(task.duration_seconds)
+        
+        task.duration_seconds = 12.0
+        task.start()
+        task.refresh_from_db()
+        self.assertIsNone(task.duration_seconds)
+        self.assertIsNone(task.completed_at)
+    
+    def test_backfill_duration_migration(self):
+        """Тест: миграция заполняет длительность задач, завершенных до появления поля"""
+        from datetime import timedelta
+        from importlib import import_module
+        from django.apps import apps
+        from django.utils import timezone
+        from .models import ConversionTask
+        
+        now = timezone.now()
+        old = ConversionTask.objects.create(started_at=now - timedelta(seconds=90), completed_at=now)
+        queued = ConversionTask.objects.create()
+        
+        migration = import_module('converter.migrations.0012_backfill_duration_seconds')
+        migration.backfill_duration(apps, None)
+        
+        old.refresh_from_db()
+        queued.refresh_from_db()
+        self.assertEqual(old.duration_seconds, 90)
+        self.assertIsNone(queued.duration_seconds)
+    
+    def test_str_uses_status_labels(self):
+        """Тест: __str__ берет подпись статуса из словаря STATUS_LABELS"""
+        from .models import ConversionTask, ConversionHistory
+        
+        task = ConversionTask(id=7, status=ConversionTask.STATUS_DONE)
+        self.assertEqual(str(task), f'Задача #7 - {task.get_status_display()}')
+        
+        history = ConversionHistory(
+            original_filename='a.mp4', output_format='gif',
+            status=ConversionHistory.STATUS_FAILED
+        )
+        self.assertEqual(str(history), f'a.mp4 -> gif ({history.get_status_display()})')
+    
+    def test_settings_summary_stored_on_create(self):
+        """Тест: описание настроек вычисляется при создании записи истории"""
+        from .models import ConversionTask, ConversionHistory
+        
+        task = ConversionTask.objects.create(
+            status=ConversionTask.STATUS_DONE,
+            task_metadata={
+                'original_filename': 'clip.mp4',
+                'file_type': ConversionHistory.FILE_TYPE_VIDEO,
+                'conversion_params': {'width': 480, 'fps': 15},
+            }
+        )
+        history = ConversionHistory.create_from_task(task, {'output_format': 'gif'})
+        
+        history.refresh_from_db()
+        self.assertEqual(history.settings_summary_cached, 'Ширина: 480px, FPS: 15')
+        self.assertEqual(history.settings_summary, 'Ширина: 480px, FPS: 15')
+        
+        # Записи без сохраненного описания вычисляют его на лету
+        ConversionHistory.objects.filter(pk=history.pk).update(settings_summary_cached='')
+        history.refresh_from_db()
+        self.assertEqual(history.settings_summary, 'Ширина: 480px, FPS: 15')
+    
+    def test_history_for_list_defers_large_columns(self):
+        """Тест: for_list не читает крупные колонки, а описание настроек доступно без запроса"""
+        from .models import ConversionTask, ConversionHistory, ConversionHistoryQuerySet
+        
+        task = ConversionTask.objects.create(
+            status=ConversionTask.STATUS_DONE,
+            task_metadata={'original_filename': 'clip.mp4', 'conversion_params': {'fps': 10}}
+        )
+        ConversionHistory.create_from_task(task, {'output_format': 'gif'}, user_agent='agent')
+        
+        history = ConversionHistory.objects.filter(output_format='gif').for_list().get()
+        self.assertEqual(history.get_deferred_fields(), set(ConversionHistoryQuerySet.LIST_DEFERRED_FIELDS))
+        with self.assertNumQueries(0):
+            self.assertEqual(history.original_filename, 'clip.mp4')
+            self.assertEqual(history.settings_summary, history.settings_summary_cached)
+    
+    def test_update_progress_single_update(self):
+        """Тест: прогресс пишется одним UPDATE, повтор значения не пишется"""
+        from .models import ConversionTask
+        
+        task = ConversionTask.objects.create()
+        updated_at = task.updated_at
+        
+        with self.assertNumQueries(1):
+            task.update_progress(25)
+        with self.assertNumQueries(0):
+            task.update_progress(25)
+        
+        task.refresh_from_db()
+        self.assertEqual(task.progress, 25)
+        self.assertGreater(task.updated_at, updated_at)
+    
+    def test_empty_metadata_stored_as_null(self):
+        """Тест: пустые метаданные хранятся как NULL и читаются как пустой словарь"""
+        from .models import ConversionTask, ConversionHistory
+        
+        task = ConversionTask.objects.create()
+        self.assertTrue(ConversionTask.objects.filter(pk=task.pk, task_metadata__isnull=True).exists())
+        self.assertEqual(task.meta, {})
+        self.assertEqual(task.get_metadata('filename', 'x'), 'x')
+        
+        task.set_metadata(filename='a.mp4')
+        task.save()
+        task.refresh_from_db()
+        self.assertEqual(task.get_metadata('filename'), 'a.mp4')
+        
+        history = ConversionHistory.create_from_task(task, {'output_format': 'gif'})
+        history.refresh_from_db()
+        self.assertIsNone(history.conversion_params)
+        self.assertIsNone(history.result_metadata)
+        self.assertEqual(history.settings_summary, 'По умолчанию')
+
 if __name__ == '__main__':
     unittest.main()
@@ -29,6 +29,9 @@ urlpatterns = [
     path("api/conversion/download-batch/", api_views_extended.download_batch_results, name="api_conversion_download_batch"),
     path("api/conversion/clear-completed/", api_views_extended.clear_completed_tasks, name="api_conversion_clear_completed"),
     path("api/conversion/results/<int:result_id>/", api_views_extended.delete_conversion_result, name="api_conversion_delete_result"),
+    path("api/conversion/tasks/<int:task_id>/status/", api_views_extended.get_task_status, name="api_conversion_task_status"),
+    path("api/conversion/tasks/<int:task_id>/stream/", api_views_extended.stream_task_status, name="api_conversion_task_stream"),
+    path("api/conversion/uploads/presign/", api_views_extended.create_upload_url, name="api_conversion_upload_url"),
     
     path("conversion-interface/", views.conversion_interface_view, name="conversion_interface"),
     path("comprehensive/", views.comprehensive_converter_view, name="comprehensive_converter"),
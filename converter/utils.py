@@ -4,12 +4,25 @@
 """
 
 import os
+import json
+import shutil
 import subprocess
 import tempfile
 import logging
 import mimetypes
 from pathlib import Path
 from django.conf import settings
+from django.core.files import File
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+# orjson для быстрой сериализации JSON ответов
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
 
 # PIL imports for image processing
 try:
@@ -106,6 +119,94 @@ def format_file_size(size_bytes):
     return f'{s} {size_names[i]}'
 
 
+# Размер блока при копировании загруженных файлов
+UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def write_uploaded_file(uploaded_file, destination):
+    """
+    Записывает загруженный файл в открытый на запись файл destination.
+    
+    Файл, который Django уже сохранил на диск (TemporaryUploadedFile),
+    копируется в ядре через os.sendfile; остальные - shutil.copyfileobj
+    блоками по 1 МБ вместо цикла по chunks().
+    
+    Args:
+        uploaded_file: Загруженный файл (django File или объект с методом chunks())
+        destination: Файл, открытый в бинарном режиме на запись
+    """
+    if not isinstance(uploaded_file, File):
+        for chunk in uploaded_file.chunks():
+            destination.write(chunk)
+        return
+    
+    uploaded_file.seek(0)
+    
+    if hasattr(os, 'sendfile') and hasattr(uploaded_file, 'temporary_file_path'):
+        destination.flush()
+        try:
+            in_fd = uploaded_file.fileno()
+            out_fd = destination.fileno()
+            offset = 0
+            while True:
+                sent = os.sendfile(out_fd, in_fd, offset, UPLOAD_COPY_CHUNK_SIZE * 8)
+                if not sent:
+                    break
+                offset += sent
+            # Позицию файла sendfile не сдвигает
+            destination.seek(offset)
+            return
+        except OSError:
+            # Например, файловая система не поддерживает sendfile
+            uploaded_file.seek(0)
+            destination.seek(0)
+            destination.truncate()
+    
+    shutil.copyfileobj(uploaded_file, destination, UPLOAD_COPY_CHUNK_SIZE)
+
+
+def dump_json(data):
+    """
+    Сериализация данных в JSON (UTF-8, кириллица без экранирования).
+    Использует orjson, если он установлен.
+    
+    Returns:
+        bytes: JSON
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Типы, которые orjson не поддерживает (Decimal, lazy-строки и т.п.)
+            pass
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8')
+
+
+def load_json(raw):
+    """
+    Разбор JSON из тела запроса. Использует orjson, если он установлен.
+    
+    Raises:
+        json.JSONDecodeError: Некорректный JSON
+    """
+    if ORJSON_AVAILABLE:
+        # orjson.JSONDecodeError наследуется от json.JSONDecodeError
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def json_response(data, status=200):
+    """
+    Быстрая замена JsonResponse.
+    
+    Args:
+        data: Данные ответа или уже сериализованный JSON (bytes)
+        status: HTTP статус
+    """
+    body = data if isinstance(data, bytes) else dump_json(data)
+    return HttpResponse(body, status=status, content_type='application/json')
+
+
 def create_thumbnail(file_path, thumbnail_path, size=(300, 200)):
     """
     Создание миниатюры для предварительного просмотра.
@@ -218,8 +319,7 @@ class VideoConverter:
             
             # Сохраняем временный файл
             with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
-                for chunk in video_file.chunks():
-                    temp_file.write(chunk)
+                write_uploaded_file(video_file, temp_file)
                 temp_file.flush()  # Очищаем буфер
                 temp_video_path = temp_file.name
             
@@ -327,8 +427,7 @@ class VideoConverter:
             
             # Сохраняем временный файл
             with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
-                for chunk in video_file.chunks():
-                    temp_file.write(chunk)
+                write_uploaded_file(video_file, temp_file)
                 temp_video_path = temp_file.name
             
             try:
@@ -377,7 +476,9 @@ class VideoConverter:
                 
                 if high_quality:
                     # Двухпроходная палитра
-                    palette = tempfile.NamedTemporaryFile(delete=False, suffix='.png').name
+                    # Нужен только путь: ffmpeg сам перезапишет файл палитры
+                    fd, palette = tempfile.mkstemp(suffix='.png')
+                    os.close(fd)
                     try:
                         # Шаг 1: palettegen
                         pg_cmd = [ffmpeg_path, '-i', temp_video_path]
@@ -622,8 +723,7 @@ class VideoConverter:
             
             # Сохраняем временный файл
             with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
-                for chunk in video_file.chunks():
-                    temp_file.write(chunk)
+                write_uploaded_file(video_file, temp_file)
                 temp_video_path = temp_file.name
             
             try:
@@ -685,8 +785,7 @@ class VideoConverter:
             
             # Сохраняем временный файл
             with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
-                for chunk in video_file.chunks():
-                    temp_file.write(chunk)
+                write_uploaded_file(video_file, temp_file)
                 temp_video_path = temp_file.name
             
             try:
@@ -735,8 +834,7 @@ def save_uploaded_video(video_file):
         
         # Сохраняем файл
         with open(file_path, 'wb') as f:
-            for chunk in video_file.chunks():
-                f.write(chunk)
+            write_uploaded_file(video_file, f)
         
         return str(file_path)
         
@@ -745,6 +843,34 @@ def save_uploaded_video(video_file):
         return None
 
 
+def build_converted_gif_path(original_filename):
+    """
+    Генерирует путь для GIF в медиа папке и URL для его скачивания.
+    
+    Позволяет конвертеру писать результат сразу в итоговое место,
+    без промежуточного временного файла.
+    
+    Args:
+        original_filename: Оригинальное имя видео файла
+    
+    Returns:
+        tuple: (Path к итоговому GIF, URL для скачивания)
+    """
+    # Создаем папку для GIF если её нет
+    gif_dir = Path(settings.MEDIA_ROOT) / 'gifs'
+    gif_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Генерируем безопасное имя для GIF (без пробелов и спецсимволов)
+    import uuid
+    import re
+    base_name = original_filename.rsplit('.', 1)[0]
+    # Очищаем имя от нежелательных символов
+    safe_name = re.sub(r'[^a-zA-Z0-9_-]', '_', base_name)[:20]  # Ограничиваем длину
+    gif_filename = f"{safe_name}_{uuid.uuid4().hex[:8]}.gif"
+    
+    return gif_dir / gif_filename, f"{settings.MEDIA_URL}gifs/{gif_filename}"
+
+
 def save_converted_gif(gif_path, original_filename):
     """
     Сохраняет конвертированный GIF в медиа папку.
@@ -757,18 +883,7 @@ def save_converted_gif(gif_path, original_filename):
         str: URL для скачивания GIF
     """
     try:
-        # Создаем папку для GIF если её нет
-        gif_dir = Path(settings.MEDIA_ROOT) / 'gifs'
-        gif_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Генерируем безопасное имя для GIF (без пробелов и спецсимволов)
-        import uuid
-        import re
-        base_name = original_filename.rsplit('.', 1)[0]
-        # Очищаем имя от нежелательных символов
-        safe_name = re.sub(r'[^a-zA-Z0-9_-]', '_', base_name)[:20]  # Ограничиваем длину
-        gif_filename = f"{safe_name}_{uuid.uuid4().hex[:8]}.gif"
-        final_gif_path = gif_dir / gif_filename
+        final_gif_path, gif_url = build_converted_gif_path(original_filename)
         
         # Копируем файл
         import shutil
@@ -782,8 +897,6 @@ def save_converted_gif(gif_path, original_filename):
             logger.error(f"Временный GIF файл не найден: {gif_path}")
             return None
         
-        # Возвращаем URL
-        gif_url = f"{settings.MEDIA_URL}gifs/{gif_filename}"
         logger.info(f"Генерируем URL для GIF: {gif_url}")
         return gif_url
         
@@ -1116,8 +1229,7 @@ def save_uploaded_photos(photo_files):
                 
                 # Сохраняем файл
                 with open(file_path, 'wb') as f:
-                    for chunk in photo_file.chunks():
-                        f.write(chunk)
+                    write_uploaded_file(photo_file, f)
                 
                 saved_paths.append(str(file_path))
                 
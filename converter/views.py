@@ -16,7 +16,7 @@ from django.views import View
 import forms
 from .models import ConversionTask
 from .services import VideoConversionService
-from .utils import VideoConverter
+from .utils import VideoConverter, write_uploaded_file
 
 logger = logging.getLogger(__name__)
 
@@ -445,8 +445,7 @@ class VideoUploadView(View):
                 
                 # Save file
                 with open(tmp_file_path, 'wb+') as destination:
-                    for chunk in uploaded_file.chunks():
-                        destination.write(chunk)
+                    write_uploaded_file(uploaded_file, destination)
                 
                 logger.info(f"Video uploaded to temporary location: {tmp_file_path}")
                 
@@ -537,11 +536,12 @@ class VideoUploadView(View):
     
     def _serve_converted_file(self, file_path):
         """Serve the converted GIF file for download with Render cloud compatibility."""
-        if not os.path.exists(file_path):
+        try:
+            file_size = os.stat(file_path).st_size
+        except FileNotFoundError:
             raise Http404("Конвертированный файл не найден")
         
         filename = os.path.basename(file_path)
-        file_size = os.path.getsize(file_path)
         
         # For cloud platforms like Render, use streaming response to avoid memory issues
         def file_iterator():
@@ -681,18 +681,8 @@ def download_and_delete(request, category: str, filename: str):
             except Exception as e:
                 logger.warning(f"Failed to delete file after download: {path} -> {e}")
 
-    content_type = 'application/octet-stream'
-    # Set some common types
-    if file_path.suffix.lower() == '.gif':
-        content_type = 'image/gif'
-    elif file_path.suffix.lower() in {'.jpg', '.jpeg'}:
-        content_type = 'image/jpeg'
-    elif file_path.suffix.lower() == '.png':
-        content_type = 'image/png'
-    elif file_path.suffix.lower() == '.mp3':
-        content_type = 'audio/mpeg'
-    elif file_path.suffix.lower() == '.mp4':
-        content_type = 'video/mp4'
+    from .download_handlers import get_content_type
+    content_type = get_content_type(file_path)
 
     response = StreamingHttpResponse(file_iterator(file_path), content_type=content_type)
     response['Content-Disposition'] = f'attachment; filename="{file_path.name}"'
@@ -924,8 +914,7 @@ def handle_video_to_gif_conversion(request, video_file, params):
         
         # Save uploaded video file
         with open(video_path, 'wb+') as destination:
-            for chunk in video_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(video_file, destination)
         
         # Create output GIF file
         gif_filename = f"video_to_gif_{uuid.uuid4().hex[:8]}.gif"
@@ -999,8 +988,7 @@ def handle_video_to_mp3_conversion(request, video_file, params):
         
         # Save uploaded video file
         with open(video_path, 'wb+') as destination:
-            for chunk in video_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(video_file, destination)
         
         # Create output MP3 file
         mp3_filename = f"video_to_mp3_{uuid.uuid4().hex[:8]}.mp3"
@@ -1146,8 +1134,7 @@ def handle_video_to_video_conversion(request, video_file, target_format, params)
         
         # Save uploaded video file
         with open(video_path, 'wb+') as destination:
-            for chunk in video_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(video_file, destination)
         
         # Create output video file
         output_filename = f"converted_video_{uuid.uuid4().hex[:8]}.{target_format}"
@@ -1330,8 +1317,7 @@ def handle_audio_conversion(request, audio_file, target_format, params):
         
         # Save uploaded audio file
         with open(audio_path, 'wb+') as destination:
-            for chunk in audio_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(audio_file, destination)
         
         # Create output audio file
         output_filename = f"converted_audio_{uuid.uuid4().hex[:8]}.{target_format}"
@@ -1492,8 +1478,7 @@ def handle_image_conversion(request, image_file, target_format, params):
         
         # Save uploaded file
         with open(input_path, 'wb+') as destination:
-            for chunk in image_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(image_file, destination)
         
         # Create output file
         output_filename = f"converted_{uuid.uuid4().hex[:8]}.{target_format}"
@@ -1622,8 +1607,7 @@ def ajax_convert_video(request):
         
         # Сохраняем загруженный видео файл
         with open(video_path, 'wb+') as destination:
-            for chunk in video_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(video_file, destination)
         
         # Создаём выходной GIF файл
         gif_filename = f"video_to_gif_{uuid.uuid4().hex[:8]}.gif"
@@ -1722,8 +1706,7 @@ def convert_with_adapters(request):
         
         # Сохраняем загруженный файл
         with open(input_path, 'wb+') as destination:
-            for chunk in uploaded_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(uploaded_file, destination)
         
         # Создаём выходной файл
         output_filename = f"converted_{uuid.uuid4().hex[:8]}.{output_format}"
@@ -2017,8 +2000,7 @@ def handle_video_conversion_universal(request, video_file):
         
         # Сохраняем видео файл
         with open(video_path, 'wb+') as destination:
-            for chunk in video_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(video_file, destination)
         
         # Создаём выходной GIF файл
         gif_filename = f"video_to_gif_{uuid.uuid4().hex[:8]}.gif"
@@ -2104,8 +2086,7 @@ def handle_image_conversion_universal(request, image_file):
         
         # Сохраняем загруженный файл
         with open(input_path, 'wb+') as destination:
-            for chunk in image_file.chunks():
-                destination.write(chunk)
+            write_uploaded_file(image_file, destination)
         
         # Создаём выходной файл
         output_filename = f"converted_{uuid.uuid4().hex[:8]}.{output_format}"
@@ -2468,8 +2449,7 @@ def api_audio_to_text_view(request):
         
         with tempfile.NamedTemporaryFile(suffix=file_extension, delete=False) as temp_file:
             # Write uploaded file to temporary file
-            for chunk in audio_file.chunks():
-                temp_file.write(chunk)
+            write_uploaded_file(audio_file, temp_file)
             temp_file_path = temp_file.name
         
         try:
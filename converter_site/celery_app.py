@@ -56,6 +56,9 @@ if CELERY_AVAILABLE:
             'converter_site.tasks.convert_audio_to_text': {'queue': 'audio_processing'},
             'converter_site.tasks.create_gif_from_images': {'queue': 'image_processing'},
             'converter_site.tasks.cleanup_old_files': {'queue': 'maintenance'},
+            # Конвертации выполняются выделенными воркерами
+            'converter.tasks.run_adapter_conversion': {'queue': 'conversions'},
+            'converter.tasks.process_conversion_task': {'queue': 'conversions'},
         },
         
         # Конфигурация воркеров
@@ -79,6 +82,12 @@ if CELERY_AVAILABLE:
                 'schedule': crontab(hour=3, minute=0),
                 'args': (1,)  # удалять файлы старше 1 дня
             },
+            # Исходники завершенных задач, оставшиеся после сбоев воркеров
+            'reap-task-temp-files': {
+                'task': 'converter.tasks.reap_task_temp_files',
+                'schedule': crontab(minute=0),
+                'args': (1,)  # через час после завершения задачи
+            },
         },
     )
 
@@ -129,6 +138,10 @@ if CELERY_AVAILABLE:
         'maintenance': {
             'exchange': 'maintenance',
             'routing_key': 'maintenance',
+        },
+        'conversions': {
+            'exchange': 'conversions',
+            'routing_key': 'conversions',
         }
     }
 
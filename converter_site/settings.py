@@ -186,6 +186,27 @@ if DATABASE_URL:
         pass
 
 
+# Cache: Redis when CACHE_REDIS_URL is set (shared by all workers), otherwise per-process memory
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default='')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Redis pub/sub for task progress events (SSE stream); empty disables the stream
+TASK_EVENTS_REDIS_URL = config('TASK_EVENTS_REDIS_URL', default=CACHE_REDIS_URL)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -255,6 +276,11 @@ DATA_UPLOAD_MAX_MEMORY_SIZE = config('DATA_UPLOAD_MAX_MEMORY_SIZE', default=10,
 FILE_UPLOAD_PERMISSIONS = 0o644
 FILE_UPLOAD_DIRECTORY_PERMISSIONS = 0o755
 
+# Отдача скачиваемых файлов через nginx (X-Accel-Redirect): префикс internal
+# location, который указывает на MEDIA_ROOT (например /protected/).
+# Пустое значение - файлы отдает сам Django.
+X_ACCEL_REDIRECT_PREFIX = config('X_ACCEL_REDIRECT_PREFIX', default='')
+
 # Secure media serving in production
 if not DEBUG:
     # Use S3/CloudFlare/nginx for media in production
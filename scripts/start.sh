@@ -15,5 +15,5 @@ python manage.py migrate --noinput
 # Collect static files
 python manage.py collectstatic --noinput || true
 
-# Start gunicorn
-exec gunicorn converter_site.wsgi --bind 0.0.0.0:"${PORT}" --log-file -
+# Start gunicorn (threaded workers overlap DB/storage I/O and hold SSE streams)
+exec gunicorn converter_site.wsgi --bind 0.0.0.0:"${PORT}" --workers 2 --threads 4 --log-file -
@@ -49,6 +49,17 @@ celery -A converter_site worker \
     --logfile=logs/celery_image.log \
     --detach
 
+# Worker для конвертации файлов
+# Каждый процесс держит FFmpeg/MoviePy, поэтому оставляем одно ядро веб-серверу
+CONVERSION_CONCURRENCY=$(( $(nproc) > 1 ? $(nproc) - 1 : 1 ))
+celery -A converter_site worker \
+    --loglevel=info \
+    --concurrency=$CONVERSION_CONCURRENCY \
+    --queues=conversions \
+    --hostname=conversion_worker@%h \
+    --logfile=logs/celery_conversions.log \
+    --detach
+
 # Worker для технических задач
 celery -A converter_site worker \
     --loglevel=info \
@@ -71,6 +82,7 @@ echo ""
 echo "Логи:"
 echo "  - Аудио worker: logs/celery_audio.log"
 echo "  - Изображения worker: logs/celery_image.log" 
+echo "  - Конвертация worker: logs/celery_conversions.log"
 echo "  - Техническая обработка: logs/celery_maintenance.log"
 echo "  - Beat scheduler: logs/celery_beat.log"
 echo ""
@@ -46,6 +46,7 @@ def main():
             'gunicorn',
             '--bind', f'{host}:{port}',
             '--workers', '3',
+            '--threads', '4',  # gthread: requests waiting on DB/storage I/O don't block the worker
             '--timeout', '300',  # 5 minutes timeout for video processing
             '--max-requests', '1000',
             '--max-requests-jitter', '100',